@@ -0,0 +1,217 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import (
+    clean_option_df,
+    calculate_iv,
+    resample_option_df,
+    compute_svi_params,
+    plot_with_slider,
+    export_svi_snapshots,
+    build_svi_total_ivar_curve
+)
+from iv_calibration.config import SVISettings
+from iv_calibration.svi_calibrator import calibrate_svi, extract_svi_slices
+from synthetic import make_txo_chain
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+# (tick 數, 履約價數)
+SIZES = {
+    'small': (50_000, 30),
+    'medium': (200_000, 40),
+    'large': (1_000_000, 60),
+}
+DEFAULT_THRESHOLD = 0.25
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    unit: str
+    n_items: int
+    seconds: float
+    throughput: float
+    peak_mb: float
+
+@dataclass
+class Benchmark:
+    name: str
+    unit: str
+    n_items: int
+    run: Callable[[], object]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Time the hot paths on a synthetic TXO day.')
+    parser.add_argument('--size', choices=tuple(SIZES), default='small', help='synthetic data size')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (best is kept)')
+    parser.add_argument('--only', nargs='*', default=None, help='benchmark names to run')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='allowed relative throughput drop / peak memory growth against the baseline'
+    )
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='baseline JSON path')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    return parser.parse_args()
+
+def build_benchmarks(size: str = 'small') -> List[Benchmark]:
+    # 前一步的輸出作為下一步的輸入，準備資料的時間不計入
+    n_ticks, n_strikes = SIZES[size]
+    option_df, futures_series, underlying_series = make_txo_chain(n_ticks, n_strikes)
+    cleaned_df = clean_option_df(option_df, futures_series, underlying_series)
+    iv_args = [cleaned_df[col].to_numpy() for col in (
+        'option_type', 'time_to_expiry', 'forward_price', 'strike', 'market_price', 'carry_rate'
+    )]
+    cleaned_df['iv'] = calculate_iv(*iv_args)
+    cleaned_df['total_ivar'] = cleaned_df['iv'] ** 2 * cleaned_df['time_to_expiry']
+    option_resampled_df = resample_option_df(cleaned_df)
+    slices = extract_svi_slices(option_resampled_df)
+    vol_surface_svi_df = compute_svi_params(option_resampled_df)
+    output_dir = Path(tempfile.mkdtemp(prefix='iv_bench_'))
+    snapshot_every = 10
+
+    def calibrate_slices():
+        for _, opt_type, log_moneyness, total_ivar, volume in slices:
+            calibrate_svi(opt_type, log_moneyness, total_ivar, volume, SVISettings.default_init_params)
+
+    return [
+        Benchmark('calculate_iv', 'rows/s', len(cleaned_df), lambda: calculate_iv(*iv_args)),
+        Benchmark(
+            'clean_option_df', 'rows/s', len(option_df),
+            lambda: clean_option_df(option_df, futures_series, underlying_series)
+        ),
+        Benchmark('resample_option_df', 'rows/s', len(cleaned_df), lambda: resample_option_df(cleaned_df)),
+        Benchmark('calibrate_svi', 'slices/s', len(slices), calibrate_slices),
+        Benchmark(
+            'compute_svi_params', 'slices/s', len(slices),
+            lambda: compute_svi_params(option_resampled_df)
+        ),
+        Benchmark(
+            'plot_with_slider', 'slices/s', len(vol_surface_svi_df),
+            lambda: plot_with_slider(
+                option_resampled_df,
+                vol_surface_svi_df,
+                build_svi_total_ivar_curve,
+                'total_ivar',
+                'Total Implied Variance',
+                output_dir / 'svi_total_ivar_slider.html',
+                show=False
+            )
+        ),
+        Benchmark(
+            'plot_with_slider_lite', 'slices/s', len(vol_surface_svi_df),
+            lambda: plot_with_slider(
+                option_resampled_df,
+                vol_surface_svi_df,
+                build_svi_total_ivar_curve,
+                'total_ivar',
+                'Total Implied Variance',
+                output_dir / 'svi_total_ivar_slider_lite.html',
+                mode='lite',
+                show=False
+            )
+        ),
+        Benchmark(
+            'export_svi_snapshots', 'frames/s', len(range(0, len(vol_surface_svi_df), snapshot_every)),
+            lambda: export_svi_snapshots(
+                option_resampled_df,
+                vol_surface_svi_df,
+                build_svi_total_ivar_curve,
+                'total_ivar',
+                'Total Implied Variance',
+                output_dir / 'snapshots',
+                every=snapshot_every
+            )
+        ),
+    ]
+
+def measure(benchmark: Benchmark, repeat: int = 3) -> BenchmarkResult:
+    # 計時取最快的一次；peak memory 另外跑一次 tracemalloc（NumPy 的配置也會被追蹤），避免拖慢計時
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark.run()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        benchmark.run()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    seconds = min(timings)
+    return BenchmarkResult(
+        name=benchmark.name,
+        unit=benchmark.unit,
+        n_items=benchmark.n_items,
+        seconds=seconds,
+        throughput=benchmark.n_items / seconds,
+        peak_mb=peak_bytes / 1024 ** 2
+    )
+
+def compare_to_baseline(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    # 吞吐量下降或 peak memory 增加超過 threshold 視為 regression；baseline 沒有的項目略過
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        if result.throughput < reference['throughput'] * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.throughput:,.0f} {result.unit} "
+                f"vs baseline {reference['throughput']:,.0f} {result.unit}"
+            )
+        if result.peak_mb > reference['peak_mb'] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: peak {result.peak_mb:,.1f} MiB vs baseline {reference['peak_mb']:,.1f} MiB"
+            )
+    return regressions
+
+def main(
+    size: str = 'small',
+    repeat: int = 3,
+    only: Optional[List[str]] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    baseline_path: Path = BASELINE_PATH,
+    save_baseline: bool = False
+) -> int:
+    benchmarks = [b for b in build_benchmarks(size) if only is None or b.name in only]
+    results = [measure(benchmark, repeat) for benchmark in benchmarks]
+    summary_df = pd.DataFrame.from_records([asdict(r) for r in results]).set_index('name')
+    with pd.option_context('display.width', 160, 'display.float_format', '{:,.3f}'.format):
+        print(f'size={size} ({SIZES[size][0]:,} ticks, {SIZES[size][1]} strikes)')
+        print(summary_df)
+
+    baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if save_baseline:
+        baselines.setdefault(size, {}).update({r.name: asdict(r) for r in results})
+        baseline_path.write_text(json.dumps(baselines, indent=2) + '\n')
+        print(f'baseline saved to {baseline_path}')
+        return 0
+
+    regressions = compare_to_baseline(results, baselines.get(size, {}), threshold)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(main(
+        size=args.size,
+        repeat=args.repeat,
+        only=args.only,
+        threshold=args.threshold,
+        baseline_path=args.baseline,
+        save_baseline=args.save_baseline
+    ))
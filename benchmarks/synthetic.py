@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from iv_calibration.config import SETTINGS
+from iv_calibration.black_scholes import black_scholes_greeks
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+# 產生近似 TXO 的一日資料：現貨每 5 秒一筆、期貨與選擇權隨機成交，
+# 選擇權價格由一組隨時間緩慢變動的 SVI 微笑以 Black-Scholes 反推，四捨五入到 0.1 點
+SESSION = pd.Timedelta(hours=5)
+STRIKE_STEP = 50.0
+CARRY_RATE = 0.01
+
+def make_underlying_series(seed: int = 0, spot: float = 17000.0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(SETTINGS.sample_start_ts, SETTINGS.sample_end_ts, freq='5s', name='ts')
+    log_path = np.cumsum(rng.normal(0.0, 0.15 / np.sqrt(252 * 3600), index.size))
+    return pd.Series(spot * np.exp(log_path), index=index, name='發行量加權股價指數')
+
+def _random_ticks(rng: np.random.Generator, n: int) -> pd.DatetimeIndex:
+    offsets = np.sort(rng.integers(1, int(SESSION / pd.Timedelta('1ms')), n))
+    return pd.DatetimeIndex(pd.Timestamp(SETTINGS.sample_start_ts) + pd.to_timedelta(offsets, unit='ms'), name='ts')
+
+def _underlying_at(underlying_series: pd.Series, ts: pd.DatetimeIndex) -> np.ndarray:
+    pos = np.searchsorted(underlying_series.index.asi8, ts.asi8, side='right') - 1
+    return underlying_series.to_numpy()[np.clip(pos, 0, None)]
+
+def make_futures_series(
+    underlying_series: pd.Series,
+    n_ticks: int = 20_000,
+    seed: int = 1
+) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    ts = _random_ticks(rng, n_ticks)
+    tau = (SETTINGS.expiration_ts - ts) / SETTINGS.annualization_factor
+    spot = _underlying_at(underlying_series, ts)
+    price = np.round(spot * np.exp(CARRY_RATE * tau.to_numpy()) + rng.normal(0.0, 2.0, n_ticks))
+    return pd.Series(price, index=ts, name='market_price')
+
+def make_option_ticks(
+    underlying_series: pd.Series,
+    n_ticks: int = 200_000,
+    n_strikes: int = 40,
+    seed: int = 2
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = _random_ticks(rng, n_ticks)
+    tau = ((SETTINGS.expiration_ts - ts) / SETTINGS.annualization_factor).to_numpy()
+    forward = _underlying_at(underlying_series, ts) * np.exp(CARRY_RATE * tau)
+    atm = np.round(underlying_series.iloc[0] / STRIKE_STEP) * STRIKE_STEP
+    strikes = atm + STRIKE_STEP * (np.arange(n_strikes) - n_strikes // 2)
+    # 成交集中在價平附近
+    strike_idx = np.clip(
+        np.round(rng.normal(n_strikes / 2, n_strikes / 6, n_ticks)), 0, n_strikes - 1
+    ).astype(int)
+    strike = strikes[strike_idx]
+    option_type = np.where(rng.random(n_ticks) < 0.5, 'C', 'P')
+
+    # rho 在盤中緩慢漂移，讓每個 slice 的最適參數不同
+    drift = np.linspace(0.0, 1.0, n_ticks)
+    k = np.log(strike / forward)
+    total_ivar = compute_svi_total_ivar(k, 2e-4, 0.03, -0.55 + 0.1 * drift, 0.0, 0.08)
+    vol = np.sqrt(total_ivar / tau) * np.exp(rng.normal(0.0, 0.01, n_ticks))
+    price = black_scholes_greeks(option_type == 'C', tau, vol, forward, strike, CARRY_RATE).price
+    return pd.DataFrame({
+        'strike': strike,
+        'option_type': option_type,
+        'market_price': np.maximum(np.round(price, 1), 0.1),
+        'volume': rng.integers(1, 20, n_ticks).astype(float),
+    }, index=ts)
+
+def make_txo_chain(
+    n_ticks: int = 200_000,
+    n_strikes: int = 40,
+    seed: int = 0
+) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    underlying_series = make_underlying_series(seed)
+    futures_series = make_futures_series(underlying_series, max(n_ticks // 10, 100), seed + 1)
+    option_df = make_option_ticks(underlying_series, n_ticks, n_strikes, seed + 2)
+    return option_df, futures_series, underlying_series
@@ -1,98 +1,277 @@
 import sys
+import argparse
 from pathlib import Path
+from typing import Optional
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 import pandas as pd
 from iv_calibration import (
     PATHS,
     SETTINGS,
     read_twse_index,
+    read_taifex_daily,
+    read_taifex_daily_by_expiry,
+    parse_expiration_ts,
+    select_futures_expiry,
+    load_contract_data,
+    load_contract_data_by_expiry,
     filter_contract_data,
+    split_contract_data,
     clean_option_df,
     clean_futures_df,
     calculate_iv,
-    resample_option_df
+    resample_option_df,
+    RunMetrics
 )
+from iv_calibration.data_preprocessor import OPTION_COLUMN_NAMES, FUTURES_COLUMN_NAMES
 
 #%%
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description='Preprocess TXO ticks into resampled IV slices.')
+    parser.add_argument(
+        '--iv-workers', type=int, default=SETTINGS.iv_n_workers,
+        help='number of processes used for the IV computation (1 = in-process)'
+    )
+    parser.add_argument(
+        '--iv-chunk-size', type=int, default=None,
+        help='rows per IV work chunk (default: split evenly across workers)'
+    )
+    parser.add_argument(
+        '--chunksize', type=int, default=None,
+        help='stream the raw CSVs in chunks of this many rows, keeping only the target contract '
+             '(default: read whole files)'
+    )
+    parser.add_argument(
+        '--source', choices=('csv', 'parquet'), default='csv',
+        help='read the raw CSVs, or the partitioned Parquet datasets built by run_raw_converter.py'
+    )
+    parser.add_argument(
+        '--all-expiries', action='store_true',
+        help='process every TXO expiry (monthly and weekly) from the same raw read'
+    )
+    parser.add_argument(
+        '--metrics-log', type=Path, default=None,
+        help='append stage timings and row counters to this .jsonl file (any other path: parquet directory)'
+    )
+    return parser.parse_args()
+
+def peak_memory_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # Linux 回傳 KiB，macOS 回傳 bytes
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def load_raw_frames():
     twse_index_df = read_twse_index(PATHS.raw_twse_index_data)
     
     all_futures_df = pd.read_csv(PATHS.raw_futures_data, encoding='big5', low_memory=False)
     all_futures_df.columns = all_futures_df.columns.str.strip()
-    all_futures_df = all_futures_df.rename(columns={
-        '成交日期': 'trade_date',
-        '商品代號': 'contract_code',
-        '到期月份(週別)': 'expiry',
-        '成交時間': 'trade_time',
-        '成交價格': 'market_price',
-        '成交數量(B+S)': 'volume',
-        '近月價格': 'near_month_price',
-        '遠月價格': 'far_month_price',
-        '開盤集合競價': 'opening_call_auction'
-    }).assign(
+    all_futures_df = all_futures_df.rename(columns=FUTURES_COLUMN_NAMES).assign(
         contract_code=lambda df: df['contract_code'].str.strip(),
         expiry=lambda df: df['expiry'].str.strip()
     )
     
     all_option_df = pd.read_csv(PATHS.raw_option_data, encoding='big5', low_memory=False)
     all_option_df.columns = all_option_df.columns.str.strip()
-    all_option_df = all_option_df.rename(columns={
-        '成交日期': 'trade_date',
-        '商品代號': 'contract_code',
-        '履約價格': 'strike',
-        '到期月份(週別)': 'expiry',
-        '買賣權別': 'option_type',
-        '成交時間': 'trade_time',
-        '成交價格': 'market_price',
-        '成交數量(B or S)': 'volume',
-        '開盤集合競價': 'opening_call_auction'
-    }).assign(
+    all_option_df = all_option_df.rename(columns=OPTION_COLUMN_NAMES).assign(
         contract_code=lambda df: df['contract_code'].str.strip(),
         expiry=lambda df: df['expiry'].str.strip(),
         option_type=lambda df: df['option_type'].str.strip()
     )
     all_option_df = all_option_df.iloc[1:].reset_index(drop=True)
+    return twse_index_df, all_futures_df, all_option_df
+
+def load_contract_frames(chunksize=None, source='csv', metrics=None):
+    if source == 'parquet':
+        twse_index_df = read_twse_index(PATHS.raw_twse_index_data)
+        futures_df = load_contract_data(
+            PATHS.futures_dataset,
+            contract_code=SETTINGS.futures_code,
+            expiry=SETTINGS.expiry,
+            metrics=metrics
+        )
+        option_df = load_contract_data(
+            PATHS.option_dataset,
+            contract_code=SETTINGS.option_code,
+            expiry=SETTINGS.expiry,
+            metrics=metrics
+        )
+    elif chunksize is None:
+        twse_index_df, all_futures_df, all_option_df = load_raw_frames()
+        futures_df = filter_contract_data(
+            df=all_futures_df,
+            contract_code=SETTINGS.futures_code,
+            expiry=SETTINGS.expiry,
+            metrics=metrics
+        )
+        option_df = filter_contract_data(
+            df=all_option_df, 
+            contract_code=SETTINGS.option_code, 
+            expiry=SETTINGS.expiry,
+            metrics=metrics
+        )
+    else:
+        twse_index_df = read_twse_index(PATHS.raw_twse_index_data)
+        futures_df = read_taifex_daily(
+            PATHS.raw_futures_data,
+            FUTURES_COLUMN_NAMES,
+            contract_code=SETTINGS.futures_code,
+            expiry=SETTINGS.expiry,
+            chunksize=chunksize
+        )
+        # 與整檔讀取時的 iloc[1:] 一致，略過第一筆資料列
+        option_df = read_taifex_daily(
+            PATHS.raw_option_data,
+            OPTION_COLUMN_NAMES,
+            contract_code=SETTINGS.option_code,
+            expiry=SETTINGS.expiry,
+            chunksize=chunksize,
+            skiprows=[1]
+        )
+    peak_mb = peak_memory_mb()
+    if peak_mb is not None:
+        print(f'raw data loaded, peak RSS {peak_mb:.0f} MiB')
+    return twse_index_df, futures_df, option_df
+
+def load_expiry_frames(chunksize=None, source='csv', metrics=None):
+    # 每個原始檔只讀一次，回傳 {expiry: df}
+    if source == 'parquet':
+        twse_index_df = read_twse_index(PATHS.raw_twse_index_data)
+        futures_dfs = load_contract_data_by_expiry(
+            PATHS.futures_dataset, SETTINGS.futures_code, metrics=metrics
+        )
+        option_dfs = load_contract_data_by_expiry(
+            PATHS.option_dataset, SETTINGS.option_code, metrics=metrics
+        )
+    elif chunksize is None:
+        twse_index_df, all_futures_df, all_option_df = load_raw_frames()
+        futures_dfs = split_contract_data(all_futures_df, SETTINGS.futures_code, metrics=metrics)
+        option_dfs = split_contract_data(all_option_df, SETTINGS.option_code, metrics=metrics)
+    else:
+        twse_index_df = read_twse_index(PATHS.raw_twse_index_data)
+        futures_dfs = read_taifex_daily_by_expiry(
+            PATHS.raw_futures_data,
+            FUTURES_COLUMN_NAMES,
+            contract_code=SETTINGS.futures_code,
+            chunksize=chunksize
+        )
+        option_dfs = read_taifex_daily_by_expiry(
+            PATHS.raw_option_data,
+            OPTION_COLUMN_NAMES,
+            contract_code=SETTINGS.option_code,
+            chunksize=chunksize,
+            skiprows=[1]
+        )
+    peak_mb = peak_memory_mb()
+    if peak_mb is not None:
+        print(f'raw data loaded, peak RSS {peak_mb:.0f} MiB')
+    return twse_index_df, futures_dfs, option_dfs
+
+def clean_expiry_frames(futures_dfs, option_dfs, underlying_series, metrics=None) -> pd.DataFrame:
+    futures_dfs = {
+        expiry: clean_futures_df(futures_df, underlying_series, parse_expiration_ts(expiry), metrics)
+        for expiry, futures_df in futures_dfs.items()
+    }
+    option_frames = []
+    for expiry, option_df in option_dfs.items():
+        futures_expiry = select_futures_expiry(expiry, futures_dfs)
+        option_df = clean_option_df(
+            option_df,
+            futures_dfs[futures_expiry]['market_price'],
+            underlying_series,
+            expiration_ts=parse_expiration_ts(expiry),
+            futures_expiration_ts=parse_expiration_ts(futures_expiry),
+            metrics=metrics
+        )
+        option_frames.append(option_df.assign(expiry=expiry))
+        print(f'{expiry}: {len(option_df)} ticks, forward from TX {futures_expiry}')
+    return pd.concat(option_frames).sort_index(kind='mergesort')
+
+def main(
+    iv_workers: int = SETTINGS.iv_n_workers,
+    iv_chunk_size=None,
+    chunksize=None,
+    source='csv',
+    all_expiries: bool = False,
+    metrics_log=None
+):
+    metrics = RunMetrics()
+    if all_expiries:
+        with metrics.stage('load') as record:
+            twse_index_df, futures_dfs, option_dfs = load_expiry_frames(chunksize, source, metrics)
+            record['rows_out'] = sum(len(df) for df in option_dfs.values())
+        with metrics.stage('clean', record['rows_out']) as record:
+            option_df = clean_expiry_frames(
+                futures_dfs, option_dfs, twse_index_df['發行量加權股價指數'], metrics
+            )
+            record['rows_out'] = len(option_df)
+        output_path = PATHS.option_resampled_expiries
+        print('option_df cleaned')
+    else:
+        with metrics.stage('load') as record:
+            twse_index_df, futures_df, option_df = load_contract_frames(chunksize, source, metrics)
+            record['rows_out'] = len(option_df)
+        output_path = PATHS.option_resampled
     
-    #%%
-    futures_df = filter_contract_data(
-        df=all_futures_df,
-        contract_code=SETTINGS.futures_code,
-        expiry=SETTINGS.expiry
-    )
-    print('futures_df downloaded')
-    futures_df = clean_futures_df(futures_df, twse_index_df['發行量加權股價指數'])
-    print('futures_df cleaned')
-    #%%
-    option_df = filter_contract_data(
-        df=all_option_df, 
-        contract_code=SETTINGS.option_code, 
-        expiry=SETTINGS.expiry
-    )
-    print('option_df downloaded')
-    option_df = clean_option_df(option_df, futures_df['market_price'], twse_index_df['發行量加權股價指數'])
-    print('option_df cleaned')
-    option_df['iv'] = calculate_iv(
-        option_df['option_type'],
-        option_df['time_to_expiry'],
-        option_df['forward_price'],
-        option_df['strike'],
-        option_df['market_price'],
-        option_df['carry_rate']
-    )
-    option_df['total_ivar'] = option_df['iv'] ** 2 * option_df['time_to_expiry']
+        #%%
+        print('futures_df downloaded')
+        with metrics.stage('clean_futures_df', len(futures_df)) as record:
+            futures_df = clean_futures_df(futures_df, twse_index_df['發行量加權股價指數'], metrics=metrics)
+            record['rows_out'] = len(futures_df)
+        print('futures_df cleaned')
+        #%%
+        print('option_df downloaded')
+        with metrics.stage('clean_option_df', len(option_df)) as record:
+            option_df = clean_option_df(
+                option_df, futures_df['market_price'], twse_index_df['發行量加權股價指數'], metrics=metrics
+            )
+            record['rows_out'] = len(option_df)
+        print('option_df cleaned')
+    with metrics.stage('calculate_iv', len(option_df)) as record:
+        option_df['iv'] = calculate_iv(
+            option_df['option_type'],
+            option_df['time_to_expiry'],
+            option_df['forward_price'],
+            option_df['strike'],
+            option_df['market_price'],
+            option_df['carry_rate'],
+            n_workers=iv_workers,
+            chunk_size=iv_chunk_size,
+            metrics=metrics
+        )
+        option_df['total_ivar'] = option_df['iv'] ** 2 * option_df['time_to_expiry']
+        record['rows_out'] = int(option_df['iv'].notna().sum())
     print('iv/total ivar calculated')
     
     #%%
-    option_resampled_df = resample_option_df(option_df)
+    with metrics.stage('resample_option_df', len(option_df)) as record:
+        option_resampled_df = resample_option_df(option_df)
+        record['rows_out'] = len(option_resampled_df)
     print('option_resampled_df builded')
-    option_resampled_df.to_parquet(
-        PATHS.option_resampled,
-        engine='pyarrow',
-        index=True
-    )
+    with metrics.stage('write_parquet', len(option_resampled_df)):
+        option_resampled_df.to_parquet(
+            output_path,
+            engine='pyarrow',
+            index=True
+        )
     print('option_resampled_df restored')
+    print(metrics.summary())
+    if metrics_log is not None:
+        metrics.write(metrics_log)
 
 #%%
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(
+        iv_workers=args.iv_workers,
+        iv_chunk_size=args.iv_chunk_size,
+        chunksize=args.chunksize,
+        source=args.source,
+        all_expiries=args.all_expiries,
+        metrics_log=args.metrics_log
+    )
\ No newline at end of file
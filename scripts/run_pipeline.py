@@ -0,0 +1,125 @@
+import sys
+import argparse
+import functools
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from iv_calibration import PATHS, Stage, run_pipeline
+from iv_calibration import data_preprocessor, black_scholes, svi_calibrator, svi_batch, svi_arbitrage
+from iv_calibration.config import SVISettings
+from iv_calibration.visualization import svi_plotter
+import run_data_preprocessor
+import run_svi_calibrator
+import run_svi_plotter
+
+PREPROCESS_SETTINGS = (
+    'SETTINGS.expiration_ts',
+    'SETTINGS.expiration_time',
+    'SETTINGS.annualization_factor',
+    'SETTINGS.carry_rate_default',
+    'SETTINGS.futures_code',
+    'SETTINGS.option_code',
+    'SETTINGS.expiry',
+    'SETTINGS.demo_resample_freq',
+    'SETTINGS.open_time',
+    'SETTINGS.close_time',
+)
+SVI_SETTINGS = (
+    'SETTINGS.expiration_ts',
+    'SETTINGS.annualization_factor',
+    'SVISettings.global_bounds',
+    'SVISettings.default_init_params',
+    'SVISettings.call_mask_left',
+    'SVISettings.put_mask_right',
+    'SVISettings.arbitrage_k_grid',
+    'SVISettings.arbitrage_n_grid',
+    'SVISettings.butterfly_penalty',
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Run preprocess -> svi -> plot, skipping stages whose cached outputs are current.'
+    )
+    parser.add_argument('targets', nargs='*', help='stages to bring up to date (default: all)')
+    parser.add_argument('--force', nargs='*', default=(), help='stages to re-run even if cached')
+    parser.add_argument('--dry-run', action='store_true', help='only report which stages are stale')
+    parser.add_argument('--iv-workers', type=int, default=1, help='processes for the IV computation')
+    parser.add_argument('--workers', type=int, default=SVISettings.n_workers, help='processes for SVI')
+    parser.add_argument(
+        '--method', choices=('L-BFGS-B', 'least_squares', 'quasi_explicit'),
+        default=SVISettings.method, help='SVI calibration engine'
+    )
+    parser.add_argument(
+        '--arbitrage', choices=('off', 'check', 'refit'), default='off',
+        help='butterfly arbitrage handling after calibration'
+    )
+    return parser.parse_args()
+
+def build_stages(
+    iv_workers: int = 1,
+    n_workers: int = SVISettings.n_workers,
+    method: str = SVISettings.method,
+    arbitrage: str = 'off'
+):
+    # worker 數不影響輸出，不納入快取鍵；run 用 functools.partial，快取鍵才會追蹤各腳本本身
+    return [
+        Stage(
+            name='preprocess',
+            run=functools.partial(run_data_preprocessor.main, iv_workers=iv_workers),
+            inputs=(PATHS.raw_twse_index_data, PATHS.raw_futures_data, PATHS.raw_option_data),
+            outputs=(PATHS.option_resampled,),
+            settings=PREPROCESS_SETTINGS,
+            sources=(Path(data_preprocessor.__file__), Path(black_scholes.__file__))
+        ),
+        Stage(
+            name='svi',
+            run=functools.partial(
+                run_svi_calibrator.main,
+                n_workers=n_workers, method=method, arbitrage=arbitrage, save_prep=True
+            ),
+            inputs=(PATHS.option_resampled,),
+            outputs=(PATHS.vol_surface_svi, PATHS.vol_surface_svi_prep),
+            settings=SVI_SETTINGS,
+            params={'method': method, 'arbitrage': arbitrage},
+            sources=(
+                Path(svi_calibrator.__file__),
+                Path(svi_batch.__file__),
+                Path(svi_arbitrage.__file__)
+            )
+        ),
+        Stage(
+            name='plot',
+            run=run_svi_plotter.main,
+            inputs=(PATHS.option_resampled, PATHS.vol_surface_svi, PATHS.vol_surface_svi_prep),
+            outputs=(PATHS.svi_total_ivar_slider, PATHS.svi_iv_slider),
+            settings=('SVISettings.call_mask_left', 'SVISettings.put_mask_right'),
+            # plotter 沿用 svi_calibrator 的 construct_valid_mask
+            sources=(Path(svi_plotter.__file__), Path(svi_calibrator.__file__))
+        ),
+    ]
+
+def main(
+    targets=None,
+    force=(),
+    dry_run: bool = False,
+    iv_workers: int = 1,
+    n_workers: int = SVISettings.n_workers,
+    method: str = SVISettings.method,
+    arbitrage: str = 'off'
+):
+    stages = build_stages(iv_workers, n_workers, method, arbitrage)
+    status = run_pipeline(stages, targets=targets or None, force=force, dry_run=dry_run)
+    for name, state in status.items():
+        print(f'{name:<12}{state}')
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        targets=args.targets,
+        force=args.force,
+        dry_run=args.dry_run,
+        iv_workers=args.iv_workers,
+        n_workers=args.workers,
+        method=args.method,
+        arbitrage=args.arbitrage
+    )
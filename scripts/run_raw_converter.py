@@ -0,0 +1,50 @@
+import sys
+import shutil
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from iv_calibration import PATHS, SETTINGS, convert_taifex_csv_to_parquet
+from iv_calibration.data_preprocessor import OPTION_COLUMN_NAMES, FUTURES_COLUMN_NAMES
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Convert raw TAIFEX Big5 CSVs into partitioned Parquet datasets (one-time).'
+    )
+    parser.add_argument('--option-glob', default=PATHS.raw_option_data.name,
+                        help='glob of option CSVs under the raw directory')
+    parser.add_argument('--futures-glob', default=PATHS.raw_futures_data.name,
+                        help='glob of futures CSVs under the raw directory')
+    parser.add_argument('--chunksize', type=int, default=SETTINGS.csv_chunksize)
+    parser.add_argument('--overwrite', action='store_true',
+                        help='delete the existing datasets before converting')
+    return parser.parse_args()
+
+def main(
+    option_glob: str = PATHS.raw_option_data.name,
+    futures_glob: str = PATHS.raw_futures_data.name,
+    chunksize: int = SETTINGS.csv_chunksize,
+    overwrite: bool = False
+):
+    jobs = (
+        # 與整檔讀取時的 iloc[1:] 一致，option 檔略過第一筆資料列
+        (option_glob, PATHS.option_dataset, OPTION_COLUMN_NAMES, [1]),
+        (futures_glob, PATHS.futures_dataset, FUTURES_COLUMN_NAMES, None),
+    )
+    for pattern, dataset_dir, column_names, skiprows in jobs:
+        if overwrite and dataset_dir.exists():
+            shutil.rmtree(dataset_dir)
+        for csv_path in sorted(PATHS.raw.glob(pattern)):
+            n_rows = convert_taifex_csv_to_parquet(
+                csv_path, dataset_dir, column_names, chunksize, skiprows
+            )
+            print(f'{csv_path.name}: {n_rows} rows -> {dataset_dir}')
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        option_glob=args.option_glob,
+        futures_glob=args.futures_glob,
+        chunksize=args.chunksize,
+        overwrite=args.overwrite
+    )
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd
+from iv_calibration import PATHS, compute_ssvi_params
+
+def main():
+    # 需先以 run_svi_calibrator.py --all-expiries 產生各到期月份的 raw SVI
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi_expiries)
+    vol_surface_ssvi = compute_ssvi_params(vol_surface_svi_df)
+    vol_surface_ssvi.to_parquet(PATHS.vol_surface_ssvi)
+    n_ts = vol_surface_ssvi.index.get_level_values('ts').nunique()
+    print(f'{n_ts} timestamps, median objective {vol_surface_ssvi["objective"].median():.3e}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import SETTINGS, clean_futures_df
+from iv_calibration.streaming import (
+    StreamingSurfaceCalibrator,
+    replay_ticks,
+    stream_surface
+)
+from run_data_preprocessor import load_contract_frames
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Replay the raw CSV ticks through the streaming SVI calibrator.'
+    )
+    parser.add_argument('--freq', default=SETTINGS.demo_resample_freq, help='bar frequency')
+    parser.add_argument('--chunksize', type=int, default=None, help='read the raw CSVs in chunks')
+    parser.add_argument('--source', choices=('csv', 'parquet'), default='csv',
+                        help='raw CSVs or the converted Parquet datasets')
+    parser.add_argument('--output', type=Path, default=None, help='optional parquet path for the SVI slices')
+    return parser.parse_args()
+
+def main(freq: str = SETTINGS.demo_resample_freq, output=None, chunksize=None, source='csv'):
+    twse_index_df, futures_df, option_df = load_contract_frames(chunksize, source)
+    underlying_series = twse_index_df['發行量加權股價指數']
+    futures_df = clean_futures_df(futures_df, underlying_series)
+
+    ticks = replay_ticks(option_df, futures_df['market_price'], underlying_series)
+    records, latencies = [], []
+    for bar in stream_surface(ticks, StreamingSurfaceCalibrator(freq=freq)):
+        records.append(bar.params)
+        latencies.append(bar.latency)
+        print(f"{bar.ts:%H:%M:%S}  rho={bar.params['rho']:+.4f}  latency={bar.latency * 1e3:.1f} ms")
+
+    latencies = np.array(latencies)
+    print(
+        f'{len(records)} bars, latency p50={np.percentile(latencies, 50) * 1e3:.1f} ms '
+        f'p99={np.percentile(latencies, 99) * 1e3:.1f} ms max={latencies.max() * 1e3:.1f} ms'
+    )
+    if output is not None:
+        pd.DataFrame.from_records(records).set_index('ts').to_parquet(output)
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(freq=args.freq, output=args.output, chunksize=args.chunksize, source=args.source)
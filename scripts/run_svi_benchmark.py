@@ -0,0 +1,82 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import PATHS
+from iv_calibration.config import SVISettings
+from iv_calibration.svi_calibrator import (
+    construct_valid_mask,
+    extract_svi_slices,
+    fit_svi_slice
+)
+
+# (名稱, method, 是否使用解析梯度)
+VARIANTS = (
+    ('L-BFGS-B (finite diff)', 'L-BFGS-B', False),
+    ('L-BFGS-B (analytic)', 'L-BFGS-B', True),
+    ('least_squares (analytic)', 'least_squares', True),
+    ('quasi_explicit', 'quasi_explicit', True),
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare SVI optimizer variants slice by slice.')
+    parser.add_argument('--n-ts', type=int, default=None, help='only use the first N timestamps')
+    return parser.parse_args()
+
+def run_variant(slices, method: str, jac: bool) -> pd.DataFrame:
+    records = []
+    init_params = SVISettings.default_init_params
+    for ts, opt_type, log_moneyness, total_ivar, volume in slices:
+        valid_mask = construct_valid_mask(opt_type, log_moneyness, total_ivar, volume)
+        if valid_mask.sum() < 6:
+            init_params = SVISettings.default_init_params
+            continue
+        start = time.perf_counter()
+        res = fit_svi_slice(
+            log_moneyness[valid_mask],
+            total_ivar[valid_mask],
+            volume[valid_mask],
+            init_params,
+            method=method,
+            jac=jac
+        )
+        elapsed = time.perf_counter() - start
+        init_params = res.x if res.success else SVISettings.default_init_params
+        records.append({
+            'ts': ts,
+            'seconds': elapsed,
+            'nfev': res.nfev,
+            'objective': res.objective,
+            'success': bool(res.success)
+        })
+    return pd.DataFrame.from_records(records).set_index('ts')
+
+def main(n_ts=None):
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
+    slices = extract_svi_slices(option_resampled_df)[:n_ts]
+
+    summary = []
+    for name, method, jac in VARIANTS:
+        per_slice = run_variant(slices, method, jac)
+        summary.append({
+            'variant': name,
+            'wall_s': per_slice['seconds'].sum(),
+            'ms_per_slice': per_slice['seconds'].mean() * 1e3,
+            'nfev_mean': per_slice['nfev'].mean(),
+            'nfev_median': per_slice['nfev'].median(),
+            'nfev_max': per_slice['nfev'].max(),
+            'objective_median': per_slice['objective'].median(),
+            'success': f"{per_slice['success'].sum()}/{len(per_slice)}"
+        })
+    summary_df = pd.DataFrame.from_records(summary).set_index('variant')
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(summary_df)
+    return summary_df
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(n_ts=args.n_ts)
@@ -1,14 +1,170 @@
 import sys
+import argparse
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
 import pandas as pd
-from iv_calibration import PATHS, compute_svi_params
+from iv_calibration import (
+    PATHS,
+    compute_svi_params,
+    compute_svi_surface,
+    compute_svi_params_batch,
+    compute_svi_params_incremental,
+    hash_svi_slices,
+    check_butterfly_arbitrage,
+    refit_butterfly_violations,
+    build_svi_slice_prep,
+    RunMetrics
+)
+from iv_calibration.config import SVISettings
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Calibrate raw SVI slices per resampled timestamp.')
+    parser.add_argument(
+        '--workers', type=int, default=SVISettings.n_workers,
+        help='number of processes; the day is split into contiguous time blocks'
+    )
+    parser.add_argument(
+        '--block-size', type=int, default=None,
+        help='timestamps per block (default: split evenly across workers)'
+    )
+    parser.add_argument(
+        '--method', choices=('L-BFGS-B', 'least_squares', 'quasi_explicit'),
+        default=SVISettings.method, help='SVI calibration engine'
+    )
+    parser.add_argument(
+        '--batch', action='store_true',
+        help='fit all slices at once with the batched Levenberg-Marquardt solver'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='only recalibrate slices whose inputs changed since the last run'
+    )
+    parser.add_argument(
+        '--arbitrage', choices=('off', 'check', 'refit'), default='off',
+        help="report slices with Durrleman g(k) < 0, or also re-fit them with a penalty"
+    )
+    parser.add_argument(
+        '--all-expiries', action='store_true',
+        help='calibrate every expiry in option_resampled_expiries, one process per expiry'
+    )
+    parser.add_argument(
+        '--save-prep', action='store_true',
+        help='also store per-row log-moneyness, valid mask, volume thresholds and residuals for the plotter'
+    )
+    parser.add_argument(
+        '--metrics-log', type=Path, default=None,
+        help='append stage timings and per-slice optimizer stats to this .jsonl file '
+             '(any other path: parquet directory)'
+    )
+    return parser.parse_args()
+
+def calibrate(
+    option_resampled_df: pd.DataFrame,
+    n_workers: int,
+    block_size,
+    method: str,
+    batch: bool,
+    incremental: bool,
+    metrics: RunMetrics,
+    arbitrage: str = 'off'
+) -> pd.DataFrame:
+    if incremental:
+        cached_params_df, cached_hashes = None, None
+        if PATHS.vol_surface_svi.exists() and PATHS.vol_surface_svi_hashes.exists():
+            cached_params_df = pd.read_parquet(PATHS.vol_surface_svi)
+            cached_hashes = pd.read_parquet(PATHS.vol_surface_svi_hashes)['slice_hash']
+        vol_surface_svi, hashes, n_changed = compute_svi_params_incremental(
+            option_resampled_df,
+            cached_params_df,
+            cached_hashes,
+            method=method,
+            metrics=metrics,
+            n_workers=n_workers,
+            block_size=block_size,
+            batch=batch,
+            arbitrage=arbitrage
+        )
+        print(f'recalibrated {n_changed} / {len(hashes)} slices')
+    else:
+        if batch:
+            vol_surface_svi = compute_svi_params_batch(option_resampled_df, metrics=metrics)
+        else:
+            vol_surface_svi = compute_svi_params(
+                option_resampled_df,
+                n_workers=n_workers,
+                block_size=block_size,
+                method=method,
+                metrics=metrics
+            )
+        # 完整校準也寫出雜湊，下一次 --incremental 才能沿用這次的結果
+        hashes = hash_svi_slices(option_resampled_df, 'batch' if batch else method, arbitrage)
+    hashes.to_frame().to_parquet(PATHS.vol_surface_svi_hashes)
+    return vol_surface_svi
+
+def report_metrics(metrics: RunMetrics, metrics_log=None):
+    print(metrics.summary())
+    if metrics_log is not None:
+        metrics.write(metrics_log)
+
+def main(
+    n_workers: int = SVISettings.n_workers,
+    block_size=None,
+    method: str = SVISettings.method,
+    batch: bool = False,
+    incremental: bool = False,
+    all_expiries: bool = False,
+    arbitrage: str = 'off',
+    save_prep: bool = False,
+    metrics_log=None
+):
+    metrics = RunMetrics()
+    if all_expiries:
+        option_resampled_df = pd.read_parquet(PATHS.option_resampled_expiries)
+        with metrics.stage('compute_svi_surface', len(option_resampled_df)) as record:
+            vol_surface_svi = compute_svi_surface(
+                option_resampled_df, n_workers=n_workers, method=method, metrics=metrics
+            )
+            record['rows_out'] = len(vol_surface_svi)
+        vol_surface_svi.to_parquet(PATHS.vol_surface_svi_expiries)
+        report_metrics(metrics, metrics_log)
+        return
 
-def main():
     option_resampled_df = pd.read_parquet(PATHS.option_resampled)
-    vol_surface_svi = compute_svi_params(option_resampled_df)
+    with metrics.stage('calibrate', len(option_resampled_df)) as record:
+        vol_surface_svi = calibrate(
+            option_resampled_df, n_workers, block_size, method, batch, incremental, metrics, arbitrage
+        )
+        record['rows_out'] = len(vol_surface_svi)
+    if arbitrage != 'off':
+        with metrics.stage(f'arbitrage_{arbitrage}', len(vol_surface_svi)) as record:
+            if arbitrage == 'refit':
+                vol_surface_svi, report = refit_butterfly_violations(option_resampled_df, vol_surface_svi)
+            else:
+                report = check_butterfly_arbitrage(vol_surface_svi)
+            record['rows_out'] = int((~report['violation']).sum())
+        print(f"butterfly arbitrage: {int(report['violation'].sum())} / {len(report)} slices with g(k) < 0")
+        if report['violation'].any():
+            print(report[report['violation']])
     vol_surface_svi.to_parquet(PATHS.vol_surface_svi)
+    if save_prep:
+        # 在參數檔之後寫出，plotter 以修改時間判斷是否為同一次校準的結果
+        with metrics.stage('build_svi_slice_prep', len(option_resampled_df)) as record:
+            slice_prep = build_svi_slice_prep(option_resampled_df, vol_surface_svi)
+            record['rows_out'] = int(slice_prep['valid'].sum())
+        slice_prep.to_parquet(PATHS.vol_surface_svi_prep)
+    report_metrics(metrics, metrics_log)
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(
+        n_workers=args.workers,
+        block_size=args.block_size,
+        method=args.method,
+        batch=args.batch,
+        incremental=args.incremental,
+        all_expiries=args.all_expiries,
+        arbitrage=args.arbitrage,
+        save_prep=args.save_prep,
+        metrics_log=args.metrics_log
+    )
@@ -1,4 +1,5 @@
 import sys
+import argparse
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1] / 'src'))
 
@@ -6,31 +7,97 @@ import pandas as pd
 from iv_calibration import (
     PATHS,
     plot_with_slider,
+    export_svi_snapshots,
     build_svi_total_ivar_curve,
     build_svi_iv_curve
 )
+from iv_calibration.config import SVISettings
 
-def main():
-    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
-    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi)
-    
-    plot_with_slider(
-        option_resampled_df,
-        vol_surface_svi_df,
-        build_svi_total_ivar_curve,
-        'total_ivar',
-        'Total Implied Variance',
-        PATHS.svi_total_ivar_slider
+# (曲線函式, 欄位, y 軸標題, slider HTML 路徑)
+PLOTS = (
+    (build_svi_total_ivar_curve, 'total_ivar', 'Total Implied Variance', PATHS.svi_total_ivar_slider),
+    (build_svi_iv_curve, 'iv', 'Implied Volitility', PATHS.svi_iv_slider),
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Render the SVI calibration slider plots.')
+    parser.add_argument(
+        '--mode', choices=('lite', 'traces', 'png', 'svg'), default='lite',
+        help="'lite': 5 traces with per-timestamp data swapped in by JS; 'traces': one trace set per timestamp; "
+             "'png'/'svg': one static snapshot per timestamp instead of the HTML slider"
     )
-    
-    plot_with_slider(
-        option_resampled_df,
-        vol_surface_svi_df,
-        build_svi_iv_curve,
-        'iv',
-        'Implied Volitility',
-        PATHS.svi_iv_slider
+    parser.add_argument(
+        '--recompute-mask', action='store_true',
+        help='ignore the calibrator prep file and rebuild the valid mask and log-moneyness'
+    )
+    parser.add_argument('--every', type=int, default=1, help='snapshot modes: keep every N-th timestamp')
+    parser.add_argument(
+        '--workers', type=int, default=SVISettings.n_workers,
+        help='snapshot modes: number of rendering processes'
     )
+    parser.add_argument(
+        '--output-dir', type=Path, default=PATHS.svi_snapshots, help='snapshot modes: output directory'
+    )
+    parser.add_argument('--show', action='store_true', help="slider modes: also open the figure")
+    return parser.parse_args()
+
+def load_slice_prep():
+    # 只沿用不早於參數檔的 prep（run_svi_calibrator --save-prep 在參數檔之後寫出）
+    prep_path, params_path = PATHS.vol_surface_svi_prep, PATHS.vol_surface_svi
+    if not prep_path.exists():
+        return None
+    if prep_path.stat().st_mtime_ns < params_path.stat().st_mtime_ns:
+        print(f'{prep_path.name} is older than {params_path.name}; recomputing the valid mask')
+        return None
+    return pd.read_parquet(prep_path)
+
+def main(
+    mode: str = 'lite',
+    recompute_mask: bool = False,
+    every: int = 1,
+    n_workers: int = SVISettings.n_workers,
+    output_dir: Path = PATHS.svi_snapshots,
+    show: bool = False
+):
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi)
+    slice_prep = None if recompute_mask else load_slice_prep()
+
+    for y_calibration_func, y_column_name, y_title, slider_path in PLOTS:
+        if mode in ('png', 'svg'):
+            export_svi_snapshots(
+                option_resampled_df,
+                vol_surface_svi_df,
+                y_calibration_func,
+                y_column_name,
+                y_title,
+                output_dir,
+                fmt=mode,
+                every=every,
+                n_workers=n_workers,
+                slice_prep=slice_prep
+            )
+        else:
+            slider_path.parent.mkdir(parents=True, exist_ok=True)
+            plot_with_slider(
+                option_resampled_df,
+                vol_surface_svi_df,
+                y_calibration_func,
+                y_column_name,
+                y_title,
+                slider_path,
+                mode=mode,
+                slice_prep=slice_prep,
+                show=show
+            )
     
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(
+        mode=args.mode,
+        recompute_mask=args.recompute_mask,
+        every=args.every,
+        n_workers=args.workers,
+        output_dir=args.output_dir,
+        show=args.show
+    )
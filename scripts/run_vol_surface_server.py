@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+import argparse
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from iv_calibration import PATHS, VolSurface
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Serve batched IV queries from a calibrated SVI surface over local HTTP.'
+    )
+    parser.add_argument('--params', type=Path, default=PATHS.vol_surface_svi,
+                        help='parquet written by run_svi_calibrator.py (ts or (ts, expiry) index)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--interpolate-time', action='store_true',
+                        help='interpolate total variance between neighbouring slices')
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N',
+                        help='send N requests to an in-process server and report p50/p99 latency')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='query points per benchmark request')
+    return parser.parse_args()
+
+def make_handler(surface: VolSurface):
+    class SurfaceHandler(BaseHTTPRequestHandler):
+        # POST /iv，body 為 {"ts": [...], "strike": [...], "forward": [...], "time_to_expiry": [...]}；
+        # time_to_expiry 可省略（單一到期），回傳 {"iv": [...]}，查不到的點為 null
+        def do_POST(self):
+            if self.path != '/iv':
+                self.send_error(404)
+                return
+            try:
+                query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                iv = surface.implied_vol(
+                    np.asarray(query['ts'], dtype='datetime64[ns]'),
+                    query['strike'],
+                    query['forward'],
+                    query.get('time_to_expiry')
+                )
+            except (KeyError, ValueError, TypeError) as e:
+                self.send_error(400, str(e))
+                return
+            body = json.dumps({'iv': [None if np.isnan(v) else v for v in iv.tolist()]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SurfaceHandler
+
+def run_benchmark(surface: VolSurface, server: ThreadingHTTPServer, n_requests: int, batch_size: int):
+    rng = np.random.default_rng(0)
+    ts_min, ts_max = surface.ts[0], surface.ts[-1]
+    conn = http.client.HTTPConnection(*server.server_address)
+    latencies = []
+    for _ in range(n_requests):
+        ts = (ts_min + rng.integers(0, ts_max - ts_min + 1, batch_size)).astype('datetime64[ns]')
+        body = json.dumps({
+            'ts': ts.astype(str).tolist(),
+            'strike': rng.uniform(16000.0, 18000.0, batch_size).tolist(),
+            'forward': 17000.0,
+        })
+        start = time.perf_counter()
+        conn.request('POST', '/iv', body, {'Content-Type': 'application/json'})
+        conn.getresponse().read()
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    latencies = np.array(latencies) * 1e3
+    print(
+        f'{n_requests} requests x {batch_size} points: '
+        f'p50={np.percentile(latencies, 50):.2f} ms p99={np.percentile(latencies, 99):.2f} ms'
+    )
+
+    # 同一個 VolSurface 的行程內批次查詢吞吐量
+    n_points = 1_000_000
+    ts = (ts_min + rng.integers(0, ts_max - ts_min + 1, n_points)).astype('datetime64[ns]')
+    strike = rng.uniform(16000.0, 18000.0, n_points)
+    start = time.perf_counter()
+    surface.implied_vol(ts, strike, 17000.0)
+    elapsed = time.perf_counter() - start
+    print(f'in-process batch: {n_points} points in {elapsed * 1e3:.0f} ms ({n_points / elapsed / 1e6:.1f} M points/s)')
+
+def main(
+    params_path: Path = PATHS.vol_surface_svi,
+    host: str = '127.0.0.1',
+    port: int = 8765,
+    interpolate_time: bool = False,
+    benchmark=None,
+    batch_size: int = 100
+):
+    surface = VolSurface.from_parquet(params_path, interpolate_time)
+    if benchmark is None:
+        server = ThreadingHTTPServer((host, port), make_handler(surface))
+        print(f'serving {params_path.name} on http://{host}:{port}/iv')
+        server.serve_forever()
+        return
+
+    server = ThreadingHTTPServer((host, 0), make_handler(surface))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        run_benchmark(surface, server, benchmark, batch_size)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        params_path=args.params,
+        host=args.host,
+        port=args.port,
+        interpolate_time=args.interpolate_time,
+        benchmark=args.benchmark,
+        batch_size=args.batch_size
+    )
@@ -3,20 +3,69 @@
 from .config import PATHS, SETTINGS
 from .data_preprocessor import (
     read_twse_index,
+    read_twse_index_series,
+    read_taifex_daily,
+    read_taifex_daily_by_expiry,
+    parse_expiration_ts,
+    select_futures_expiry,
     filter_contract_data,
+    split_contract_data,
     clean_option_df,
     clean_futures_df,
     calculate_iv,
-    resample_option_df
+    resample_option_df,
+    resample_option_bars
+)
+from .raw_dataset import (
+    convert_taifex_csv_to_parquet,
+    load_contract_data,
+    load_contract_data_by_expiry
+)
+from .black_scholes import (
+    BlackScholesGreeks,
+    black_scholes_greeks
 )
 from .svi_calibrator import (
-    compute_svi_params
+    compute_svi_params,
+    compute_svi_surface,
+    compute_svi_params_incremental,
+    hash_svi_slices,
+    build_svi_slice_prep
+)
+from .svi_arbitrage import (
+    compute_durrleman_g,
+    check_butterfly_arbitrage,
+    refit_butterfly_violations
+)
+from .ssvi_calibrator import (
+    compute_ssvi_params,
+    compute_ssvi_total_ivar,
+    build_ssvi_total_ivar
+)
+from .vol_surface import VolSurface
+from .metrics import RunMetrics
+from .pipeline import (
+    Stage,
+    run_pipeline
+)
+from .svi_batch import (
+    calibrate_svi_batch,
+    compute_svi_params_batch
+)
+from .streaming import (
+    Tick,
+    StreamingBar,
+    StreamingSurfaceCalibrator,
+    stream_surface,
+    astream_surface,
+    replay_ticks
 )
 from .visualization.svi_plotter import (
     plot_with_slider,
     build_svi_total_ivar_curve,
     build_svi_iv_curve
 )
+from .visualization.svi_snapshots import export_svi_snapshots
 # from .visualization.vol_plotter import (
 #     plot_dual_axis,
 #     plot_shared_axes,
@@ -28,17 +77,55 @@ __all__ = [
     'PATHS', 'SETTINGS',
     
     'read_twse_index',
+    'read_twse_index_series',
+    'read_taifex_daily',
+    'read_taifex_daily_by_expiry',
+    'parse_expiration_ts',
+    'select_futures_expiry',
     'filter_contract_data',
+    'split_contract_data',
     'clean_option_df',
     'clean_futures_df',
     'calculate_iv',
     'resample_option_df',
+    'resample_option_bars',
+    
+    'convert_taifex_csv_to_parquet',
+    'load_contract_data',
+    'load_contract_data_by_expiry',
+    
+    'BlackScholesGreeks',
+    'black_scholes_greeks',
     
     'compute_svi_params',
+    'compute_svi_surface',
+    'compute_svi_params_incremental',
+    'hash_svi_slices',
+    'build_svi_slice_prep',
+    'compute_durrleman_g',
+    'check_butterfly_arbitrage',
+    'refit_butterfly_violations',
+    'compute_ssvi_params',
+    'compute_ssvi_total_ivar',
+    'build_ssvi_total_ivar',
+    'VolSurface',
+    'RunMetrics',
+    'Stage',
+    'run_pipeline',
+    'calibrate_svi_batch',
+    'compute_svi_params_batch',
+    
+    'Tick',
+    'StreamingBar',
+    'StreamingSurfaceCalibrator',
+    'stream_surface',
+    'astream_surface',
+    'replay_ticks',
     
     'plot_with_slider',
     'build_svi_total_ivar_curve',
-    'build_svi_iv_curve'
+    'build_svi_iv_curve',
+    'export_svi_snapshots'
     
     # 'plot_dual_axis', 'plot_shared_axes', 'plot_standardised_scatter', 'plot_rank_scatter'
 ]
\ No newline at end of file
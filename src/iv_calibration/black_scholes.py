@@ -0,0 +1,49 @@
+from typing import NamedTuple
+import numpy as np
+from scipy.special import ndtr
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+class BlackScholesGreeks(NamedTuple):
+    price: np.ndarray
+    delta: np.ndarray  # 對 forward 的 delta
+    vega: np.ndarray
+    vomma: np.ndarray
+
+def black_scholes_greeks(
+    is_call: np.ndarray,
+    time_to_expiry: np.ndarray,
+    volatility: np.ndarray,
+    forward_price: np.ndarray,
+    strike: np.ndarray,
+    carry_rate: np.ndarray,
+) -> BlackScholesGreeks:
+    is_call = np.asarray(is_call, dtype=bool)
+    tau = np.asarray(time_to_expiry, dtype=float)
+    vol = np.asarray(volatility, dtype=float)
+    F = np.asarray(forward_price, dtype=float)
+    K = np.asarray(strike, dtype=float)
+    r = np.asarray(carry_rate, dtype=float)
+
+    # 與 calculate_black_scholes_price 相同：tau<=0 或 vol<=0 時全部為 0
+    live = (tau > 0) & (vol > 0)
+    # call 取 +1、put 取 -1，put 價格 = -disc * (F N(-d1) - K N(-d2))
+    sign = np.where(is_call, 1.0, -1.0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        sqrt_t = np.sqrt(tau)
+        vol_sqrt_t = vol * sqrt_t
+        d1 = (np.log(F) - np.log(K) + 0.5 * vol**2 * tau) / vol_sqrt_t
+        d2 = d1 - vol_sqrt_t
+        discount = np.exp(-r * tau)
+        n1 = ndtr(sign * d1)
+        price = sign * discount * (F * n1 - K * ndtr(sign * d2))
+        delta = sign * discount * n1
+        vega = discount * F * sqrt_t * np.exp(-0.5 * d1**2) * _INV_SQRT_2PI
+        vomma = vega * d1 * d2 / vol
+
+    return BlackScholesGreeks(
+        price=np.where(live, price, 0.0),
+        delta=np.where(live, delta, 0.0),
+        vega=np.where(live, vega, 0.0),
+        vomma=np.where(live, vomma, 0.0),
+    )
@@ -12,6 +12,7 @@ class Paths:
     interim: Path = PROJECT_ROOT / 'data' / 'interim'
     final: Path = PROJECT_ROOT / 'data' / 'final'
     results: Path = PROJECT_ROOT / 'results'
+    cache: Path = PROJECT_ROOT / 'data' / 'cache'
     
     @property
     def raw_option_data(self) -> Path:
@@ -25,6 +26,14 @@ class Paths:
     def raw_twse_index_data(self) -> Path:
         return self.raw / 'MI_5MINS_INDEX.csv'
     
+    @property
+    def option_dataset(self) -> Path:
+        return self.interim / 'options_daily'
+
+    @property
+    def futures_dataset(self) -> Path:
+        return self.interim / 'futures_daily'
+
     @property
     def option_resampled(self) -> Path:
         return self.interim / 'option_resampled.parquet'
@@ -37,6 +46,26 @@ class Paths:
     def vol_surface_svi(self) -> Path:
         return self.final / 'vol_surface_svi.parquet'
 
+    @property
+    def option_resampled_expiries(self) -> Path:
+        return self.interim / 'option_resampled_expiries.parquet'
+
+    @property
+    def vol_surface_svi_expiries(self) -> Path:
+        return self.final / 'vol_surface_svi_expiries.parquet'
+
+    @property
+    def vol_surface_ssvi(self) -> Path:
+        return self.final / 'vol_surface_ssvi.parquet'
+
+    @property
+    def vol_surface_svi_hashes(self) -> Path:
+        return self.final / 'vol_surface_svi_hashes.parquet'
+
+    @property
+    def vol_surface_svi_prep(self) -> Path:
+        return self.final / 'vol_surface_svi_prep.parquet'
+
     @property
     def svi_total_ivar_slider(self) -> Path:
         return self.results / 'svi_total_ivar_slider.html'
@@ -45,10 +74,15 @@ class Paths:
     def svi_iv_slider(self) -> Path:
         return self.results / 'svi_iv_slider.html'
 
+    @property
+    def svi_snapshots(self) -> Path:
+        return self.results / 'svi_snapshots'
+
 
 @dataclass
 class Settings:
     expiration_ts: pd.Timestamp = pd.to_datetime('2023-08-16 13:30:00')
+    expiration_time: str = '13:30:00'
     annualization_factor: pd.Timedelta = pd.Timedelta(days=252)
     carry_rate_default: float = 0.0
     futures_code: str = 'TX'
@@ -59,6 +93,8 @@ class Settings:
     close_time: float = 134500.0
     sample_start_ts: str = '2023-07-21 08:45:00'
     sample_end_ts: str = '2023-07-21 13:45:00'
+    iv_n_workers: int = 1
+    csv_chunksize: int = 200_000
 
 
 @dataclass
@@ -73,6 +109,24 @@ class SVISettings:
     default_init_params: Tuple[float] = (5.535282e-06, 0.024417, -0.583708, -0.026350, 0.069624)
     call_mask_left: float = -0.01
     put_mask_right: float = 0.01
+    n_workers: int = 1
+    method: str = 'L-BFGS-B'  # or 'least_squares', 'quasi_explicit'
+    # Durrleman g(k) 檢查用的共用 k 網格與懲罰重擬合的權重
+    arbitrage_k_grid: Tuple[float, float] = (-0.2, 0.2)
+    arbitrage_n_grid: int = 101
+    butterfly_penalty: float = 1.0
+
+@dataclass
+class SSVISettings:
+    # (rho, u, gamma)，eta = 2u / (1 + |rho|) 使 eta(1+|rho|) <= 2 恆成立
+    bounds: Tuple[Tuple[float, float], ...] = (
+        (-0.9999, 0.9999), # rho
+        (1e-6, 1.0), # u
+        (1e-4, 0.5), # gamma
+    )
+    default_init_params: Tuple[float] = (-0.5, 0.5, 0.4)
+    k_grid: Tuple[float, float] = (-0.1, 0.1)
+    n_grid: int = 41
 
 # instantiate once, import these in your modules:
 PATHS    = Paths()
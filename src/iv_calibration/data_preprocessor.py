@@ -1,53 +1,177 @@
+import io
+import re
+import csv
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional, Iterator, Dict, Iterable, Sequence, Tuple, List, Union
+from concurrent.futures import ProcessPoolExecutor
 from scipy.stats import norm
 from scipy.optimize import brentq
 from iv_calibration.config import SETTINGS
+from iv_calibration.black_scholes import black_scholes_greeks
+from iv_calibration.metrics import RunMetrics
 
-def read_twse_index(twse_index_path: Path) -> pd.DataFrame:
-    # column 0: 發行量加權股價指數
-    with twse_index_path.open(encoding='big5') as f:
-        raw_title = f.readline().strip()
-    clean_title = raw_title.strip('="')
-    date_part = clean_title.split(maxsplit=1)[0]  
-    date_part = date_part.replace('年','-').replace('月','-').rstrip('日')
-    roc, month, day = date_part.split('-')
-    year = int(roc) + 1911
-    date_str = f'{year:04d}-{month}-{day}'  # e.g. "2023-07-21"
-    
-    twse_index_df = pd.read_csv(
-        twse_index_path,
+OPTION_COLUMN_NAMES = {
+    '成交日期': 'trade_date',
+    '商品代號': 'contract_code',
+    '履約價格': 'strike',
+    '到期月份(週別)': 'expiry',
+    '買賣權別': 'option_type',
+    '成交時間': 'trade_time',
+    '成交價格': 'market_price',
+    '成交數量(B or S)': 'volume',
+    '開盤集合競價': 'opening_call_auction'
+}
+FUTURES_COLUMN_NAMES = {
+    '成交日期': 'trade_date',
+    '商品代號': 'contract_code',
+    '到期月份(週別)': 'expiry',
+    '成交時間': 'trade_time',
+    '成交價格': 'market_price',
+    '成交數量(B+S)': 'volume',
+    '近月價格': 'near_month_price',
+    '遠月價格': 'far_month_price',
+    '開盤集合競價': 'opening_call_auction'
+}
+_STRIPPED_COLUMNS = ('contract_code', 'expiry', 'option_type')
+_NUMERIC_COLUMNS = ('trade_date', 'trade_time', 'strike', 'market_price', 'volume')
+# 價格欄位一律為 float64，不隨區塊內是否剛好都是整數而變
+_FLOAT_COLUMNS = ('strike', 'market_price')
+# 參考價格（期貨、現貨指數）向後對齊的最大時間差
+REFERENCE_TOLERANCE = pd.Timedelta('5min')
+# 到期代碼的週別字母對應的結算星期：W 為週三，F 為週五
+_EXPIRY_WEEKDAY = {'W': 2, 'F': 4}
+
+def _parse_twse_index_date(title: bytes) -> int:
+    # '"112年07月21日 每5秒指數統計"'，民國年轉西元，回傳當日 00:00 的 ns
+    date_part = title.decode('big5').strip().strip('="').split(maxsplit=1)[0]
+    roc, rest = date_part.split('年')
+    month, rest = rest.split('月')
+    day = rest.rstrip('日')
+    return pd.Timestamp(year=int(roc) + 1911, month=int(month), day=int(day)).value
+
+def _parse_twse_index_file(
+    twse_index_path: Path,
+    columns: Optional[Sequence[str]] = None
+) -> Tuple[np.ndarray, pd.DataFrame]:
+    # 檔案只讀一次：第一行 '"112年07月21日 每5秒指數統計"' 取日期，其餘交給 read_csv；
+    # 時間欄為 '="09:00:00"' 或 '13:29:50'，直接從字元算出秒數，不做字串串接再解析
+    raw = Path(twse_index_path).read_bytes()
+    title, _, body = raw.partition(b'\n')
+    date_ns = _parse_twse_index_date(title)
+
+    usecols = None if columns is None else ['時間', *columns]
+    df = pd.read_csv(
+        io.BytesIO(body),
         encoding='big5',
-        header=1,
-        thousands=',',
+        usecols=usecols,
         dtype={'時間': str},
+        thousands=',',
         low_memory=False,
     )
-    twse_index_df['時間'] = twse_index_df['時間'].str.strip('="')
-    twse_index_df = twse_index_df[twse_index_df['時間'].str.len() == 8].copy()
-    
-    twse_index_df['ts'] = pd.to_datetime(
-        date_str + ' ' + twse_index_df['時間'],
-        format='%Y-%m-%d %H:%M:%S'
+
+    times = df.pop('時間').to_numpy(dtype=str)
+    lengths = np.char.str_len(times)
+    offset = np.where(lengths == 11, 2, 0)
+    candidate = (lengths == 8) | ((lengths == 11) & np.char.startswith(times, '="'))
+    chars = np.zeros((times.size, 8), dtype=np.int64)
+    if candidate.any():
+        # 只有候選列會轉成 ASCII，說明文字（中文）不參與
+        fixed = np.array(times[candidate], dtype='U11').view(np.int32).reshape(-1, 11)
+        rows = np.arange(fixed.shape[0])[:, None]
+        chars[candidate] = fixed[rows, offset[candidate, None] + np.arange(8)]
+    digits = chars - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+    valid = (
+        candidate
+        & is_digit[:, [0, 1, 3, 4, 6, 7]].all(axis=1)
+        & (chars[:, 2] == ord(':')) & (chars[:, 5] == ord(':'))
+    )
+    seconds = (
+        (digits[:, 0] * 10 + digits[:, 1]) * 3600
+        + (digits[:, 3] * 10 + digits[:, 4]) * 60
+        + digits[:, 6] * 10 + digits[:, 7]
     )
-    twse_index_df.set_index('ts', inplace=True)
-    twse_index_df.drop(columns=['時間'], inplace=True)
+    ts = date_ns + seconds[valid] * 1_000_000_000
+    return ts, df.loc[valid].astype(float).reset_index(drop=True)
+
+def read_twse_index(twse_index_path: Path) -> pd.DataFrame:
+    # column 0: 發行量加權股價指數
+    ts, twse_index_df = _parse_twse_index_file(twse_index_path)
+    twse_index_df.index = pd.DatetimeIndex(ts, name='ts')
     return twse_index_df
 
+def _parse_twse_index_column(twse_index_path: Path, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    # 只抽出時間與單一指數欄位：以 regex 直接掃 bytes，時間由數字算出秒數，不經 read_csv 解析其餘欄位
+    raw = Path(twse_index_path).read_bytes()
+    title, header, _ = raw.split(b'\n', 2)
+    date_ns = _parse_twse_index_date(title)
+    header_fields = next(csv.reader([header.decode('big5')]))
+    position = [field.strip() for field in header_fields].index(column)
+    pattern = re.compile(
+        rb'^=?"(\d\d):(\d\d):(\d\d)"' + rb',"[^"]*"' * (position - 1) + rb',"([^"]*)"',
+        re.MULTILINE
+    )
+    matches = pattern.findall(raw)
+    if not matches:
+        return np.array([], dtype=np.int64), np.array([])
+    fields = np.array(matches)
+    hms = fields[:, :3].astype(np.int64)
+    ts = date_ns + (hms[:, 0] * 3600 + hms[:, 1] * 60 + hms[:, 2]) * 1_000_000_000
+    values = np.char.replace(fields[:, 3], b',', b'')
+    values[values == b''] = b'nan'
+    return ts, values.astype(float)
+
+def _parse_twse_index_column_args(args: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    return _parse_twse_index_column(*args)
+
+def read_twse_index_series(
+    source: Union[Path, str, Sequence[Path]],
+    column: str = '發行量加權股價指數',
+    n_workers: int = 1
+) -> pd.Series:
+    # source 可為目錄（讀取其中的 MI_5MINS_INDEX*.csv）、glob 字串或檔案清單；
+    # 每個檔案只保留需要的指數欄位，多檔時以 process pool 平行解析後合併成一條排序好的序列
+    if isinstance(source, (str, Path)):
+        source_path = Path(source)
+        if source_path.is_dir():
+            paths = sorted(source_path.glob('MI_5MINS_INDEX*.csv'))
+        elif source_path.exists():
+            paths = [source_path]
+        else:
+            paths = sorted(source_path.parent.glob(source_path.name))
+    else:
+        paths = sorted(Path(path) for path in source)
+
+    args = [(path, column) for path in paths]
+    if n_workers <= 1 or len(paths) <= 1:
+        parsed = [_parse_twse_index_column_args(arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            parsed = list(executor.map(_parse_twse_index_column_args, args))
+
+    ts = np.concatenate([file_ts for file_ts, _ in parsed] + [np.array([], dtype=np.int64)])
+    values = np.concatenate([file_values for _, file_values in parsed] + [np.array([])])
+    order = np.argsort(ts, kind='stable')
+    return pd.Series(values[order], index=pd.DatetimeIndex(ts[order], name='ts'), name=column)
+
 def filter_contract_data(
     df: pd.DataFrame,
     contract_code: str,
     expiry: str,
     open_time: float = SETTINGS.open_time,
-    close_time: float = SETTINGS.close_time
+    close_time: float = SETTINGS.close_time,
+    metrics: Optional[RunMetrics] = None
 ) -> pd.DataFrame:
-    mask = (
-        (df['contract_code'] == contract_code) &
-        (df['expiry'] == expiry) &
-        (df['trade_time'].between(open_time, close_time))
-    )
+    contract_mask = df['contract_code'] == contract_code
+    expiry_mask = contract_mask & (df['expiry'] == expiry)
+    mask = expiry_mask & df['trade_time'].between(open_time, close_time)
+    if metrics is not None:
+        # 依序套用各條件，記錄每一步的進出列數
+        metrics.count('filter_contract_data', 'contract_code', len(df), contract_mask.sum())
+        metrics.count('filter_contract_data', 'expiry', contract_mask.sum(), expiry_mask.sum())
+        metrics.count('filter_contract_data', 'trading_hours', expiry_mask.sum(), mask.sum())
     filtered_df = df.loc[mask].copy()
     filtered_df['ts'] = pd.to_datetime(
         filtered_df['trade_date'].astype(int).astype(str) +
@@ -58,86 +182,231 @@ def filter_contract_data(
         filtered_df
         .drop(columns=['trade_date', 'trade_time', 'contract_code', 'expiry'])
         .set_index('ts')
-        .sort_index()
+        .sort_index(kind='mergesort')
     )
     return filtered_df
 
+def parse_expiration_ts(expiry: str) -> pd.Timestamp:
+    # 月選為當月第三個週三，週選 'YYYYMMWn' / 'YYYYMMFn' 為當月第 n 個週三 / 週五；
+    # 不處理遇假日順延
+    month_start = pd.Timestamp(f'{expiry[:4]}-{expiry[4:6]}-01')
+    if len(expiry) == 6:
+        weekday, nth = _EXPIRY_WEEKDAY['W'], 3
+    else:
+        weekday, nth = _EXPIRY_WEEKDAY[expiry[6]], int(expiry[7:])
+    offset = (weekday - month_start.weekday()) % 7 + 7 * (nth - 1)
+    return month_start + pd.Timedelta(days=offset) + pd.Timedelta(SETTINGS.expiration_time)
+
+def split_contract_data(
+    df: pd.DataFrame,
+    contract_code: str,
+    expiries: Optional[Iterable[str]] = None,
+    open_time: float = SETTINGS.open_time,
+    close_time: float = SETTINGS.close_time,
+    metrics: Optional[RunMetrics] = None
+) -> Dict[str, pd.DataFrame]:
+    # 同一份資料一次切出所有到期月份；跨月價差（'202308/202309'）不是單一到期，略過
+    df = df.loc[df['contract_code'] == contract_code]
+    if expiries is None:
+        expiries = [e for e in df['expiry'].unique() if '/' not in e]
+    contract_dfs = {}
+    for expiry, group_df in df.loc[df['expiry'].isin(list(expiries))].groupby('expiry', sort=True):
+        contract_dfs[expiry] = filter_contract_data(
+            group_df, contract_code, expiry, open_time, close_time, metrics
+        )
+    return contract_dfs
+
+def iter_taifex_chunks(
+    csv_path: Path,
+    column_names: dict,
+    chunksize: int = SETTINGS.csv_chunksize,
+    skiprows: Optional[list] = None
+) -> Iterator[pd.DataFrame]:
+    # 逐塊讀入字串欄位並換成英文欄名，不做型別推斷
+    reader = pd.read_csv(
+        csv_path,
+        encoding='big5',
+        dtype=str,
+        usecols=lambda col: col.strip() in column_names,
+        skiprows=skiprows,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk.rename(columns=column_names)
+
+def convert_taifex_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk.assign(**{
+        col: chunk[col].str.strip() for col in _STRIPPED_COLUMNS if col in chunk
+    })
+    chunk = chunk.assign(**{
+        col: pd.to_numeric(chunk[col], errors='coerce') for col in _NUMERIC_COLUMNS if col in chunk
+    })
+    return chunk.astype({col: float for col in _FLOAT_COLUMNS if col in chunk})
+
+def read_taifex_daily(
+    csv_path: Path,
+    column_names: dict,
+    contract_code: str,
+    expiry: str,
+    open_time: float = SETTINGS.open_time,
+    close_time: float = SETTINGS.close_time,
+    chunksize: int = SETTINGS.csv_chunksize,
+    skiprows: Optional[list] = None
+) -> pd.DataFrame:
+    # 只保留目標商品 / 到期月份的列再轉型，最後只串接留下的列
+    filtered_chunks = []
+    for chunk in iter_taifex_chunks(csv_path, column_names, chunksize, skiprows):
+        chunk = chunk.loc[
+            (chunk['contract_code'].str.strip() == contract_code) &
+            (chunk['expiry'].str.strip() == expiry)
+        ]
+        filtered_chunks.append(filter_contract_data(
+            convert_taifex_columns(chunk), contract_code, expiry, open_time, close_time
+        ))
+    # mergesort 保留檔案內同一時間戳的成交順序
+    return pd.concat(filtered_chunks).sort_index(kind='mergesort')
+
+def read_taifex_daily_by_expiry(
+    csv_path: Path,
+    column_names: dict,
+    contract_code: str,
+    expiries: Optional[Iterable[str]] = None,
+    open_time: float = SETTINGS.open_time,
+    close_time: float = SETTINGS.close_time,
+    chunksize: int = SETTINGS.csv_chunksize,
+    skiprows: Optional[list] = None
+) -> Dict[str, pd.DataFrame]:
+    # 原始檔只解析一次，依到期月份分別收集各區塊
+    expiry_chunks = {}
+    for chunk in iter_taifex_chunks(csv_path, column_names, chunksize, skiprows):
+        chunk = chunk.loc[chunk['contract_code'].str.strip() == contract_code]
+        chunk_dfs = split_contract_data(
+            convert_taifex_columns(chunk), contract_code, expiries, open_time, close_time
+        )
+        for expiry, expiry_df in chunk_dfs.items():
+            expiry_chunks.setdefault(expiry, []).append(expiry_df)
+    return {
+        expiry: pd.concat(chunks).sort_index(kind='mergesort')
+        for expiry, chunks in sorted(expiry_chunks.items())
+    }
+
+def select_futures_expiry(option_expiry: str, futures_expiries: Iterable[str]) -> str:
+    # 取結算日不早於選擇權的最近一個期貨月份；都已到期時取最遠的月份
+    futures_expiries = sorted(futures_expiries, key=parse_expiration_ts)
+    expiration_ts = parse_expiration_ts(option_expiry)
+    for futures_expiry in futures_expiries:
+        if parse_expiration_ts(futures_expiry) >= expiration_ts:
+            return futures_expiry
+    return futures_expiries[-1]
+
+def align_reference_series(
+    index: pd.DatetimeIndex,
+    reference_series: Sequence[pd.Series],
+    tolerance: pd.Timedelta = REFERENCE_TOLERANCE
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    # 與 merge_asof(direction='backward', tolerance=...) 相同：取時間 <= ts 的最後一筆
+    # （同一時間多筆取最後一筆），時間差超過 tolerance（含等號以內）時位置為 -1；
+    # 同時回傳每個參考序列逐筆取一次的 log 值
+    ts = np.asarray(index, dtype='datetime64[ns]').view('i8')
+    positions, log_values = [], []
+    for series in reference_series:
+        ref_ts = np.asarray(series.index, dtype='datetime64[ns]').view('i8')
+        pos = np.searchsorted(ref_ts, ts, side='right') - 1
+        matched = pos >= 0
+        matched[matched] = ts[matched] - ref_ts[pos[matched]] <= tolerance.value
+        positions.append(np.where(matched, pos, -1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_values.append(np.log(series.to_numpy(dtype=float)))
+    return positions, log_values
+
+def gather_reference_values(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return np.full(positions.shape, np.nan)
+    return np.where(positions >= 0, values[positions], np.nan)
+
+def fill_carry_rate(carry_rate: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(carry_rate), SETTINGS.carry_rate_default, carry_rate)
+
 def clean_option_df(
     option_df: pd.DataFrame,
     futures_series: pd.Series,
     underlying_series: pd.Series,
+    expiration_ts: pd.Timestamp = SETTINGS.expiration_ts,
+    futures_expiration_ts: Optional[pd.Timestamp] = None,
+    metrics: Optional[RunMetrics] = None
 ) -> pd.DataFrame:
-    # Merge forward prices from futures_series
-    option_df = pd.merge_asof(
-        option_df,
-        futures_series.rename("forward_price"),
-        left_index=True,
-        right_index=True,
-        direction="backward",
-        tolerance=pd.Timedelta("5min"),
-    )
-
-    # Merge underlying prices
-    option_df = pd.merge_asof(
-        option_df,
-        underlying_series.rename("underlying_price"),
-        left_index=True,
-        right_index=True,
-        direction="backward",
-        tolerance=pd.Timedelta("5min"),
+    # 一次對齊 futures 與現貨指數，只在原 frame 上新增欄位，不做 merge 複製
+    (forward_pos, underlying_pos), (log_forward, log_underlying) = align_reference_series(
+        option_df.index, (futures_series, underlying_series)
     )
+    option_df = option_df.copy(deep=False)
+    option_df["forward_price"] = gather_reference_values(futures_series.to_numpy(dtype=float), forward_pos)
+    option_df["underlying_price"] = gather_reference_values(underlying_series.to_numpy(dtype=float), underlying_pos)
 
     # Compute time to expiry
     option_df["time_to_expiry"] = (
-        (SETTINGS.expiration_ts - option_df.index)
+        (expiration_ts - option_df.index)
         / SETTINGS.annualization_factor
     )
 
-    # Compute carry rate
-    option_df["carry_rate"] = (
-        (np.log(option_df["forward_price"]) - np.log(option_df["underlying_price"]))
-         / option_df["time_to_expiry"]
-    )
-    option_df["carry_rate"] = option_df["carry_rate"].fillna(
-        SETTINGS.carry_rate_default
+    # log(F) - log(S) 只在每筆參考價格上取一次 log，再依對齊位置展開到各筆成交
+    log_basis = (
+        gather_reference_values(log_forward, forward_pos)
+        - gather_reference_values(log_underlying, underlying_pos)
     )
 
+    # 期貨與選擇權到期日不同時（週選），以期貨隱含的 carry 把遠期價格移到選擇權到期日
+    if futures_expiration_ts is not None and futures_expiration_ts != expiration_ts:
+        futures_tau = (futures_expiration_ts - option_df.index) / SETTINGS.annualization_factor
+        futures_carry = fill_carry_rate(log_basis / futures_tau.to_numpy())
+        option_df["forward_price"] = option_df["forward_price"] * np.exp(
+            futures_carry * (option_df["time_to_expiry"] - futures_tau)
+        )
+        log_basis = np.log(option_df["forward_price"].to_numpy()) - gather_reference_values(
+            log_underlying, underlying_pos
+        )
+
+    # Compute carry rate
+    option_df["carry_rate"] = fill_carry_rate(log_basis / option_df["time_to_expiry"].to_numpy())
+
+    if metrics is not None:
+        # 超過 REFERENCE_TOLERANCE 沒有參考價格的成交，後續 IV 會是 NaN
+        metrics.count('clean_option_df', 'forward_aligned', len(option_df), (forward_pos >= 0).sum())
+        metrics.count('clean_option_df', 'underlying_aligned', len(option_df), (underlying_pos >= 0).sum())
     return option_df
 
 def clean_futures_df(
     futures_df: pd.DataFrame,
-    underlying_series: pd.Series
+    underlying_series: pd.Series,
+    expiration_ts: pd.Timestamp = SETTINGS.expiration_ts,
+    metrics: Optional[RunMetrics] = None
 ) -> pd.DataFrame:
     # Filter out rows where both month prices are not available
     mask = (
         (futures_df["near_month_price"] != "-")
         & (futures_df["far_month_price"] != "-")
     )
+    if metrics is not None:
+        metrics.count('clean_futures_df', 'month_price_filter', len(futures_df), (~mask).sum())
     futures_df = futures_df[~mask]
 
-    # Merge underlying prices
-    futures_df = pd.merge_asof(
-        futures_df,
-        underlying_series.rename("underlying_price"),
-        left_index=True,
-        right_index=True,
-        direction="backward",
-        tolerance=pd.Timedelta("5min"),
-    )
+    # Align underlying prices
+    (underlying_pos,), (log_underlying,) = align_reference_series(futures_df.index, (underlying_series,))
+    futures_df = futures_df.copy(deep=False)
+    futures_df["underlying_price"] = gather_reference_values(underlying_series.to_numpy(dtype=float), underlying_pos)
 
     # Compute time to expiry
     futures_df["time_to_expiry"] = (
-        (SETTINGS.expiration_ts - futures_df.index)
+        (expiration_ts - futures_df.index)
         / SETTINGS.annualization_factor
     )
 
     # Compute carry rate
-    futures_df["carry_rate"] = (
-        (np.log(futures_df["market_price"]) - np.log(futures_df["underlying_price"]))
-        / futures_df["time_to_expiry"]
-    )
-    futures_df["carry_rate"] = futures_df["carry_rate"].fillna(
-        SETTINGS.carry_rate_default
+    futures_df["carry_rate"] = fill_carry_rate(
+        (np.log(futures_df["market_price"].to_numpy(dtype=float))
+         - gather_reference_values(log_underlying, underlying_pos))
+        / futures_df["time_to_expiry"].to_numpy()
     )
     return futures_df
     
@@ -203,6 +472,88 @@ def calculate_iv_scalar(
     except Exception:
         return np.nan
 
+def calculate_iv_vectorized(
+    option_type: np.ndarray,
+    time_to_expiry: np.ndarray,
+    forward_price: np.ndarray,
+    strike: np.ndarray,
+    market_price: np.ndarray,
+    carry_rate: np.ndarray,
+    xtol: float = 1e-10,
+    maxiter: int = 100,
+) -> np.ndarray:
+    option_type = np.asarray(option_type)
+    tau = np.asarray(time_to_expiry, dtype=float)
+    F = np.asarray(forward_price, dtype=float)
+    K = np.asarray(strike, dtype=float)
+    price = np.asarray(market_price, dtype=float)
+    r = np.asarray(carry_rate, dtype=float)
+
+    is_call = (option_type == 'C')
+    invalid = ~(is_call | (option_type == 'P'))
+    if np.any(invalid):
+        bad = np.unique(option_type[invalid])
+        raise ValueError(f"Invalid option_type={bad.tolist()}, expected 'C' or 'P'.")
+
+    def objective(vol, idx):
+        greeks = black_scholes_greeks(
+            is_call[idx], tau[idx], vol, F[idx], K[idx], r[idx]
+        )
+        return greeks.price - price[idx], greeks
+
+    iv = np.full(price.shape, np.nan)
+    all_idx = np.arange(price.size)
+
+    # 與 calculate_iv_scalar 相同的 NaN 規則：
+    # 下界價格已高於市價 -> NaN；剛好等於 -> 1e-9；上界擴張到 50 仍不足 -> NaN
+    lb = 1e-9
+    f_low, _ = objective(np.full(price.shape, lb), all_idx)
+    iv[f_low == 0] = lb
+
+    ub = np.full(price.shape, 5.0)
+    f_up, _ = objective(ub, all_idx)
+    grow = (f_up < 0) & (ub < 50.0)
+    while np.any(grow):
+        ub[grow] *= 1.5
+        f_up[grow], _ = objective(ub[grow], all_idx[grow])
+        grow = (f_up < 0) & (ub < 50.0)
+
+    # 只對有 bracket 的點做 safeguarded Halley，超出 bracket 時退回二分法
+    idx = all_idx[(f_low < 0) & (f_up >= 0)]
+    lo = np.full(idx.shape, lb)
+    hi = ub[idx]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        undiscounted = price[idx] * np.exp(r[idx] * tau[idx])
+        vol = np.maximum(
+            np.sqrt(2 * np.abs(np.log(F[idx] / K[idx])) / tau[idx]),
+            np.sqrt(2 * np.pi / tau[idx]) * undiscounted / F[idx],
+        )
+    vol = np.where(np.isfinite(vol) & (vol > lo) & (vol < hi), vol, 0.5 * (lo + hi))
+
+    for _ in range(maxiter):
+        if idx.size == 0:
+            break
+        f, greeks = objective(vol, idx)
+        below = f < 0
+        lo = np.where(below, vol, lo)
+        hi = np.where(below, hi, vol)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton_step = f / greeks.vega
+            halley_step = newton_step / (1 - 0.5 * newton_step * greeks.vomma / greeks.vega)
+            step = np.where(np.isfinite(halley_step), halley_step, newton_step)
+            new_vol = vol - step
+        use_bisect = ~np.isfinite(new_vol) | (new_vol <= lo) | (new_vol >= hi)
+        new_vol = np.where(use_bisect, 0.5 * (lo + hi), new_vol)
+
+        done = (f == 0) | (np.abs(new_vol - vol) <= xtol)
+        iv[idx[done]] = np.where(f[done] == 0, vol[done], new_vol[done])
+        keep = ~done
+        idx, vol, lo, hi = idx[keep], new_vol[keep], lo[keep], hi[keep]
+    return iv
+
+def _calculate_iv_chunk(chunk: tuple) -> np.ndarray:
+    return calculate_iv_vectorized(*chunk)
+
 def calculate_iv(
     option_type: list,
     time_to_expiry: list,
@@ -210,44 +561,170 @@ def calculate_iv(
     strike: list,
     market_price: list,
     carry_rate: list,
-) -> list:
-    return [
-        calculate_iv_scalar(
-            opt_type,
-            tau,
-            F,
-            K,
-            option_price,
-            r,
+    n_workers: int = SETTINGS.iv_n_workers,
+    chunk_size: Optional[int] = None,
+    metrics: Optional[RunMetrics] = None
+) -> np.ndarray:
+    # 轉成連續的 NumPy 陣列，子程序只收到 pickle 後的陣列切片，不傳 pandas Series
+    arrays = (
+        np.asarray(option_type).astype(str),
+        np.ascontiguousarray(time_to_expiry, dtype=float),
+        np.ascontiguousarray(forward_price, dtype=float),
+        np.ascontiguousarray(strike, dtype=float),
+        np.ascontiguousarray(market_price, dtype=float),
+        np.ascontiguousarray(carry_rate, dtype=float),
+    )
+    n_rows = arrays[0].size
+    if n_workers <= 1 or n_rows == 0:
+        iv = calculate_iv_vectorized(*arrays)
+    else:
+        if chunk_size is None:
+            chunk_size = -(-n_rows // n_workers)
+        chunks = [
+            tuple(arr[start:start + chunk_size] for arr in arrays)
+            for start in range(0, n_rows, chunk_size)
+        ]
+        # executor.map 依提交順序回傳，串接後即為原始列順序
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            iv = np.concatenate(list(executor.map(_calculate_iv_chunk, chunks)))
+    if metrics is not None:
+        metrics.count('calculate_iv', 'iv_solved', n_rows, np.isfinite(iv).sum())
+    return iv
+
+#%%
+def resample_option_df(
+    option_df: pd.DataFrame,
+    freq: str = SETTINGS.demo_resample_freq
+) -> pd.DataFrame:
+    return resample_option_bars(option_df, (freq,))[freq]
+
+def resample_option_bars(
+    option_df: pd.DataFrame,
+    freqs: Sequence[str] = (SETTINGS.demo_resample_freq,)
+) -> Dict[str, pd.DataFrame]:
+    # 與 groupby([Grouper(closed='right', label='right'), option_type, strike]).agg(...) 相同的輸出：
+    # volume 加總、其餘欄位取最後一個非 NaN 值；只排序一次，多個頻率共用
+    df = option_df
+    keys = [col for col in ('expiry', 'option_type', 'strike') if col in df.columns]
+
+    # 合約 (expiry, option_type, strike) 以混合進位合成單一整數鍵，數值順序即排序順序；
+    # 鍵為 NaN 的列（factorize 代碼 -1）與 groupby 一樣丟掉
+    ts = np.asarray(df.index, dtype='datetime64[ns]').view('i8')
+    # 與 pd.Grouper 預設的 origin='start_day' 相同：bar 邊界從第一筆資料當天午夜起算
+    day_ns = pd.Timedelta(days=1).value
+    day0 = ts.min() // day_ns * day_ns if ts.size else 0
+    contract = np.zeros(ts.size, dtype=np.int64)
+    keep = np.ones(ts.size, dtype=bool)
+    key_uniques = []
+    for col in keys:
+        codes, uniques = pd.factorize(df[col].to_numpy(), sort=True)
+        keep &= codes >= 0
+        contract = contract * len(uniques) + codes
+        key_uniques.append(uniques)
+
+    # 先依合約再依時間做穩定排序，每個合約內時間遞增，任何頻率的 bar 邊界都只是相鄰列的比較
+    if np.all(ts[1:] >= ts[:-1]):
+        # 合約數不多時轉成 int16，NumPy 的穩定排序會走 radix sort
+        sort_key = contract.astype(np.int16) if contract.size and contract.max() < 2 ** 15 else contract
+        order = np.argsort(sort_key, kind='stable')
+    else:
+        order = np.lexsort((ts, contract))
+    if not keep.all():
+        order = order[keep[order]]
+    ts = ts[order]
+    contract = contract[order]
+    contract_change = np.zeros(ts.size, dtype=bool)
+    contract_change[1:] = contract[1:] != contract[:-1]
+
+    value_columns = [col for col in df.columns if col not in keys and col != 'opening_call_auction']
+    # 只有 volume 需要整欄依排序重排；其餘欄位只記錄排序後「最後一個非 NaN」的原始列號，
+    # 最後只在每根 bar 的結尾取值
+    values = {col: df[col].to_numpy() for col in value_columns}
+    volume = None
+    if 'volume' in values:
+        # 整數 volume 保留原 dtype，與 groupby 的 sum 一致；浮點欄位的 NaN 視為 0
+        volume = values['volume'][order]
+        if volume.dtype.kind not in 'iu':
+            volume = np.nan_to_num(volume.astype(float))
+    last_valid = {}
+    for col in value_columns:
+        if col == 'volume':
+            continue
+        if values[col].dtype.kind == 'f':
+            valid = ~np.isnan(values[col])
+        else:
+            valid = pd.notna(values[col])
+        last_valid[col] = None if valid.all() else np.maximum.accumulate(
+            np.where(valid[order], np.arange(ts.size), -1)
+        )
+
+    bars = {}
+    for freq in freqs:
+        freq_ns = pd.Timedelta(freq).value
+        # 右閉右標記：(label - freq, label]，label = day0 + ceil((ts - day0) / freq) * freq
+        bar_id = -(-(ts - day0) // freq_ns)
+        new_group = contract_change.copy()
+        new_group[:1] = True
+        new_group[1:] |= bar_id[1:] != bar_id[:-1]
+        starts = np.flatnonzero(new_group)
+        ends = np.append(starts[1:], ts.size)[:starts.size] - 1
+
+        columns = {}
+        for col in value_columns:
+            if col == 'volume':
+                columns[col] = np.add.reduceat(volume, starts) if starts.size else volume[:0]
+            elif last_valid[col] is None:
+                columns[col] = values[col][order[ends]]
+            else:
+                pos = last_valid[col][ends]
+                picked = values[col][order[np.maximum(pos, 0)]]
+                if picked.dtype.kind == 'f':
+                    columns[col] = np.where(pos >= starts, picked, np.nan)
+                else:
+                    picked = picked.astype(object)
+                    picked[pos < starts] = np.nan
+                    columns[col] = picked
+
+        # 輸出依 (ts, expiry, option_type, strike) 排序，再把合約鍵拆回各欄
+        group_contract = contract[starts]
+        group_order = np.lexsort((group_contract, bar_id[starts]))
+        group_contract = group_contract[group_order]
+        key_levels = []
+        for col, uniques in zip(keys[::-1], key_uniques[::-1]):
+            group_contract, codes = np.divmod(group_contract, len(uniques))
+            key_levels.insert(0, pd.Index(uniques.take(codes), name=col))
+        index = pd.MultiIndex.from_arrays(
+            [pd.DatetimeIndex(day0 + bar_id[starts][group_order] * freq_ns, name='ts')] + key_levels
         )
-        for opt_type, tau, F, K, option_price, r in zip(
-            option_type,
-            time_to_expiry,
-            forward_price,
-            strike,
-            market_price,
-            carry_rate,
+        column_order = ['volume'] + [col for col in value_columns if col != 'volume']
+        bars[freq] = pd.DataFrame(
+            {col: columns[col][group_order] for col in column_order if col in columns},
+            index=index
         )
-    ]
+    return bars
 
-#%%
-def resample_option_df(option_df: pd.DataFrame) -> pd.DataFrame:
-    df = option_df.drop(columns=['opening_call_auction'])
+def resample_option_df_groupby(
+    option_df: pd.DataFrame,
+    freq: str = SETTINGS.demo_resample_freq
+) -> pd.DataFrame:
+    # pandas groupby 版本，保留作為 resample_option_bars 的對照
+    df = option_df.drop(columns=['opening_call_auction'], errors='ignore')
+    # 多個到期月份合併時 expiry 也是分組鍵，輸出索引為 (ts, expiry, option_type, strike)
+    keys = [col for col in ('expiry', 'option_type', 'strike') if col in df.columns]
     agg_dict = {'volume': 'sum'}
     for col in df.columns:
-        if col not in ('volume', 'strike', 'option_type'):
+        if col not in ('volume', *keys):
             agg_dict[col] = 'last'
     resampled = (
         df
         .groupby([
             pd.Grouper(
-                freq=SETTINGS.demo_resample_freq,
+                freq=freq,
                 level='ts',
                 closed='right',
                 label='right'
             ),
-            'option_type',
-            'strike'
+            *keys
         ], observed=True)
         .agg(agg_dict)
     )
@@ -0,0 +1,118 @@
+import json
+import time
+import math
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+SLICE_STAT_COLUMNS = [
+    'n_points', 'n_valid', 'nit', 'nfev', 'objective', 'success', 'status', 'seconds'
+]
+
+@dataclass
+class RunMetrics:
+    # 一次執行的量測：各 stage 的耗時與列數、各過濾條件的進出列數、SVI 每個 slice 的最佳化統計
+    run_id: str = field(default_factory=lambda: pd.Timestamp.now().strftime('%Y%m%dT%H%M%S'))
+    stages: List[dict] = field(default_factory=list)
+    counters: List[dict] = field(default_factory=list)
+    slices: List[dict] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[dict]:
+        # with metrics.stage('clean_option_df', len(df)) as record: ...; record['rows_out'] = len(out)
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None, 'seconds': math.nan}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.stages.append(record)
+
+    def count(self, stage: str, name: str, rows_in: int, rows_out: int) -> None:
+        self.counters.append({
+            'stage': stage,
+            'name': name,
+            'rows_in': int(rows_in),
+            'rows_out': int(rows_out),
+        })
+
+    def record_slices(self, stage: str, records: Iterable[dict]) -> None:
+        records = [{'stage': stage, **record} for record in records]
+        self.slices.extend(records)
+        if records:
+            self.count(
+                stage,
+                'construct_valid_mask',
+                sum(record['n_points'] for record in records),
+                sum(record['n_valid'] for record in records)
+            )
+
+    def stage_frame(self) -> pd.DataFrame:
+        return pd.DataFrame.from_records(self.stages, columns=['stage', 'rows_in', 'rows_out', 'seconds'])
+
+    def counter_frame(self) -> pd.DataFrame:
+        return pd.DataFrame.from_records(self.counters, columns=['stage', 'name', 'rows_in', 'rows_out'])
+
+    def slice_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(self.slices)
+        keys = ['stage', 'ts'] + (['expiry'] if 'expiry' in df.columns else [])
+        return df.reindex(columns=keys + SLICE_STAT_COLUMNS)
+
+    def summary(self, n_slowest: int = 5) -> str:
+        lines = [f'run {self.run_id}']
+        for record in self.stages:
+            rows = ''
+            if record['rows_in'] is not None or record['rows_out'] is not None:
+                rows = f"  rows {record['rows_in']} -> {record['rows_out']}"
+            lines.append(f"  {record['stage']:<24}{record['seconds']:8.3f} s{rows}")
+        for record in self.counters:
+            lines.append(
+                f"  {record['stage']}/{record['name']}: {record['rows_in']} -> {record['rows_out']}"
+            )
+        if self.slices:
+            slice_df = self.slice_frame()
+            failed = slice_df[~slice_df['success'].astype(bool)]
+            nfev = slice_df['nfev'].dropna()
+            line = f"  slices: {len(slice_df)} calibrated, {len(failed)} failed"
+            if len(nfev):
+                line += f", nfev median {nfev.median():.0f} max {nfev.max():.0f}"
+            lines.append(line)
+            for status, n in failed['status'].value_counts().items():
+                lines.append(f'    {status}: {n}')
+            for _, row in slice_df.dropna(subset=['seconds']).nlargest(n_slowest, 'seconds').iterrows():
+                lines.append(
+                    f"    slow {row['ts']}: {row['seconds'] * 1e3:.1f} ms, nfev={row['nfev']:.0f}, "
+                    f"objective={row['objective']:.3g}"
+                )
+        return '\n'.join(lines)
+
+    def write(self, path: Path) -> None:
+        # .jsonl 以附加方式寫入（每列帶 run_id 與 kind）；其他路徑視為目錄，寫出三個 parquet
+        path = Path(path)
+        if path.suffix == '.jsonl':
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                for kind, records in (('stage', self.stages), ('counter', self.counters), ('slice', self.slices)):
+                    for record in records:
+                        row = {'run_id': self.run_id, 'kind': kind, **record}
+                        f.write(json.dumps({k: _jsonable(v) for k, v in row.items()}, ensure_ascii=False) + '\n')
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            for name, df in (
+                ('stages', self.stage_frame()),
+                ('counters', self.counter_frame()),
+                ('slices', self.slice_frame()),
+            ):
+                df.assign(run_id=self.run_id).to_parquet(path / f'{self.run_id}_{name}.parquet', index=False)
+
+def _jsonable(value):
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
@@ -0,0 +1,194 @@
+import json
+import shutil
+import hashlib
+import inspect
+import functools
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from iv_calibration import config
+from iv_calibration.config import PATHS
+
+_DIGEST_MEMO = 'digests.json'
+_ENTRY_META = 'meta.json'
+
+@dataclass(frozen=True, eq=False)
+class Stage:
+    name: str
+    run: Callable[[], None]
+    inputs: Tuple[Path, ...] = ()
+    outputs: Tuple[Path, ...] = ()
+    # 影響輸出的設定，以 config 模組內的名稱表示，如 'SVISettings.global_bounds'、'SETTINGS.expiry'
+    settings: Tuple[str, ...] = ()
+    # 其他會改變輸出的參數（例如 CLI 選的 method）；不影響結果的如 n_workers 不要放
+    params: Dict[str, object] = field(default_factory=dict)
+    # 程式碼本身也是輸入：這些原始檔（與 run 所在的檔案）變動時同樣視為過期。
+    # functools.partial 會追到被包裝的函式；lambda 只能追到定義 lambda 的檔案，
+    # 它呼叫的其他模組必須列在這裡
+    sources: Tuple[Path, ...] = ()
+
+def resolve_setting(name: str):
+    owner, _, attr = name.partition('.')
+    return getattr(getattr(config, owner), attr)
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def artifact_digest(path: Path, memo: Optional[dict] = None) -> str:
+    # 以 (size, mtime_ns) 記住已算過的檔案，原始 CSV 不用每次重讀；目錄則合併其下所有檔案
+    path = Path(path)
+    if path.is_dir():
+        digest = hashlib.blake2b(digest_size=16)
+        for child in sorted(p for p in path.rglob('*') if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode())
+            digest.update(artifact_digest(child, memo).encode())
+        return digest.hexdigest()
+    stat = path.stat()
+    key = str(path.resolve())
+    if memo is not None:
+        cached = memo.get(key)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+    value = _hash_file(path)
+    if memo is not None:
+        memo[key] = [stat.st_size, stat.st_mtime_ns, value]
+    return value
+
+def stage_key(stage: Stage, memo: Optional[dict] = None) -> str:
+    digest = hashlib.blake2b(stage.name.encode(), digest_size=16)
+    for name in stage.settings:
+        digest.update(f'{name}={resolve_setting(name)!r}\n'.encode())
+    for name, value in sorted(stage.params.items()):
+        digest.update(f'{name}={value!r}\n'.encode())
+    for path in stage.inputs:
+        if not Path(path).exists():
+            raise FileNotFoundError(f'stage {stage.name!r}: input {path} does not exist.')
+        digest.update(artifact_digest(path, memo).encode())
+    run = stage.run
+    while isinstance(run, functools.partial):
+        run = run.func
+    run_source = inspect.getsourcefile(run)
+    sources = list(stage.sources) + ([Path(run_source)] if run_source else [])
+    for path in sorted(set(Path(p).resolve() for p in sources)):
+        digest.update(artifact_digest(path, memo).encode())
+    return digest.hexdigest()
+
+def sort_stages(stages: Sequence[Stage], targets: Optional[Iterable[str]] = None) -> List[Stage]:
+    # 依輸入/輸出路徑建立相依關係；指定 targets 時只保留其上游
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            producers[Path(path).resolve()] = stage
+    upstream = {
+        stage.name: {
+            producers[Path(path).resolve()].name
+            for path in stage.inputs if Path(path).resolve() in producers
+        }
+        for stage in stages
+    }
+    by_name = {stage.name: stage for stage in stages}
+    if targets is not None:
+        unknown = set(targets) - set(by_name)
+        if unknown:
+            raise ValueError(f'Unknown stages: {sorted(unknown)}')
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(upstream[name])
+    else:
+        needed = set(by_name)
+
+    ordered, done = [], set()
+    while len(ordered) < len(needed):
+        ready = [
+            stage for stage in stages
+            if stage.name in needed and stage.name not in done and upstream[stage.name] <= done
+        ]
+        if not ready:
+            raise ValueError('Pipeline stages form a cycle.')
+        ordered.append(ready[0])
+        done.add(ready[0].name)
+    return ordered
+
+def _copy_artifact(src: Path, dst: Path):
+    if dst.is_dir():
+        shutil.rmtree(dst)
+    elif dst.exists():
+        dst.unlink()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+def _store_entry(stage: Stage, entry_dir: Path, memo: dict):
+    # meta.json 最後寫入，作為快取項目完整的標記
+    if entry_dir.exists():
+        shutil.rmtree(entry_dir)
+    digests = []
+    for i, path in enumerate(stage.outputs):
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f'stage {stage.name!r} did not write {path}.')
+        _copy_artifact(path, entry_dir / f'{i}_{path.name}')
+        digests.append(artifact_digest(path, memo))
+    meta = {'stage': stage.name, 'outputs': [str(path) for path in stage.outputs], 'digests': digests}
+    (entry_dir / _ENTRY_META).write_text(json.dumps(meta, indent=2))
+
+def _outputs_match(stage: Stage, meta: dict, memo: dict) -> bool:
+    return all(
+        Path(path).exists() and artifact_digest(path, memo) == digest
+        for path, digest in zip(stage.outputs, meta['digests'])
+    )
+
+def run_pipeline(
+    stages: Sequence[Stage],
+    targets: Optional[Iterable[str]] = None,
+    force: Iterable[str] = (),
+    dry_run: bool = False,
+    cache_dir: Path = PATHS.cache
+) -> Dict[str, str]:
+    # 回傳各 stage 的狀態：'cached'（輸出已是最新）、'restored'（由快取複製回來）、'ran'；
+    # dry_run 時不執行，上游需重跑的 stage 其下游一律標為 'stale'
+    cache_dir = Path(cache_dir)
+    memo_path = cache_dir / _DIGEST_MEMO
+    memo = json.loads(memo_path.read_text()) if memo_path.exists() else {}
+    force = set(force)
+    stale_outputs, status = set(), {}
+    try:
+        for stage in sort_stages(stages, targets):
+            if any(Path(path).resolve() in stale_outputs for path in stage.inputs):
+                status[stage.name] = 'stale'
+                stale_outputs.update(Path(path).resolve() for path in stage.outputs)
+                continue
+            key = stage_key(stage, memo)
+            entry_dir = cache_dir / stage.name / key
+            meta_path = entry_dir / _ENTRY_META
+            if stage.name not in force and meta_path.exists():
+                meta = json.loads(meta_path.read_text())
+                if _outputs_match(stage, meta, memo):
+                    status[stage.name] = 'cached'
+                    continue
+                if not dry_run:
+                    for i, path in enumerate(stage.outputs):
+                        _copy_artifact(entry_dir / f'{i}_{Path(path).name}', Path(path))
+                status[stage.name] = 'restored'
+                continue
+            if dry_run:
+                status[stage.name] = 'stale'
+                stale_outputs.update(Path(path).resolve() for path in stage.outputs)
+                continue
+            stage.run()
+            _store_entry(stage, entry_dir, memo)
+            status[stage.name] = 'ran'
+    finally:
+        if not dry_run:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            memo_path.write_text(json.dumps(memo))
+    return status
@@ -0,0 +1,128 @@
+from pathlib import Path
+from typing import Optional, Sequence, Dict, Iterable
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from iv_calibration.config import SETTINGS
+from iv_calibration.metrics import RunMetrics
+from iv_calibration.data_preprocessor import (
+    convert_taifex_columns,
+    filter_contract_data,
+    iter_taifex_chunks,
+    split_contract_data
+)
+
+# trade_date / contract_code / expiry 為 hive 目錄分區；expiry 必須明確指定為字串，
+# 否則 '202308' 會被推斷成整數
+PARTITIONING = ds.partitioning(
+    pa.schema([
+        ('trade_date', pa.int32()),
+        ('contract_code', pa.string()),
+        ('expiry', pa.string()),
+    ]),
+    flavor='hive'
+)
+_PARTITION_COLUMNS = ['trade_date', 'contract_code', 'expiry']
+_COLUMN_TYPES = {
+    'trade_date': pa.int32(),
+    'contract_code': pa.string(),
+    'expiry': pa.string(),
+    'trade_time': pa.int32(),
+    'strike': pa.float64(),
+    'option_type': pa.dictionary(pa.int32(), pa.string()),
+    'market_price': pa.float64(),
+    'volume': pa.int64(),
+    'near_month_price': pa.dictionary(pa.int32(), pa.string()),
+    'far_month_price': pa.dictionary(pa.int32(), pa.string()),
+    'opening_call_auction': pa.dictionary(pa.int32(), pa.string()),
+}
+
+def convert_taifex_csv_to_parquet(
+    csv_path: Path,
+    dataset_dir: Path,
+    column_names: dict,
+    chunksize: int = SETTINGS.csv_chunksize,
+    skiprows: Optional[list] = None
+) -> int:
+    # 一次性把 Big5 原始檔轉成分區 Parquet；回傳寫入的列數。
+    # 每個分區第一次出現時以 delete_matching 清掉舊的 part 檔，避免重轉時殘留較多區塊的舊檔
+    n_rows = 0
+    written_partitions = set()
+    for i, chunk in enumerate(iter_taifex_chunks(csv_path, column_names, chunksize, skiprows)):
+        chunk = convert_taifex_columns(chunk).dropna(subset=['trade_date', 'trade_time'])
+        schema = pa.schema([(col, _COLUMN_TYPES[col]) for col in chunk.columns])
+        partition_keys = pd.MultiIndex.from_frame(chunk[_PARTITION_COLUMNS])
+        new_keys = [key for key in partition_keys.unique() if key not in written_partitions]
+        written_partitions.update(new_keys)
+        is_new = partition_keys.isin(new_keys) if new_keys else np.zeros(len(chunk), dtype=bool)
+        for rows, existing_data_behavior in (
+            (chunk.loc[is_new], 'delete_matching'),
+            (chunk.loc[~is_new], 'overwrite_or_ignore'),
+        ):
+            if rows.empty:
+                continue
+            ds.write_dataset(
+                pa.Table.from_pandas(rows, schema=schema, preserve_index=False),
+                dataset_dir,
+                format='parquet',
+                partitioning=PARTITIONING,
+                basename_template=f'{Path(csv_path).stem}-{i:05d}-{{i}}.parquet',
+                existing_data_behavior=existing_data_behavior,
+            )
+        n_rows += len(chunk)
+    return n_rows
+
+def load_contract_data(
+    dataset_dir: Path,
+    contract_code: str,
+    expiry: str,
+    open_time: float = SETTINGS.open_time,
+    close_time: float = SETTINGS.close_time,
+    trade_dates: Optional[Sequence[int]] = None,
+    metrics: Optional[RunMetrics] = None
+) -> pd.DataFrame:
+    # 分區欄位的條件直接略過不相關的目錄，trade_time 條件利用 row group 統計值跳過區塊；
+    # 因此 metrics 記到的 filter_contract_data 進出列數是下推過濾之後的結果
+    predicate = (
+        (ds.field('contract_code') == contract_code) &
+        (ds.field('expiry') == expiry) &
+        (ds.field('trade_time') >= open_time) &
+        (ds.field('trade_time') <= close_time)
+    )
+    if trade_dates is not None:
+        predicate &= ds.field('trade_date').isin(list(trade_dates))
+
+    df = _read_dataset(dataset_dir, predicate)
+    return filter_contract_data(df, contract_code, expiry, open_time, close_time, metrics)
+
+def load_contract_data_by_expiry(
+    dataset_dir: Path,
+    contract_code: str,
+    expiries: Optional[Iterable[str]] = None,
+    open_time: float = SETTINGS.open_time,
+    close_time: float = SETTINGS.close_time,
+    trade_dates: Optional[Sequence[int]] = None,
+    metrics: Optional[RunMetrics] = None
+) -> Dict[str, pd.DataFrame]:
+    predicate = (
+        (ds.field('contract_code') == contract_code) &
+        (ds.field('trade_time') >= open_time) &
+        (ds.field('trade_time') <= close_time)
+    )
+    if expiries is not None:
+        expiries = list(expiries)
+        predicate &= ds.field('expiry').isin(expiries)
+    if trade_dates is not None:
+        predicate &= ds.field('trade_date').isin(list(trade_dates))
+    df = _read_dataset(dataset_dir, predicate)
+    return split_contract_data(df, contract_code, expiries, open_time, close_time, metrics)
+
+def _read_dataset(dataset_dir: Path, predicate: ds.Expression) -> pd.DataFrame:
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning=PARTITIONING)
+    df = dataset.to_table(filter=predicate).to_pandas()
+    # 與讀 CSV 的結果一致：類別欄位轉回一般字串
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
@@ -0,0 +1,120 @@
+from typing import Sequence, Union, Tuple
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize, OptimizeResult
+from iv_calibration.config import SSVISettings
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+SSVI_PARAM_COLUMNS = ['rho', 'eta', 'gamma']
+SSVI_OPTIMIZER_OPTIONS = {'maxiter': 10000, 'gtol': 1e-12, 'ftol': 1e-14}
+
+def compute_ssvi_phi(
+    theta: Union[float, np.ndarray],
+    eta: float,
+    gamma: float
+) -> Union[float, np.ndarray]:
+    # power-law：phi(theta) = eta / (theta^gamma (1+theta)^(1-gamma))
+    return eta / (theta ** gamma * (1.0 + theta) ** (1.0 - gamma))
+
+def compute_ssvi_total_ivar(
+    k: Union[float, np.ndarray],
+    theta: Union[float, np.ndarray],
+    rho: float,
+    eta: float,
+    gamma: float
+) -> Union[float, np.ndarray]:
+    phi_k = compute_ssvi_phi(theta, eta, gamma) * k
+    return 0.5 * theta * (1.0 + rho * phi_k + np.sqrt((phi_k + rho) ** 2 + 1.0 - rho ** 2))
+
+def interpolate_ssvi_theta(
+    time_to_expiry: Union[float, np.ndarray],
+    node_tau: np.ndarray,
+    node_theta: np.ndarray
+) -> np.ndarray:
+    # 節點間對 T 線性內插（theta 單調 => 無 calendar arbitrage），第一個節點前接到 (0, 0)，
+    # 最後一個節點後維持 theta / T 不變
+    tau = np.asarray(time_to_expiry, dtype=float)
+    theta = np.interp(tau, np.r_[0.0, node_tau], np.r_[0.0, node_theta])
+    return np.where(tau > node_tau[-1], node_theta[-1] * tau / node_tau[-1], theta)
+
+def build_ssvi_total_ivar(
+    ssvi_slice_df: pd.DataFrame,
+    log_moneyness: Union[float, np.ndarray],
+    time_to_expiry: Union[float, np.ndarray]
+) -> np.ndarray:
+    # ssvi_slice_df 為 compute_ssvi_params 輸出中單一 ts 的列；k 與 T 依 NumPy 規則廣播
+    node_tau = ssvi_slice_df['time_to_expiry'].to_numpy(dtype=float)
+    node_theta = ssvi_slice_df['theta'].to_numpy(dtype=float)
+    rho, eta, gamma = ssvi_slice_df[SSVI_PARAM_COLUMNS].iloc[0].to_numpy(dtype=float)
+    theta = interpolate_ssvi_theta(time_to_expiry, node_tau, node_theta)
+    return compute_ssvi_total_ivar(log_moneyness, theta, rho, eta, gamma)
+
+def _ssvi_params_from_free(free_params: Sequence[float]) -> Tuple[float, float, float]:
+    rho, u, gamma = free_params
+    return rho, 2.0 * u / (1.0 + abs(rho)), gamma
+
+def ssvi_objective(
+    free_params: Sequence[float],
+    log_moneyness: np.ndarray,
+    theta: np.ndarray,
+    total_ivar: np.ndarray
+) -> float:
+    model = compute_ssvi_total_ivar(log_moneyness, theta, *_ssvi_params_from_free(free_params))
+    return np.mean((model - total_ivar) ** 2)
+
+def fit_ssvi_slice(
+    log_moneyness: np.ndarray,
+    theta: np.ndarray,
+    total_ivar: np.ndarray,
+    init_params: Sequence[float] = SSVISettings.default_init_params
+) -> OptimizeResult:
+    # theta 為 (n_expiry, 1)，log_moneyness / total_ivar 為 (n_expiry, n_grid)，所有到期月份一起擬合
+    res = minimize(
+        ssvi_objective,
+        x0=np.clip(init_params, *np.array(SSVISettings.bounds).T),
+        args=(log_moneyness, theta, total_ivar),
+        bounds=SSVISettings.bounds,
+        method='L-BFGS-B',
+        options=SSVI_OPTIMIZER_OPTIONS
+    )
+    res.params = np.array(_ssvi_params_from_free(res.x))
+    return res
+
+def compute_ssvi_params(vol_surface_svi_df: pd.DataFrame) -> pd.DataFrame:
+    # 輸入為 compute_svi_surface 的 (ts, expiry) 輸出；theta 取各到期 raw SVI 在 k=0 的值，
+    # 再以 SVI 曲線在 k_grid 上的值擬合全域 (rho, eta, gamma)
+    k_grid = np.linspace(*SSVISettings.k_grid, SSVISettings.n_grid)
+    svi_columns = ['a', 'b', 'rho', 'm', 'sigma']
+    init_params = SSVISettings.default_init_params
+
+    params_records = []
+    for ts, group_df in vol_surface_svi_df.groupby(level='ts', sort=True):
+        group_df = group_df.droplevel('ts').sort_values('time_to_expiry')
+        usable = group_df[svi_columns].notna().all(axis=1) & (group_df['time_to_expiry'] > 0)
+        svi_df = group_df.loc[usable]
+        if svi_df.empty:
+            continue
+
+        svi_params = [svi_df[[col]].to_numpy(dtype=float) for col in svi_columns]
+        # 對 T 取累積最大值，確保 ATM total variance 不隨到期日遞減
+        theta = np.maximum.accumulate(compute_svi_total_ivar(0.0, *svi_params))
+        total_ivar = compute_svi_total_ivar(k_grid, *svi_params)
+        res = fit_ssvi_slice(k_grid, theta, total_ivar, init_params)
+        if res.success:
+            init_params = res.x
+            rho, eta, gamma = res.params
+        else:
+            rho, eta, gamma = [np.nan] * 3
+
+        for expiry, tau, theta_i in zip(svi_df.index, svi_df['time_to_expiry'], theta[:, 0]):
+            params_records.append({
+                'ts': ts,
+                'expiry': expiry,
+                'time_to_expiry': tau,
+                'theta': theta_i,
+                'rho': rho,
+                'eta': eta,
+                'gamma': gamma,
+                'objective': res.fun
+            })
+    return pd.DataFrame.from_records(params_records).set_index(['ts', 'expiry'])
@@ -0,0 +1,182 @@
+import time
+import heapq
+from typing import Optional, Iterable, Iterator, AsyncIterable, AsyncIterator, NamedTuple
+import numpy as np
+import pandas as pd
+from iv_calibration.config import SETTINGS, SVISettings
+from iv_calibration.data_preprocessor import calculate_iv, resample_option_df
+from iv_calibration.svi_calibrator import (
+    build_svi_params_record,
+    calibrate_svi,
+    extract_svi_slices
+)
+
+# 同一時間戳時先更新 futures / index，再處理 option（與 merge_asof 含等號的 backward 對齊一致）
+_KIND_PRIORITY = {'futures': 0, 'index': 1, 'option': 2}
+
+class Tick(NamedTuple):
+    ts: pd.Timestamp
+    kind: str  # 'option', 'futures' 或 'index'
+    price: float
+    volume: float = 0.0
+    option_type: Optional[str] = None
+    strike: Optional[float] = None
+
+class StreamingBar(NamedTuple):
+    ts: pd.Timestamp
+    option_bar_df: pd.DataFrame  # 與 resample_option_df 輸出相同的欄位與索引
+    params: dict  # 與 compute_svi_params 的一列相同
+    latency: float  # 收盤到輸出 SVI slice 的秒數
+
+class StreamingSurfaceCalibrator:
+    def __init__(
+        self,
+        freq: str = SETTINGS.demo_resample_freq,
+        tolerance: pd.Timedelta = pd.Timedelta('5min'),
+        method: str = SVISettings.method,
+        options: Optional[dict] = None
+    ):
+        self.freq = freq
+        self.tolerance = tolerance
+        self.method = method
+        self.options = options
+        self.init_params = SVISettings.default_init_params
+        self._forward = (None, np.nan)
+        self._underlying = (None, np.nan)
+        self._bar_ts: Optional[pd.Timestamp] = None
+        self._rows = []
+
+    def _reference_price(self, state: tuple, ts: pd.Timestamp) -> float:
+        ref_ts, price = state
+        if ref_ts is None or ts - ref_ts > self.tolerance:
+            return np.nan
+        return price
+
+    def on_tick(self, tick: Tick) -> Optional[StreamingBar]:
+        bar = None
+        # bar 為右閉右標記，時間超過目前 bar 的標記即可收盤
+        if self._bar_ts is not None and tick.ts > self._bar_ts:
+            bar = self.close_bar()
+
+        if tick.kind == 'futures':
+            self._forward = (tick.ts, tick.price)
+        elif tick.kind == 'index':
+            self._underlying = (tick.ts, tick.price)
+        elif tick.kind == 'option':
+            self._bar_ts = tick.ts.ceil(self.freq)
+            self._rows.append((
+                tick.ts,
+                tick.strike,
+                tick.option_type,
+                tick.price,
+                tick.volume,
+                self._reference_price(self._forward, tick.ts),
+                self._reference_price(self._underlying, tick.ts),
+            ))
+        else:
+            raise ValueError(f"Invalid tick kind='{tick.kind}', expected 'option', 'futures' or 'index'.")
+        return bar
+
+    def close_bar(self) -> Optional[StreamingBar]:
+        if not self._rows:
+            return None
+        start = time.perf_counter()
+        option_df = pd.DataFrame(self._rows, columns=[
+            'ts', 'strike', 'option_type', 'market_price', 'volume',
+            'forward_price', 'underlying_price'
+        ]).set_index('ts')
+        self._rows = []
+        self._bar_ts = None
+
+        # 與 clean_option_df / calculate_iv 相同的欄位計算，只針對這根 bar 的 tick
+        option_df['time_to_expiry'] = (
+            (SETTINGS.expiration_ts - option_df.index)
+            / SETTINGS.annualization_factor
+        )
+        option_df['carry_rate'] = (
+            (np.log(option_df['forward_price']) - np.log(option_df['underlying_price']))
+            / option_df['time_to_expiry']
+        ).fillna(SETTINGS.carry_rate_default)
+        option_df['iv'] = calculate_iv(
+            option_df['option_type'],
+            option_df['time_to_expiry'],
+            option_df['forward_price'],
+            option_df['strike'],
+            option_df['market_price'],
+            option_df['carry_rate']
+        )
+        option_df['total_ivar'] = option_df['iv'] ** 2 * option_df['time_to_expiry']
+
+        option_bar_df = resample_option_df(option_df, freq=self.freq)
+        (ts, opt_type, log_moneyness, total_ivar, volume), = extract_svi_slices(option_bar_df)
+        params = calibrate_svi(
+            opt_type,
+            log_moneyness,
+            total_ivar,
+            volume,
+            self.init_params,
+            options=self.options,
+            method=self.method
+        )
+        self.init_params = SVISettings.default_init_params if params is None else params
+        return StreamingBar(
+            ts,
+            option_bar_df,
+            build_svi_params_record(ts, params),
+            time.perf_counter() - start
+        )
+
+    def flush(self) -> Optional[StreamingBar]:
+        return self.close_bar()
+
+def stream_surface(
+    ticks: Iterable[Tick],
+    calibrator: Optional[StreamingSurfaceCalibrator] = None
+) -> Iterator[StreamingBar]:
+    calibrator = StreamingSurfaceCalibrator() if calibrator is None else calibrator
+    for tick in ticks:
+        bar = calibrator.on_tick(tick)
+        if bar is not None:
+            yield bar
+    bar = calibrator.flush()
+    if bar is not None:
+        yield bar
+
+async def astream_surface(
+    ticks: AsyncIterable[Tick],
+    calibrator: Optional[StreamingSurfaceCalibrator] = None
+) -> AsyncIterator[StreamingBar]:
+    # 校準本身是同步的 CPU 工作，每根 bar 只佔用事件迴圈一次
+    calibrator = StreamingSurfaceCalibrator() if calibrator is None else calibrator
+    async for tick in ticks:
+        bar = calibrator.on_tick(tick)
+        if bar is not None:
+            yield bar
+    bar = calibrator.flush()
+    if bar is not None:
+        yield bar
+
+def replay_ticks(
+    option_df: pd.DataFrame,
+    futures_series: pd.Series,
+    underlying_series: pd.Series
+) -> Iterator[Tick]:
+    # 將已篩選的 option / futures / index 資料依時間合併成單一 tick 串流
+    def option_ticks():
+        for row in option_df[['market_price', 'volume', 'option_type', 'strike']].itertuples():
+            yield (row.Index, _KIND_PRIORITY['option']), Tick(
+                row.Index, 'option', row.market_price, row.volume, row.option_type, row.strike
+            )
+
+    def reference_ticks(series: pd.Series, kind: str):
+        for ts, price in series.items():
+            yield (ts, _KIND_PRIORITY[kind]), Tick(ts, kind, price)
+
+    merged = heapq.merge(
+        reference_ticks(futures_series, 'futures'),
+        reference_ticks(underlying_series, 'index'),
+        option_ticks(),
+        key=lambda item: item[0]
+    )
+    for _, tick in merged:
+        yield tick
@@ -0,0 +1,105 @@
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from iv_calibration.config import SVISettings
+from iv_calibration.svi_calibrator import (
+    SVI_OPTIMIZER_OPTIONS,
+    construct_valid_mask,
+    extract_svi_slices,
+    raw_svi_weighted_objective
+)
+
+SVI_PARAM_COLUMNS = ['a', 'b', 'rho', 'm', 'sigma']
+
+def build_arbitrage_k_grid(
+    k_min: float = SVISettings.arbitrage_k_grid[0],
+    k_max: float = SVISettings.arbitrage_k_grid[1],
+    n_grid: int = SVISettings.arbitrage_n_grid
+) -> np.ndarray:
+    return np.linspace(k_min, k_max, n_grid)
+
+def compute_durrleman_g(params: np.ndarray, k_grid: np.ndarray) -> np.ndarray:
+    # params 為 (n_ts, 5)，回傳 (n_ts, n_grid)：
+    # g(k) = (1 - k w'/(2w))^2 - w'^2/4 (1/w + 1/4) + w''/2，g >= 0 表示密度非負
+    a, b, rho, m, sigma = (params[:, i:i + 1] for i in range(5))
+    x = k_grid - m
+    root = np.sqrt(x ** 2 + sigma ** 2)
+    w = a + b * (rho * x + root)
+    dw = b * (rho + x / root)
+    d2w = b * sigma ** 2 / root ** 3
+    return (1.0 - k_grid * dw / (2.0 * w)) ** 2 - dw ** 2 / 4.0 * (1.0 / w + 0.25) + d2w / 2.0
+
+def check_butterfly_arbitrage(
+    vol_surface_svi_df: pd.DataFrame,
+    k_grid: Optional[np.ndarray] = None,
+    tol: float = 0.0
+) -> pd.DataFrame:
+    # 一次計算所有 slice 的 g(k)；參數缺失的列 min_g 為 NaN、不算違反
+    if k_grid is None:
+        k_grid = build_arbitrage_k_grid()
+    g = compute_durrleman_g(vol_surface_svi_df[SVI_PARAM_COLUMNS].to_numpy(dtype=float), k_grid)
+    valid = np.isfinite(g).all(axis=1)
+    min_g = np.where(valid, np.min(np.where(np.isfinite(g), g, np.inf), axis=1), np.nan)
+    k_at_min = np.where(valid, k_grid[np.argmin(np.where(np.isfinite(g), g, np.inf), axis=1)], np.nan)
+    return pd.DataFrame({
+        'min_g': min_g,
+        'k_at_min': k_at_min,
+        'violation': valid & (min_g < -tol)
+    }, index=vol_surface_svi_df.index)
+
+def butterfly_penalized_objective(
+    params: np.ndarray,
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray,
+    k_grid: np.ndarray,
+    penalty: float
+) -> float:
+    g = compute_durrleman_g(np.asarray(params, dtype=float)[None, :], k_grid)[0]
+    shortfall = np.minimum(np.nan_to_num(g, nan=-1.0), 0.0)
+    return (
+        raw_svi_weighted_objective(params, log_moneyness, total_ivar, volume)
+        + penalty * np.sum(shortfall ** 2)
+    )
+
+def refit_butterfly_violations(
+    option_resampled_df: pd.DataFrame,
+    vol_surface_svi_df: pd.DataFrame,
+    k_grid: Optional[np.ndarray] = None,
+    penalty: float = SVISettings.butterfly_penalty,
+    max_rounds: int = 5
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # 只重擬合違反的 slice：從原參數出發加上 sum(min(g, 0)^2) 懲罰，仍違反時懲罰放大 10 倍再試
+    if k_grid is None:
+        k_grid = build_arbitrage_k_grid()
+    report = check_butterfly_arbitrage(vol_surface_svi_df, k_grid)
+    violating = set(report.index[report['violation']])
+    refitted_df = vol_surface_svi_df.copy()
+    if not violating:
+        return refitted_df, report
+
+    for ts, opt_type, log_moneyness, total_ivar, volume in extract_svi_slices(option_resampled_df):
+        if ts not in violating:
+            continue
+        valid_mask = construct_valid_mask(opt_type, log_moneyness, total_ivar, volume)
+        args = (log_moneyness[valid_mask], total_ivar[valid_mask], volume[valid_mask], k_grid)
+        params = refitted_df.loc[ts, SVI_PARAM_COLUMNS].to_numpy(dtype=float)
+        for round_ in range(max_rounds):
+            res = minimize(
+                butterfly_penalized_objective,
+                x0=params,
+                args=(*args, penalty * 10.0 ** round_),
+                bounds=SVISettings.global_bounds,
+                method='L-BFGS-B',
+                options=SVI_OPTIMIZER_OPTIONS['L-BFGS-B']
+            )
+            if np.all(np.isfinite(res.x)):
+                params = res.x
+            if np.min(compute_durrleman_g(params[None, :], k_grid)) >= 0.0:
+                break
+        refitted_df.loc[ts, SVI_PARAM_COLUMNS] = params
+
+    refitted_report = check_butterfly_arbitrage(refitted_df, k_grid)
+    report['refitted_min_g'] = refitted_report['min_g'].where(report['violation'])
+    return refitted_df, report
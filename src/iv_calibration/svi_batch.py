@@ -0,0 +1,198 @@
+from typing import Sequence, List, Tuple, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from iv_calibration.config import SVISettings, SETTINGS
+from iv_calibration.metrics import RunMetrics
+from iv_calibration.svi_calibrator import (
+    SVISlice,
+    construct_valid_mask,
+    extract_svi_slices,
+    fit_svi_slice
+)
+
+_LOWER = np.array([-np.inf if lo is None else lo for lo, _ in SVISettings.global_bounds])
+_UPPER = np.array([np.inf if hi is None else hi for _, hi in SVISettings.global_bounds])
+
+class SVIBatch(NamedTuple):
+    ts: List[pd.Timestamp]
+    log_moneyness: np.ndarray  # (N, max_strikes)，padding 位置為 0
+    total_ivar: np.ndarray
+    volume: np.ndarray
+    valid_mask: np.ndarray
+
+class SVIBatchResult(NamedTuple):
+    params: np.ndarray  # (N, 5)
+    objective: np.ndarray
+    nit: np.ndarray
+    success: np.ndarray
+
+def build_svi_batch(slices: List[SVISlice]) -> SVIBatch:
+    n_slices = len(slices)
+    max_strikes = max((len(s[2]) for s in slices), default=0)
+    log_moneyness = np.zeros((n_slices, max_strikes))
+    total_ivar = np.zeros((n_slices, max_strikes))
+    volume = np.zeros((n_slices, max_strikes))
+    valid_mask = np.zeros((n_slices, max_strikes), dtype=bool)
+    for i, (_, opt_type, k, w, vol) in enumerate(slices):
+        keep = construct_valid_mask(opt_type, k, w, vol)
+        n = keep.size
+        valid_mask[i, :n] = keep
+        log_moneyness[i, :n] = np.where(keep, k, 0.0)
+        total_ivar[i, :n] = np.where(keep, w, 0.0)
+        volume[i, :n] = np.where(keep, vol, 0.0)
+    return SVIBatch([s[0] for s in slices], log_moneyness, total_ivar, volume, valid_mask)
+
+def _residuals_and_jacobian(
+    params: np.ndarray,
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    sqrt_weight: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    a, b, rho, m, sigma = (params[:, i:i + 1] for i in range(5))
+    x = log_moneyness - m
+    root = np.sqrt(x ** 2 + sigma ** 2)
+    model = a + b * (rho * x + root)
+    residuals = sqrt_weight * (model - total_ivar)
+    jac = np.stack((
+        np.ones_like(x),
+        rho * x + root,
+        b * x,
+        -b * (rho + x / root),
+        b * sigma / root,
+    ), axis=-1) * sqrt_weight[..., None]
+    return residuals, jac
+
+def calibrate_svi_batch(
+    batch: SVIBatch,
+    init_params: Sequence[float] = SVISettings.default_init_params,
+    max_iter: int = 500,
+    ftol: float = 1e-12,
+    xtol: float = 1e-12,
+    gtol: float = 1e-12
+) -> SVIBatchResult:
+    # 對所有 slice 同時做 projected Levenberg-Marquardt：
+    # (J^T J + lambda diag(J^T J)) delta = -J^T r，候選點投影回 global_bounds
+    n_slices = len(batch.ts)
+    params = np.broadcast_to(np.asarray(init_params, dtype=float), (n_slices, 5)).copy()
+    params = np.clip(params, _LOWER, _UPPER)
+    sqrt_weight = np.sqrt(batch.volume) * batch.valid_mask
+    fit = batch.valid_mask.sum(axis=1) >= 6
+
+    objective = np.full(n_slices, np.nan)
+    nit = np.zeros(n_slices, dtype=int)
+    success = np.zeros(n_slices, dtype=bool)
+
+    idx = np.flatnonzero(fit)
+    k, w, sw = batch.log_moneyness[idx], batch.total_ivar[idx], sqrt_weight[idx]
+    theta = params[idx]
+    residuals, jac = _residuals_and_jacobian(theta, k, w, sw)
+    cost = np.einsum('nm,nm->n', residuals, residuals)
+    damping = np.full(idx.size, 1e-3)
+
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+        nit[idx] += 1
+        jtj = np.einsum('nmi,nmj->nij', jac, jac)
+        grad = np.einsum('nmi,nm->ni', jac, residuals)
+        diag = np.einsum('nii->ni', jtj)
+        # 已貼在邊界且梯度往外推的參數本輪固定，避免投影扭曲其他參數的步長
+        active = (
+            ((theta <= _LOWER) & (grad > 0)) |
+            ((theta >= _UPPER) & (grad < 0))
+        )
+        free = (~active).astype(float)
+        lhs = jtj + (damping[:, None] * np.maximum(diag, 1e-30))[:, :, None] * np.eye(5)
+        lhs = lhs * free[:, :, None] * free[:, None, :] + (1.0 - free)[:, :, None] * np.eye(5)
+        step = np.linalg.solve(lhs, -(grad * free)[..., None])[..., 0]
+        candidate = np.clip(theta + step, _LOWER, _UPPER)
+
+        new_residuals, new_jac = _residuals_and_jacobian(candidate, k, w, sw)
+        new_cost = np.einsum('nm,nm->n', new_residuals, new_residuals)
+        accept = np.isfinite(new_cost) & (new_cost <= cost)
+
+        moved = np.abs(candidate - theta) <= xtol * (np.abs(theta) + xtol)
+        improved = (cost - new_cost) <= ftol * cost
+        stationary = np.max(np.abs(grad * free), axis=1) <= gtol
+        done = (accept & (moved.all(axis=1) | improved)) | stationary | (damping > 1e16)
+
+        theta = np.where(accept[:, None], candidate, theta)
+        residuals = np.where(accept[:, None], new_residuals, residuals)
+        jac = np.where(accept[:, None, None], new_jac, jac)
+        cost = np.where(accept, new_cost, cost)
+        damping = np.where(accept, np.maximum(damping * 0.3, 1e-12), damping * 10.0)
+
+        finished = idx[done]
+        params[finished] = theta[done]
+        objective[finished] = cost[done]
+        success[finished] = damping[done] <= 1e16
+
+        keep = ~done
+        idx, k, w, sw = idx[keep], k[keep], w[keep], sw[keep]
+        theta, residuals, jac = theta[keep], residuals[keep], jac[keep]
+        cost, damping = cost[keep], damping[keep]
+
+    # 超過 max_iter 仍未收斂者保留目前結果但標記失敗
+    params[idx] = theta
+    objective[idx] = cost
+    params[~fit] = np.nan
+    return SVIBatchResult(params, objective, nit, success)
+
+def compute_svi_params_batch(
+    option_resampled_df: pd.DataFrame,
+    init_params: Sequence[float] = SVISettings.default_init_params,
+    metrics: Optional[RunMetrics] = None
+) -> pd.DataFrame:
+    slices = extract_svi_slices(option_resampled_df)
+    batch = build_svi_batch(slices)
+    result = calibrate_svi_batch(batch, init_params)
+    params = np.where(result.success[:, None], result.params, np.nan)
+    objective = result.objective.copy()
+    # LM 每輪評估一次殘差，加上起點的一次
+    nfev = np.where(result.nit > 0, result.nit + 1, np.nan)
+    status = np.where(
+        batch.valid_mask.sum(axis=1) < 6, 'too_few_points',
+        np.where(result.success, 'ok', 'not_converged')
+    ).astype(object)
+
+    # 少數在 max_iter 內沒收斂的 slice 從 LM 結果出發改用單一 slice 的 L-BFGS-B 收尾
+    for i in np.flatnonzero(~result.success & np.isfinite(result.objective)):
+        mask = batch.valid_mask[i]
+        try:
+            res = fit_svi_slice(
+                batch.log_moneyness[i, mask],
+                batch.total_ivar[i, mask],
+                batch.volume[i, mask],
+                result.params[i]
+            )
+        except Exception as exc:
+            status[i] = f'error: {type(exc).__name__}'
+            continue
+        nfev[i] += res.nfev
+        if res.success:
+            params[i] = res.x
+            objective[i] = res.objective
+            status[i] = 'polished'
+
+    ts_index = pd.DatetimeIndex(batch.ts, name='ts')
+    vol_surface_svi_df = pd.DataFrame(params, index=ts_index, columns=['a', 'b', 'rho', 'm', 'sigma'])
+    vol_surface_svi_df['time_to_expiry'] = (
+        (SETTINGS.expiration_ts - ts_index) / SETTINGS.annualization_factor
+    )
+    if metrics is not None:
+        # 批次求解沒有單一 slice 的耗時，seconds 記為 NaN
+        metrics.record_slices('compute_svi_params_batch', [
+            {
+                'ts': ts,
+                'n_points': len(slice_[2]),
+                'n_valid': int(batch.valid_mask[i].sum()),
+                'nit': int(result.nit[i]),
+                'nfev': nfev[i],
+                'objective': objective[i],
+                'success': bool(np.isfinite(params[i]).all()),
+                'status': status[i],
+                'seconds': np.nan
+            }
+            for i, (ts, slice_) in enumerate(zip(batch.ts, slices))
+        ])
+    return vol_surface_svi_df
@@ -1,8 +1,36 @@
-from typing import Sequence, Optional, Union
+from typing import Sequence, Optional, Union, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import time
+import hashlib
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+from scipy.optimize import minimize, least_squares, OptimizeResult
 from iv_calibration.config import SVISettings, SETTINGS
+from iv_calibration.data_preprocessor import parse_expiration_ts
+from iv_calibration.metrics import RunMetrics
+
+SVI_OPTIMIZER_OPTIONS = {
+    'L-BFGS-B': {'maxiter': 100000, 'gtol': 1e-12, 'ftol': 1e-12},
+    'least_squares': {'max_nfev': 100000, 'gtol': 1e-12, 'ftol': 1e-12, 'xtol': 1e-12},
+    'quasi_explicit': {'maxiter': 5000, 'xatol': 1e-8, 'fatol': 1e-15},
+}
+# 平行校準時每個區塊起點的粗略擬合，只用來提供 warm start
+SVI_QUICK_OPTIONS = {
+    'L-BFGS-B': {'maxiter': 200, 'gtol': 1e-8, 'ftol': 1e-8},
+    'least_squares': {'max_nfev': 200, 'gtol': 1e-8, 'ftol': 1e-8, 'xtol': 1e-8},
+    'quasi_explicit': {'maxiter': 200, 'xatol': 1e-6, 'fatol': 1e-12},
+}
+# quasi-explicit 內層 (a, p, q) 的下界；c = b * sigma, c(1+rho) = p + delta q, c(1-rho) = q + delta p，
+# delta = (1-rho_max)/(1+rho_max) 使 p, q >= 0 恰好對應 |rho| <= rho_max
+_QE_LOWER = np.array([SVISettings.global_bounds[0][0], 0.0, 0.0])
+_QE_RHO_MAX = SVISettings.global_bounds[2][1]
+_QE_DELTA = (1.0 - _QE_RHO_MAX) / (1.0 + _QE_RHO_MAX)
+# 依序列出 (自由變數, 固定在下界的變數)，第一組為無約束解
+_QE_ACTIVE_SETS = [
+    (np.array([i for i in range(3) if mask >> i & 1], dtype=int),
+     np.array([i for i in range(3) if not mask >> i & 1], dtype=int))
+    for mask in range(7, -1, -1)
+]
 
 def compute_svi_total_ivar(
     k: Union[float, np.ndarray],
@@ -25,12 +53,71 @@ def raw_svi_weighted_objective(
     loss_func_value = float(np.sum(volume * (model_total_implied_var - market_total_implied_var) ** 2))
     return loss_func_value
 
+def compute_svi_total_ivar_jacobian(
+    k: np.ndarray,
+    a: float,
+    b: float,
+    rho: float,
+    m: float,
+    sigma: float
+) -> np.ndarray:
+    # 對 (a, b, rho, m, sigma) 的偏導數，shape (len(k), 5)
+    x = k - m
+    root = np.sqrt(x ** 2 + sigma ** 2)
+    return np.column_stack((
+        np.ones_like(x),
+        rho * x + root,
+        b * x,
+        -b * (rho + x / root),
+        b * sigma / root,
+    ))
+
+def raw_svi_weighted_objective_and_grad(
+    params: Sequence[float],
+    log_moneyness: np.ndarray,
+    market_total_implied_var: np.ndarray,
+    volume: np.ndarray
+) -> Tuple[float, np.ndarray]:
+    a, b, rho, m, sigma = params
+    diff = compute_svi_total_ivar(log_moneyness, a, b, rho, m, sigma) - market_total_implied_var
+    jac = compute_svi_total_ivar_jacobian(log_moneyness, a, b, rho, m, sigma)
+    weighted_diff = volume * diff
+    return float(np.sum(weighted_diff * diff)), 2.0 * (weighted_diff @ jac)
+
+def raw_svi_weighted_residuals(
+    params: Sequence[float],
+    log_moneyness: np.ndarray,
+    market_total_implied_var: np.ndarray,
+    volume: np.ndarray
+) -> np.ndarray:
+    # 殘差平方和即為 raw_svi_weighted_objective
+    a, b, rho, m, sigma = params
+    model_total_implied_var = compute_svi_total_ivar(log_moneyness, a, b, rho, m, sigma)
+    return np.sqrt(volume) * (model_total_implied_var - market_total_implied_var)
+
+def raw_svi_weighted_residuals_jacobian(
+    params: Sequence[float],
+    log_moneyness: np.ndarray,
+    market_total_implied_var: np.ndarray,
+    volume: np.ndarray
+) -> np.ndarray:
+    return np.sqrt(volume)[:, None] * compute_svi_total_ivar_jacobian(log_moneyness, *params)
+
 def construct_valid_mask(
     opt_type: np.ndarray,
     log_moneyness: np.ndarray,
     total_ivar: np.ndarray,
     volume: np.ndarray
 ) -> np.ndarray:
+    return construct_valid_mask_with_thresholds(opt_type, log_moneyness, total_ivar, volume)[0]
+
+def construct_valid_mask_with_thresholds(
+    opt_type: np.ndarray,
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray
+) -> Tuple[np.ndarray, float, float]:
+    # 回傳 (keep_mask, call 的 5% volume 閾值, put 的 5% volume 閾值)；沒有該類型的點時閾值為 NaN
     # 初步過濾：去除非有限值或 volume<=0
     base_mask = (
         np.isfinite(log_moneyness) &
@@ -76,73 +163,461 @@ def construct_valid_mask(
     if sum(keep_mask) < 6:
         keep_mask[:] = False 
         
-    return keep_mask
+    return (
+        keep_mask,
+        np.nan if call_vol_threshold is None else float(call_vol_threshold),
+        np.nan if put_vol_threshold is None else float(put_vol_threshold)
+    )
+
+def solve_svi_quasi_explicit_inner(
+    m: float,
+    sigma: float,
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray
+) -> Tuple[np.ndarray, float]:
+    # 固定 (m, sigma) 後 w = a + c(1+rho)(z+y)/2 + c(1-rho)(z-y)/2 對 (a, p, q) 為線性，
+    # 在 a>=a_min, p>=0, q>=0 下逐一枚舉 active set 求加權最小平方的封閉解
+    y = (log_moneyness - m) / sigma
+    z = np.sqrt(y ** 2 + 1.0)
+    upper, lower = 0.5 * (z + y), 0.5 * (z - y)
+    design = np.empty((3, y.size))
+    design[0] = 1.0
+    design[1] = upper + _QE_DELTA * lower
+    design[2] = lower + _QE_DELTA * upper
+    weighted = design * volume
+    gram = weighted @ design.T
+    rhs = weighted @ total_ivar
+
+    best_theta, best_value = _QE_LOWER, np.inf
+    for free, fixed in _QE_ACTIVE_SETS:
+        theta = _QE_LOWER.copy()
+        if free.size:
+            sub_gram = gram[free][:, free]
+            sub_rhs = rhs[free] - gram[free][:, fixed] @ _QE_LOWER[fixed]
+            try:
+                theta[free] = np.linalg.solve(sub_gram, sub_rhs)
+            except np.linalg.LinAlgError:
+                continue
+            if np.any(theta[free] < _QE_LOWER[free]):
+                continue
+        diff = theta @ design - total_ivar
+        value = float(np.sum(volume * diff * diff))
+        if value < best_value:
+            best_theta, best_value = theta, value
+        if not fixed.size:
+            # 無約束解可行即為最佳解
+            break
+
+    a, p, q = best_theta
+    c = 0.5 * (p + q) * (1.0 + _QE_DELTA)
+    rho = _QE_RHO_MAX * (p - q) / (p + q) if c > 0 else 0.0
+    b = max(c / sigma, SVISettings.global_bounds[1][0])
+    return np.array([a, b, rho]), best_value
+
+def _fit_svi_quasi_explicit(
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray,
+    init_params: Sequence[float],
+    options: dict
+) -> OptimizeResult:
+    def outer_objective(m_sigma):
+        m, sigma = m_sigma
+        return solve_svi_quasi_explicit_inner(m, sigma, log_moneyness, total_ivar, volume)[1]
+
+    res = minimize(
+        outer_objective,
+        x0=np.asarray(init_params, dtype=float)[3:],
+        bounds=SVISettings.global_bounds[3:],
+        method='Nelder-Mead',
+        options=options
+    )
+    m, sigma = res.x
+    a_b_rho, _ = solve_svi_quasi_explicit_inner(m, sigma, log_moneyness, total_ivar, volume)
+    res.x = np.concatenate((a_b_rho, res.x))
+    return res
+
+def fit_svi_slice(
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray,
+    init_params: Sequence[float] = SVISettings.default_init_params,
+    method: str = SVISettings.method,
+    options: Optional[dict] = None,
+    jac: bool = True
+) -> OptimizeResult:
+    # jac=False 時退回 SciPy 的有限差分，只保留給 benchmark 比較用；
+    # quasi_explicit 的外層為 Nelder-Mead，不使用梯度
+    args = (log_moneyness, total_ivar, volume)
+    if options is None:
+        options = SVI_OPTIMIZER_OPTIONS[method]
+    if method == 'L-BFGS-B':
+        res = minimize(
+            raw_svi_weighted_objective_and_grad if jac else raw_svi_weighted_objective,
+            x0=init_params,
+            args=args,
+            jac=jac,
+            bounds=SVISettings.global_bounds,
+            method='L-BFGS-B',
+            options=options
+        )
+    elif method == 'least_squares':
+        lower = [-np.inf if lo is None else lo for lo, _ in SVISettings.global_bounds]
+        upper = [np.inf if hi is None else hi for _, hi in SVISettings.global_bounds]
+        res = least_squares(
+            raw_svi_weighted_residuals,
+            x0=np.clip(init_params, lower, upper),
+            jac=raw_svi_weighted_residuals_jacobian if jac else '2-point',
+            bounds=(lower, upper),
+            method='trf',
+            args=args,
+            **options
+        )
+    elif method == 'quasi_explicit':
+        res = _fit_svi_quasi_explicit(*args, init_params, options)
+    else:
+        raise ValueError(
+            f"Invalid method='{method}', expected 'L-BFGS-B', 'least_squares' or 'quasi_explicit'."
+        )
+    res.objective = raw_svi_weighted_objective(res.x, *args)
+    return res
 
 def calibrate_svi(
     opt_type: np.ndarray,
     log_moneyness: np.ndarray,
     total_ivar: np.ndarray,
     volume: np.ndarray,
-    init_params: Sequence[float] = SVISettings.default_init_params
+    init_params: Sequence[float] = SVISettings.default_init_params,
+    options: Optional[dict] = None,
+    method: str = SVISettings.method
 ) -> Optional[np.ndarray]:
+    return calibrate_svi_with_stats(
+        opt_type, log_moneyness, total_ivar, volume, init_params, options, method
+    )[0]
+
+def calibrate_svi_with_stats(
+    opt_type: np.ndarray,
+    log_moneyness: np.ndarray,
+    total_ivar: np.ndarray,
+    volume: np.ndarray,
+    init_params: Sequence[float] = SVISettings.default_init_params,
+    options: Optional[dict] = None,
+    method: str = SVISettings.method
+) -> Tuple[Optional[np.ndarray], dict]:
+    # 與 calibrate_svi 相同，另外回傳最佳化統計（欄位見 metrics.SLICE_STAT_COLUMNS）；
+    # least_squares 沒有 nit，記為 NaN
+    start = time.perf_counter()
     valid_mask = construct_valid_mask(
         opt_type,
         log_moneyness,
         total_ivar,
         volume
     )
-    
-    if sum(valid_mask) < 6: return None
-    
-    try:
-        res = minimize(
-            raw_svi_weighted_objective,
-            x0=init_params,
-            args=(
+    stats = {
+        'n_points': len(log_moneyness),
+        'n_valid': int(valid_mask.sum()),
+        'nit': np.nan,
+        'nfev': np.nan,
+        'objective': np.nan,
+        'success': False,
+        'status': 'too_few_points',
+        'seconds': np.nan
+    }
+    params = None
+    if stats['n_valid'] >= 6:
+        try:
+            res = fit_svi_slice(
                 log_moneyness[valid_mask],
                 total_ivar[valid_mask],
-                volume[valid_mask]
-            ),
-            bounds=SVISettings.global_bounds,
-            method='L-BFGS-B',
-            options={'maxiter': 100000, 'gtol': 1e-12, 'ftol': 1e-12}
-        )
-    except Exception:
-        return None
-    return res.x if res.success else None
+                volume[valid_mask],
+                init_params,
+                method=method,
+                options=options
+            )
+        except Exception as exc:
+            stats['status'] = f'error: {type(exc).__name__}'
+        else:
+            stats.update(
+                nit=getattr(res, 'nit', np.nan),
+                nfev=res.nfev,
+                objective=res.objective,
+                success=bool(res.success),
+                status='ok' if res.success else 'not_converged'
+            )
+            if res.success:
+                params = res.x
+    stats['seconds'] = time.perf_counter() - start
+    return params, stats
 
-def compute_svi_params(option_resampled_df: pd.DataFrame) -> pd.DataFrame:
-    params_records = []
-    init_params = SVISettings.default_init_params
+SVISlice = Tuple[pd.Timestamp, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+def extract_svi_slices(option_resampled_df: pd.DataFrame) -> List[SVISlice]:
+    slices = []
     for ts, group_df in option_resampled_df.groupby(level='ts'):
         opt_type = group_df.index.get_level_values('option_type').values
         strike = group_df.index.get_level_values('strike').values
         forward = group_df['forward_price'].values
-        
-        params = calibrate_svi(
+        slices.append((
+            ts,
             opt_type,
             np.log(strike / forward),
             group_df['total_ivar'].values,
+            group_df['volume'].values
+        ))
+    return slices
+
+def build_svi_slice_prep(
+    option_resampled_df: pd.DataFrame,
+    vol_surface_svi_df: pd.DataFrame
+) -> pd.DataFrame:
+    # 校準時每一列的中間結果，索引與 option_resampled_df 相同（依 ts 分組的順序）：
+    # log_moneyness、valid（是否進入目標函數）、volume_threshold（該列 call/put 的 5% 閾值）、
+    # residual = 模型 total_ivar - 市場 total_ivar（參數缺失的 slice 為 NaN）
+    slices = extract_svi_slices(option_resampled_df)
+    ts_values = option_resampled_df.index.get_level_values('ts')
+    index = option_resampled_df.index[np.argsort(ts_values.asi8, kind='stable')]
+    if not slices:
+        return pd.DataFrame(
+            {'log_moneyness': [], 'valid': np.array([], dtype=bool), 'volume_threshold': [], 'residual': []},
+            index=index
+        )
+
+    valid, threshold = [], []
+    for _, opt_type, log_moneyness, total_ivar, volume in slices:
+        valid_mask, call_vol_threshold, put_vol_threshold = construct_valid_mask_with_thresholds(
+            opt_type, log_moneyness, total_ivar, volume
+        )
+        valid.append(valid_mask)
+        threshold.append(np.where(opt_type == 'C', call_vol_threshold, put_vol_threshold))
+
+    log_moneyness = np.concatenate([s[2] for s in slices])
+    total_ivar = np.concatenate([s[3] for s in slices])
+    params = (
+        vol_surface_svi_df[['a', 'b', 'rho', 'm', 'sigma']]
+        .reindex(index.get_level_values('ts'))
+        .to_numpy(dtype=float)
+    )
+    return pd.DataFrame({
+        'log_moneyness': log_moneyness,
+        'valid': np.concatenate(valid),
+        'volume_threshold': np.concatenate(threshold).astype(float),
+        'residual': compute_svi_total_ivar(log_moneyness, *params.T) - total_ivar,
+    }, index=index)
+
+def _calibrate_svi_block(
+    slices: List[SVISlice],
+    seed_slice: Optional[SVISlice] = None,
+    method: str = SVISettings.method,
+    expiration_ts: pd.Timestamp = SETTINGS.expiration_ts
+) -> Tuple[List[dict], List[dict]]:
+    # 回傳 (參數紀錄, 每個 slice 的最佳化統計)
+    init_params = SVISettings.default_init_params
+    if seed_slice is not None:
+        # 以前一個時間點的粗略擬合作為區塊內 warm-start 鏈的起點
+        _, opt_type, log_moneyness, total_ivar, volume = seed_slice
+        seed_params = calibrate_svi(
+            opt_type, log_moneyness, total_ivar, volume,
+            init_params, options=SVI_QUICK_OPTIONS[method], method=method
+        )
+        if seed_params is not None:
+            init_params = seed_params
+
+    params_records, stats_records = [], []
+    for ts, opt_type, log_moneyness, total_ivar, volume in slices:
+        params, stats = calibrate_svi_with_stats(
+            opt_type,
+            log_moneyness,
+            total_ivar,
+            volume,
+            init_params,
+            method=method
+        )
+
+        params_records.append(build_svi_params_record(ts, params, expiration_ts))
+        stats_records.append({'ts': ts, **stats})
+        init_params = SVISettings.default_init_params if params is None else params
+    return params_records, stats_records
+
+def build_svi_params_record(
+    ts: pd.Timestamp,
+    params: Optional[np.ndarray],
+    expiration_ts: pd.Timestamp = SETTINGS.expiration_ts
+) -> dict:
+    if params is None:
+        a, b, rho, m, sigma = [np.nan] * 5
+    else:
+        a, b, rho, m, sigma = params
+    
+    time_to_expiry = (expiration_ts - ts) / SETTINGS.annualization_factor
+    return {
+        'ts': ts,
+        'a': a,
+        'b': b,
+        'rho': rho,
+        'm': m,
+        'sigma': sigma,
+        'time_to_expiry': time_to_expiry
+    }
+
+def _calibrate_svi_block_args(args: tuple) -> Tuple[List[dict], List[dict]]:
+    return _calibrate_svi_block(*args)
+
+def compute_svi_params(
+    option_resampled_df: pd.DataFrame,
+    n_workers: int = SVISettings.n_workers,
+    block_size: Optional[int] = None,
+    method: str = SVISettings.method,
+    expiration_ts: pd.Timestamp = SETTINGS.expiration_ts,
+    metrics: Optional[RunMetrics] = None
+) -> pd.DataFrame:
+    slices = extract_svi_slices(option_resampled_df)
+    if n_workers <= 1 or len(slices) <= 1:
+        params_records, stats_records = _calibrate_svi_block(slices, method=method, expiration_ts=expiration_ts)
+    else:
+        if block_size is None:
+            block_size = -(-len(slices) // n_workers)
+        # 切成連續的時間區塊，每個區塊內維持 warm start
+        blocks = [
+            (slices[start:start + block_size], slices[start - 1] if start > 0 else None, method, expiration_ts)
+            for start in range(0, len(slices), block_size)
+        ]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            block_results = list(executor.map(_calibrate_svi_block_args, blocks))
+        params_records = [record for records, _ in block_results for record in records]
+        stats_records = [record for _, records in block_results for record in records]
+
+    if metrics is not None:
+        metrics.record_slices('compute_svi_params', stats_records)
+    return pd.DataFrame.from_records(params_records).set_index('ts')
+
+def compute_svi_surface(
+    option_resampled_df: pd.DataFrame,
+    n_workers: int = SVISettings.n_workers,
+    method: str = SVISettings.method,
+    metrics: Optional[RunMetrics] = None
+) -> pd.DataFrame:
+    # 輸入索引為 (ts, expiry, option_type, strike)；各到期月份各自一條 warm-start 鏈，月份之間平行
+    expiries, blocks = [], []
+    for expiry, expiry_df in option_resampled_df.groupby(level='expiry', sort=True):
+        expiries.append(expiry)
+        blocks.append((
+            extract_svi_slices(expiry_df.droplevel('expiry')),
+            None,
+            method,
+            parse_expiration_ts(expiry)
+        ))
+    if n_workers <= 1 or len(blocks) <= 1:
+        block_records = [_calibrate_svi_block_args(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(blocks))) as executor:
+            block_records = list(executor.map(_calibrate_svi_block_args, blocks))
+
+    params_records = [
+        {**record, 'expiry': expiry}
+        for expiry, (records, _) in zip(expiries, block_records)
+        for record in records
+    ]
+    if metrics is not None:
+        metrics.record_slices('compute_svi_surface', [
+            {**record, 'expiry': expiry}
+            for expiry, (_, records) in zip(expiries, block_records)
+            for record in records
+        ])
+    return (
+        pd.DataFrame.from_records(params_records)
+        .set_index(['ts', 'expiry'])
+        .sort_index()
+    )
+
+def hash_svi_slices(
+    option_resampled_df: pd.DataFrame,
+    method: str = SVISettings.method,
+    arbitrage: str = 'off'
+) -> pd.Series:
+    # forward_price 也會改變 log-moneyness，因此一併納入；method 不同時結果不可共用。
+    # arbitrage='refit' 會把參數換成加懲罰的重新擬合結果，同樣不可與未重新擬合的混用（'check' 不改參數）
+    salt = f'{method}+refit' if arbitrage == 'refit' else method
+    hashes = {}
+    for ts, group_df in option_resampled_df.groupby(level='ts'):
+        digest = hashlib.blake2b(salt.encode(), digest_size=16)
+        digest.update(group_df.index.get_level_values('option_type').values.astype('S').tobytes())
+        for values in (
+            group_df.index.get_level_values('strike').values,
+            group_df['forward_price'].values,
+            group_df['total_ivar'].values,
             group_df['volume'].values,
-            init_params
+        ):
+            digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+        hashes[ts] = digest.hexdigest()
+    return pd.Series(hashes, name='slice_hash', dtype=object).rename_axis('ts')
+
+def compute_svi_params_incremental(
+    option_resampled_df: pd.DataFrame,
+    cached_params_df: Optional[pd.DataFrame] = None,
+    cached_hashes: Optional[pd.Series] = None,
+    method: str = SVISettings.method,
+    metrics: Optional[RunMetrics] = None,
+    n_workers: int = SVISettings.n_workers,
+    block_size: Optional[int] = None,
+    batch: bool = False,
+    arbitrage: str = 'off'
+) -> Tuple[pd.DataFrame, pd.Series, int]:
+    # 回傳 (參數, slice 雜湊, 實際重新擬合的 slice 數)；批次求解不看 method，因此以 'batch' 另外雜湊。
+    # arbitrage 只影響雜湊：快取參數是否經過 refit_butterfly_violations 由呼叫端決定
+    hashes = hash_svi_slices(option_resampled_df, 'batch' if batch else method, arbitrage)
+    if cached_params_df is None or cached_hashes is None:
+        unchanged = pd.Series(False, index=hashes.index)
+    else:
+        unchanged = (
+            (cached_hashes.reindex(hashes.index) == hashes)
+            & hashes.index.isin(cached_params_df.index)
         )
+    n_changed = int((~unchanged).sum())
+
+    if batch or n_workers > 1:
+        # 只把變動的 slice 交給批次 / 平行路徑，warm-start 鏈只在變動的 slice 之間串接
+        from iv_calibration.svi_batch import compute_svi_params_batch  # svi_batch 依賴本模組
+        params_frames = []
+        if unchanged.any():
+            params_frames.append(cached_params_df.loc[hashes.index[unchanged.to_numpy()]])
+        if n_changed:
+            ts_level = option_resampled_df.index.get_level_values('ts')
+            changed_df = option_resampled_df[ts_level.isin(hashes.index[~unchanged.to_numpy()])]
+            if batch:
+                params_frames.append(compute_svi_params_batch(changed_df, metrics=metrics))
+            else:
+                params_frames.append(compute_svi_params(
+                    changed_df,
+                    n_workers=n_workers,
+                    block_size=block_size,
+                    method=method,
+                    metrics=metrics
+                ))
+        return pd.concat(params_frames).sort_index(), hashes, n_changed
 
-        if params is None:
-            a, b, rho, m, sigma = [np.nan] * 5
-            init_params = SVISettings.default_init_params
+    params_records, stats_records = [], []
+    init_params = SVISettings.default_init_params
+    for ts, opt_type, log_moneyness, total_ivar, volume in extract_svi_slices(option_resampled_df):
+        if unchanged[ts]:
+            # 輸入沒變的 slice 直接沿用快取參數（含先前的失敗結果）
+            params = cached_params_df.loc[ts, ['a', 'b', 'rho', 'm', 'sigma']].to_numpy(dtype=float)
+            if not np.all(np.isfinite(params)):
+                params = None
         else:
-            a, b, rho, m, sigma = params
-            init_params = params
-        
-        time_to_expiry = (SETTINGS.expiration_ts - ts) / SETTINGS.annualization_factor
-        params_records.append({
-            'ts': ts,
-            'a': a,
-            'b': b,
-            'rho': rho,
-            'm': m,
-            'sigma': sigma,
-            'time_to_expiry': time_to_expiry
-        })
-    
-    return pd.DataFrame.from_records(params_records).set_index('ts')
\ No newline at end of file
+            params, stats = calibrate_svi_with_stats(
+                opt_type,
+                log_moneyness,
+                total_ivar,
+                volume,
+                init_params,
+                method=method
+            )
+            stats_records.append({'ts': ts, **stats})
+        params_records.append(build_svi_params_record(ts, params))
+        init_params = SVISettings.default_init_params if params is None else params
+
+    if metrics is not None:
+        # 只記錄實際重新擬合的 slice
+        metrics.record_slices('compute_svi_params_incremental', stats_records)
+    return pd.DataFrame.from_records(params_records).set_index('ts'), hashes, n_changed
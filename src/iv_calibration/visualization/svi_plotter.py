@@ -1,3 +1,7 @@
+import json
+import base64
+import webbrowser
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -32,6 +36,267 @@ def scale_volumes(vol_array, min_size=8, max_size=22):
         return np.full_like(vol_array, (min_size + max_size) / 2, dtype=float)
     return (vol_array - vmin) / (vmax - vmin) * (max_size - min_size) + min_size
 
+# 5 條固定 trace：SVI 曲線、Call、Call (weight zero)、Put、Put (weight zero)
+SLIDER_TRACES = (
+    dict(
+        mode="lines", line=dict(width=2, color="#d62728", dash="dashdot"),
+        opacity=0.6, name="SVI"
+    ),
+    dict(
+        mode="markers", marker=dict(symbol="circle", opacity=0.7, color="#1f77b4"),
+        name="Call", legendgroup="call"
+    ),
+    dict(
+        mode="markers", marker=dict(symbol="circle-open", size=12, opacity=1.0, color="#1f77b4"),
+        name="Call (weight zero)", legendgroup="call"
+    ),
+    dict(
+        mode="markers", marker=dict(symbol="circle", opacity=0.7, color="#ff7f0e"),
+        name="Put", legendgroup="put"
+    ),
+    dict(
+        mode="markers", marker=dict(symbol="circle-open", size=12, opacity=1.0, color="#ff7f0e"),
+        name="Put (weight zero)", legendgroup="put"
+    ),
+)
+
+class SliceIndex(NamedTuple):
+    # 依 ts 分組、以偏移量索引的 slice 資料：第 i 個 ts 的列為 [starts[i], stops[i])，
+    # 組內順序與 xs(ts, level='ts') 相同
+    ts: pd.DatetimeIndex
+    starts: np.ndarray
+    stops: np.ndarray
+    opt_type: np.ndarray
+    log_moneyness: np.ndarray
+    columns: Dict[str, np.ndarray]
+    # 來自校準器的 valid mask（build_svi_slice_prep）；None 時由 construct_valid_mask 重算
+    valid_mask: Optional[np.ndarray] = None
+
+    def locate(self, ts_list) -> np.ndarray:
+        # 各 ts 在索引中的位置，不存在的 ts 為 -1
+        return self.ts.get_indexer(pd.DatetimeIndex(ts_list))
+
+    def slice(self, i: int) -> slice:
+        return slice(self.starts[i], self.stops[i])
+
+def build_slice_index(
+    option_resampled_df: pd.DataFrame,
+    columns: Sequence[str] = ('total_ivar', 'iv', 'volume'),
+    slice_prep: Optional[pd.DataFrame] = None
+) -> SliceIndex:
+    # log(K/F) 與各欄位只取一次；輸入已依 ts 排序時不重排。
+    # 給定 slice_prep 時直接沿用校準器存下的 log_moneyness 與 valid，與最佳化看到的點完全一致
+    ts_values = option_resampled_df.index.get_level_values('ts')
+    ts_i8 = np.asarray(ts_values, dtype='datetime64[ns]').view('i8')
+    order = None if np.all(ts_i8[1:] >= ts_i8[:-1]) else np.argsort(ts_i8, kind='stable')
+    take = (lambda arr: arr) if order is None else (lambda arr: arr[order])
+
+    ts_sorted = take(ts_i8)
+    new_group = np.ones(ts_sorted.size, dtype=bool)
+    new_group[1:] = ts_sorted[1:] != ts_sorted[:-1]
+    starts = np.flatnonzero(new_group)
+    stops = np.append(starts[1:], ts_sorted.size)
+
+    valid_mask = None
+    if slice_prep is None:
+        strike = take(option_resampled_df.index.get_level_values('strike').to_numpy(dtype=float))
+        forward = take(option_resampled_df['forward_price'].to_numpy(dtype=float))
+        log_moneyness = np.log(strike / forward)
+    else:
+        if not slice_prep.index.equals(option_resampled_df.index):
+            missing = option_resampled_df.index.difference(slice_prep.index)
+            if len(missing):
+                raise KeyError(f'slice_prep has no rows for {len(missing)} option rows, e.g. {missing[0]}')
+            slice_prep = slice_prep.reindex(option_resampled_df.index)
+        log_moneyness = take(slice_prep['log_moneyness'].to_numpy(dtype=float))
+        valid_mask = take(slice_prep['valid'].to_numpy(dtype=bool))
+    return SliceIndex(
+        ts=pd.DatetimeIndex(ts_sorted[starts]),
+        starts=starts,
+        stops=stops,
+        opt_type=take(option_resampled_df.index.get_level_values('option_type').to_numpy(dtype=str)),
+        log_moneyness=log_moneyness,
+        columns={
+            col: take(option_resampled_df[col].to_numpy(dtype=float))
+            for col in columns if col in option_resampled_df.columns
+        },
+        valid_mask=valid_mask
+    )
+
+def _window_range(
+    values: np.ndarray,
+    index: SliceIndex,
+    pos: np.ndarray,
+    window: int
+) -> List[Tuple[float, float]]:
+    # 前後各 window 個時間點的 min / max：先取每個 slice 的極值，再以 rolling（單調佇列，O(N)）合併；
+    # rolling 會略過 NaN，另外以 NaN 計數讓含 NaN 的視窗維持 NaN
+    if pos.size == 0:
+        return []
+    # ufunc.reduceat 與 ndarray.min 一樣讓 NaN 傳遞
+    lo = pd.Series(np.minimum.reduceat(values, index.starts)[pos])
+    hi = pd.Series(np.maximum.reduceat(values, index.starts)[pos])
+    width = 2 * window + 1
+    rolling = dict(window=width, center=True, min_periods=1)
+    has_nan = lo.isna().astype(float).rolling(**rolling).max().to_numpy() > 0
+    lo = lo.rolling(**rolling).min().to_numpy()
+    hi = hi.rolling(**rolling).max().to_numpy()
+    lo[has_nan] = np.nan
+    hi[has_nan] = np.nan
+    margin = (hi - lo) * 0.05
+    return list(zip(lo - margin, hi + margin))
+
+def build_slider_frames(
+    option_resampled_df: pd.DataFrame,
+    vol_surface_svi_df: pd.DataFrame,
+    y_calibration_func,
+    y_column_name: str,
+    window: int = 20,
+    slice_index: Optional[SliceIndex] = None,
+    slice_prep: Optional[pd.DataFrame] = None,
+    every: int = 1
+):
+    # 回傳 (ts_list, k_ranges, y_ranges, frames)；frames[i] 為 5 條 trace 的 (x, y, marker size)，
+    # 曲線與 weight zero 的點 size 為 None。every > 1 時座標範圍仍以完整時間序列計算，
+    # 但只為每 every 個時間點建 frame，回傳的四個 list 都只含這些時間點
+    ts_list = vol_surface_svi_df.index.tolist()
+    if slice_index is None:
+        slice_index = build_slice_index(
+            option_resampled_df, ('total_ivar', 'volume', y_column_name), slice_prep
+        )
+    pos = slice_index.locate(ts_list)
+    if (pos < 0).any():
+        raise KeyError(pd.DatetimeIndex(ts_list)[pos < 0][0])
+
+    k_all = slice_index.log_moneyness
+    y_all = slice_index.columns[y_column_name]
+    k_ranges = _window_range(k_all, slice_index, pos, window)
+    y_ranges = _window_range(y_all, slice_index, pos, window)
+    if every > 1:
+        sample = slice(None, None, every)
+        ts_list, k_ranges, y_ranges = ts_list[sample], k_ranges[sample], y_ranges[sample]
+        pos = pos[sample]
+        vol_surface_svi_df = vol_surface_svi_df.iloc[sample]
+
+    frames = []
+    for i, ts in enumerate(ts_list):
+        rows = slice_index.slice(pos[i])
+        k_vals = k_all[rows]
+        y_vals = y_all[rows]
+        volume = slice_index.columns['volume'][rows]
+        opt_type = slice_index.opt_type[rows]
+        if slice_index.valid_mask is not None:
+            valid_mask = slice_index.valid_mask[rows]
+        else:
+            total_ivar = slice_index.columns['total_ivar'][rows]
+            valid_mask = construct_valid_mask(
+                opt_type,
+                k_vals,
+                total_ivar,
+                volume
+            )
+        
+        scatter_size = np.zeros_like(volume, dtype=float)
+        scatter_size[valid_mask] = scale_volumes(volume[valid_mask])
+        
+        kmin, kmax = k_ranges[i]
+        k_curve, calibrated_curve = y_calibration_func(kmin, kmax, vol_surface_svi_df.iloc[i])
+        call_mask = (opt_type == 'C')
+        put_mask = (opt_type == 'P')
+        frames.append((
+            (k_curve, calibrated_curve, None),
+            (k_vals[call_mask & valid_mask], y_vals[call_mask & valid_mask], scatter_size[call_mask & valid_mask]),
+            (k_vals[call_mask & (~valid_mask)], y_vals[call_mask & (~valid_mask)], None),
+            (k_vals[put_mask & valid_mask], y_vals[put_mask & valid_mask], scatter_size[put_mask & valid_mask]),
+            (k_vals[put_mask & (~valid_mask)], y_vals[put_mask & (~valid_mask)], None),
+        ))
+    return ts_list, k_ranges, y_ranges, frames
+
+def slider_title(y_title: str, ts) -> str:
+    return f"{y_title}: calibration via SVI (volume-weighted) @ {ts}"
+
+# 拖動 slider 時把第 i 個時間點的資料換進固定的 5 條 trace；
+# offsets 每列 13 個位置，依序切出 SVI x/y、Call x/y/size、Call0 x/y、Put x/y/size、Put0 x/y
+_LITE_SLIDER_JS = """
+(function() {
+    const gd = document.getElementById('{plot_id}');
+    const payload = __PAYLOAD__;
+    const raw = atob(payload.data);
+    const bytes = new Uint8Array(raw.length);
+    for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    const values = new Float32Array(bytes.buffer);
+    const width = payload.n_segments + 1;
+    function show(i) {
+        const b = payload.offsets.slice(i * width, (i + 1) * width);
+        const seg = j => Array.from(values.subarray(b[j], b[j + 1]), v => (isNaN(v) ? null : v));
+        Plotly.update(gd, {
+            x: [seg(0), seg(2), seg(5), seg(7), seg(10)],
+            y: [seg(1), seg(3), seg(6), seg(8), seg(11)],
+            'marker.size': [12, seg(4), 12, seg(9), 12]
+        }, {
+            'title.text': payload.title_prefix + payload.ts[i],
+            'xaxis.range': payload.k_ranges[i],
+            'yaxis.range': payload.y_ranges[i]
+        }, [0, 1, 2, 3, 4]);
+    }
+    gd.on('plotly_sliderchange', function(event) { show(Number(event.step.value)); });
+})();
+"""
+
+def pack_slider_frames(frames) -> Tuple[np.ndarray, np.ndarray]:
+    # 所有時間點的 x / y / size 串成一個 float32 陣列；offsets 形狀 (N, 13)，
+    # 第 i 列為第 i 個時間點 12 段資料的起點，最後一欄為終點
+    parts = []
+    for frame in frames:
+        for x, y, size in frame:
+            parts.extend([x, y] if size is None else [x, y, size])
+    lengths = np.array([len(part) for part in parts], dtype=np.int64)
+    n_segments = len(parts) // max(len(frames), 1)
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    offsets = np.stack([
+        bounds[i * n_segments:(i + 1) * n_segments + 1] for i in range(len(frames))
+    ]) if frames else np.zeros((0, 13), dtype=np.int64)
+    values = np.concatenate(parts).astype(np.float32) if parts else np.array([], dtype=np.float32)
+    return values, offsets
+
+def build_lite_slider_figure(ts_list, k_ranges, y_ranges, frames, y_title: str):
+    # 只放第一個時間點的資料；其餘時間點以 base64 的 float32 區塊放在 post_script 裡
+    values, offsets = pack_slider_frames(frames)
+    fig = go.Figure()
+    for i, (trace, (x, y, size)) in enumerate(zip(SLIDER_TRACES, frames[0])):
+        style = dict(trace)
+        if i == 0:
+            style['name'] = "SVI calibrated"
+        style['marker'] = {**trace.get('marker', {}), 'size': 12 if size is None else size}
+        fig.add_trace(go.Scatter(x=x, y=y, **style, showlegend=True))
+
+    steps = [
+        dict(method="skip", label=ts.strftime("%H:%M"), value=str(i), args=[])
+        for i, ts in enumerate(ts_list)
+    ]
+    fig.update_layout(
+        title=slider_title(y_title, ts_list[0]),
+        xaxis=dict(title="Log-moneyness ln(K_i/F_i)", range=k_ranges[0]),
+        yaxis=dict(title=f"{y_title}", range=y_ranges[0]),
+        template="plotly_white",
+        sliders=[dict(
+            active=0,
+            currentvalue=dict(prefix="Selected time: "),
+            pad={"t":50},
+            steps=steps
+        )]
+    )
+    payload = {
+        'title_prefix': slider_title(y_title, ''),
+        'ts': [str(ts) for ts in ts_list],
+        'k_ranges': [[float(lo), float(hi)] for lo, hi in k_ranges],
+        'y_ranges': [[float(lo), float(hi)] for lo, hi in y_ranges],
+        'n_segments': int(offsets.shape[1] - 1),
+        'offsets': offsets.ravel().tolist(),
+        'data': base64.b64encode(values.tobytes()).decode('ascii'),
+    }
+    return fig, _LITE_SLIDER_JS.replace('__PAYLOAD__', json.dumps(payload))
+
 def plot_with_slider(
     option_resampled_df: pd.DataFrame,
     vol_surface_svi_df: pd.DataFrame,
@@ -39,31 +304,28 @@ def plot_with_slider(
     y_column_name: str,
     y_title: str,
     output_path: Path,
-    window: int = 20
+    window: int = 20,
+    mode: str = 'traces',
+    slice_prep: Optional[pd.DataFrame] = None,
+    show: bool = True
 ) -> None:
-    ts_list = vol_surface_svi_df.index.tolist()
-    
-    k_ranges, y_ranges = [], []
-    for idx, ts in enumerate(ts_list):
-        start, end = max(0, idx-window), min(len(ts_list), idx+window+1)
-        all_k, all_y = [], []
-        for nts in ts_list[start:end]:
-            mkt = option_resampled_df.xs(nts, level="ts")
-            forward = mkt["forward_price"].to_numpy(dtype=float)
-            strike = mkt.index.get_level_values("strike").astype(float)
-            k_vals = np.log(strike / forward)
-            y_vals = mkt[y_column_name].to_numpy(dtype=float)
-            all_k.append(k_vals)
-            all_y.append(y_vals)
-        all_k = np.concatenate(all_k)
-        all_y = np.concatenate(all_y)
-        k_min, k_max = all_k.min(), all_k.max()
-        margin = (k_max - k_min) * 0.05
-        k_ranges.append((k_min - margin, k_max + margin))
-        y_min, y_max = all_y.min(), all_y.max()
-        margin = (y_max - y_min) * 0.05
-        y_ranges.append((y_min - margin, y_max + margin))
-    
+    # mode='traces'：每個時間點一組 5 條 trace，slider 切換 visible（檔案大小隨 N^2 成長）；
+    # mode='lite'：只有 5 條 trace，各時間點資料存成一個 float32 區塊，由 JS 在拖動 slider 時換入
+    if mode not in ('traces', 'lite'):
+        raise ValueError(f"Invalid mode='{mode}', expected 'traces' or 'lite'.")
+    ts_list, k_ranges, y_ranges, frames = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, y_calibration_func, y_column_name, window,
+        slice_prep=slice_prep
+    )
+    if mode == 'lite':
+        fig, post_script = build_lite_slider_figure(ts_list, k_ranges, y_ranges, frames, y_title)
+        fig.write_html(output_path, include_plotlyjs="cdn", post_script=post_script)
+        print(f"已儲存：{Path(output_path).resolve()}")
+        if show:
+            # fig.show() 不會帶上換入資料的 post_script，因此直接開啟寫出的 HTML
+            webbrowser.open(Path(output_path).resolve().as_uri())
+        return
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=[None], y=[None],
@@ -99,98 +361,17 @@ def plot_with_slider(
     dynamic_count = 5 
     
     for i, ts in enumerate(ts_list):
-        mkt = option_resampled_df.xs(ts, level="ts")
-        strike = mkt.index.get_level_values("strike").astype(float)
-        forward = mkt["forward_price"].to_numpy(dtype=float)
-        k_vals = np.log(strike / forward)
-        y_vals = mkt[y_column_name].to_numpy(dtype=float)
-        volume = mkt["volume"].to_numpy(dtype=float)
-        opt_type = mkt.index.get_level_values("option_type").to_numpy(dtype=str)
-        total_ivar = mkt["total_ivar"].to_numpy(dtype=float)
-        valid_mask = construct_valid_mask(
-            opt_type,
-            k_vals,
-            total_ivar,
-            volume
-        )
-        
-        scatter_size = np.zeros_like(volume, dtype=float)
-        scatter_size[valid_mask] = scale_volumes(volume[valid_mask])
-        
-        kmin, kmax = k_ranges[i]
-        k_curve, calibrated_curve = y_calibration_func(kmin, kmax, vol_surface_svi_df.loc[ts])
-        fig.add_trace(go.Scatter(
-            x = k_curve,
-            y = calibrated_curve,
-            mode="lines", 
-            line=dict(width=2, color="#d62728", dash="dashdot"),
-            opacity=0.6,
-            name="SVI",
-            showlegend=False,
-            visible=(i==0)
-        ))
-        
-        call_mask = (opt_type == 'C')
-        fig.add_trace(go.Scatter(
-            x = k_vals[call_mask & valid_mask],
-            y = y_vals[call_mask & valid_mask],
-            mode="markers",
-            marker=dict(
-                symbol="circle",
-                size=scatter_size[call_mask & valid_mask],
-                opacity=0.7,
-                color="#1f77b4"
-            ),
-            name="Call",
-            legendgroup="call",
-            showlegend=False,
-            visible=(i==0)
-        ))
-        fig.add_trace(go.Scatter(
-            x = k_vals[call_mask & (~valid_mask)],
-            y = y_vals[call_mask & (~valid_mask)],
-            mode="markers",
-            marker=dict(
-                symbol="circle-open",
-                size=12,
-                opacity=1.0,
-                color="#1f77b4"
-            ),
-            name="Call (weight zero)",
-            legendgroup="call",
-            showlegend=False,
-            visible=(i==0)
-        ))
-        
-        put_mask = (opt_type == 'P')
-        fig.add_trace(go.Scatter(
-            x = k_vals[put_mask & valid_mask], 
-            y = y_vals[put_mask & valid_mask],
-            mode="markers",
-            marker=dict(
-                symbol="circle",
-                size=scatter_size[put_mask & valid_mask],
-                opacity=0.7,
-                color="#ff7f0e"),
-            name="Put",
-            legendgroup="put",
-            showlegend=False,
-            visible=(i==0)
-        ))
-        fig.add_trace(go.Scatter(
-            x = k_vals[put_mask & (~valid_mask)], 
-            y = y_vals[put_mask & (~valid_mask)],
-            mode="markers",
-            marker=dict(
-                symbol="circle-open",
-                size=12,
-                opacity=1.0,
-                color="#ff7f0e"),
-            name="Put (weight zero)",
-            legendgroup="put",
-            showlegend=False,
-            visible=(i==0)
-        ))
+        for trace, (x, y, size) in zip(SLIDER_TRACES, frames[i]):
+            style = dict(trace)
+            if size is not None:
+                style['marker'] = {**trace['marker'], 'size': size}
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                **style,
+                showlegend=False,
+                visible=(i==0)
+            ))
     
     steps = []
     for i, ts in enumerate(ts_list):
@@ -205,14 +386,14 @@ def plot_with_slider(
             label=ts.strftime("%H:%M"),
             args=[
                 {"visible": visible},
-                {"title": f"{y_title}: calibration via SVI (volume-weighted) @ {ts}",
+                {"title": slider_title(y_title, ts),
                  "xaxis.range": [xmin, xmax],
                  "yaxis.range": [ymin, ymax]}
             ]
         ))
     
     fig.update_layout(
-        title=f"{y_title}: calibration via SVI (volume-weighted) @ {ts_list[0]}",
+        title=slider_title(y_title, ts_list[0]),
         xaxis=dict(title="Log-moneyness ln(K_i/F_i)", range=k_ranges[0]),
         yaxis=dict(title=f"{y_title}", range=y_ranges[0]),
         template="plotly_white",
@@ -224,6 +405,8 @@ def plot_with_slider(
         )]
     )
     
-    fig.show()
+    if show:
+        # 無顯示環境（排程、伺服器）請傳 show=False，只寫出 HTML
+        fig.show()
     fig.write_html(output_path, include_plotlyjs="cdn")
-    print(f"已儲存：{Path(output_path).resolve()}")
\ No newline at end of file
+    print(f"已儲存：{Path(output_path).resolve()}")
@@ -0,0 +1,124 @@
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from iv_calibration.visualization.svi_plotter import build_slider_frames, slider_title
+
+# 與 SLIDER_TRACES 相同的 5 條：SVI 曲線、Call、Call (weight zero)、Put、Put (weight zero)
+SNAPSHOT_STYLES = (
+    dict(color="#d62728", linestyle="dashdot", linewidth=2, alpha=0.6, label="SVI calibrated"),
+    dict(color="#1f77b4", marker="o", alpha=0.7, label="Call"),
+    dict(facecolors="none", edgecolors="#1f77b4", marker="o", label="Call (weight zero)"),
+    dict(color="#ff7f0e", marker="o", alpha=0.7, label="Put"),
+    dict(facecolors="none", edgecolors="#ff7f0e", marker="o", label="Put (weight zero)"),
+)
+SNAPSHOT_FORMATS = ('png', 'svg')
+# plotly 的 marker size 為直徑（px），matplotlib 的 s 為面積（pt^2）
+_PX_TO_PT = 0.75
+_ZERO_WEIGHT_SIZE = 12
+
+def snapshot_file_name(y_column_name: str, ts: pd.Timestamp, fmt: str) -> str:
+    return f"{y_column_name}_{ts:%Y%m%d_%H%M%S}.{fmt}"
+
+def _frame_range(frame, axis: int) -> Tuple[float, float]:
+    # 5 條 trace 的 x（axis=0）或 y（axis=1）合併後的有限值範圍，外加 5% 邊界；沒有有限值時回傳 NaN
+    values = np.concatenate([np.asarray(trace[axis], dtype=float).ravel() for trace in frame])
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return (np.nan, np.nan)
+    lo, hi = values.min(), values.max()
+    margin = (hi - lo) * 0.05 if hi > lo else max(abs(lo) * 0.05, 1e-6)
+    return (lo - margin, hi + margin)
+
+def _render_snapshot_block(args: tuple) -> List[str]:
+    # 一個 worker 只建一次 Figure，之後每個時間點只替換 artist 的資料再存檔
+    jobs, y_title, fmt, dpi, figsize = args
+    # PNG 只求快，zlib 壓縮層級 1 檔案略大但編碼時間少很多
+    save_kwargs = {'pil_kwargs': {'compress_level': 1}} if fmt == 'png' else {}
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    line, = ax.plot([], [], **SNAPSHOT_STYLES[0])
+    scatters = [ax.scatter([], [], **style) for style in SNAPSHOT_STYLES[1:]]
+    ax.set_xlabel("Log-moneyness ln(K_i/F_i)")
+    ax.set_ylabel(y_title)
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc="upper right", fontsize="small")
+
+    paths = []
+    for path, ts, k_range, y_range, frame in jobs:
+        (k_curve, curve, _), *markers = frame
+        line.set_data(k_curve, curve)
+        for scatter, (x, y, size) in zip(scatters, markers):
+            scatter.set_offsets(np.column_stack((x, y)))
+            diameter = _ZERO_WEIGHT_SIZE if size is None else np.asarray(size, dtype=float)
+            scatter.set_sizes(np.broadcast_to((diameter * _PX_TO_PT) ** 2, np.shape(x)))
+        ax.set_title(slider_title(y_title, ts), fontsize="medium")
+        # 視窗內有 NaN 時範圍為 NaN，改用這一張的資料範圍；relim() 不會計入 scatter，不能用 autoscale
+        for lim, data_range, axis in (
+            (ax.set_xlim, k_range, 0),
+            (ax.set_ylim, y_range, 1),
+        ):
+            if not np.all(np.isfinite(data_range)):
+                data_range = _frame_range(frame, axis)
+            if np.all(np.isfinite(data_range)):
+                lim(*data_range)
+        fig.savefig(path, format=fmt, **save_kwargs)
+        paths.append(str(path))
+    return paths
+
+def export_svi_snapshots(
+    option_resampled_df: pd.DataFrame,
+    vol_surface_svi_df: pd.DataFrame,
+    y_calibration_func,
+    y_column_name: str,
+    y_title: str,
+    output_dir: Path,
+    fmt: str = 'png',
+    every: int = 1,
+    n_workers: int = 1,
+    window: int = 20,
+    dpi: int = 100,
+    figsize: Tuple[float, float] = (8.0, 5.0),
+    slice_prep: Optional[pd.DataFrame] = None
+) -> List[Path]:
+    # 每 every 個時間點輸出一張靜態圖（Agg，不需要顯示器）；座標範圍仍以完整時間序列的前後 window 點計算，
+    # 與 slider 上同一時間點的畫面一致。時間點切成連續區塊分給各 process
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Invalid fmt='{fmt}', expected one of {SNAPSHOT_FORMATS}.")
+    if every < 1:
+        raise ValueError(f"every must be >= 1, got {every}.")
+    start = time.perf_counter()
+    # 只為抽樣的時間點建 frame（SVI 曲線、valid mask、marker 切片）
+    ts_list, k_ranges, y_ranges, frames = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, y_calibration_func, y_column_name, window,
+        slice_prep=slice_prep, every=every
+    )
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        (output_dir / snapshot_file_name(y_column_name, ts, fmt), ts, k_range, y_range, frame)
+        for ts, k_range, y_range, frame in zip(ts_list, k_ranges, y_ranges, frames)
+    ]
+
+    if n_workers <= 1 or len(jobs) <= 1:
+        paths = _render_snapshot_block((jobs, y_title, fmt, dpi, figsize))
+    else:
+        block_size = -(-len(jobs) // n_workers)
+        blocks = [
+            (jobs[i:i + block_size], y_title, fmt, dpi, figsize)
+            for i in range(0, len(jobs), block_size)
+        ]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            paths = [path for block in executor.map(_render_snapshot_block, blocks) for path in block]
+
+    seconds = time.perf_counter() - start
+    print(
+        f"已儲存：{len(paths)} 張 {fmt} 至 {output_dir.resolve()}"
+        f"（{seconds:.2f} s，{len(paths) / max(seconds, 1e-9):.1f} frames/s）"
+    )
+    return [Path(path) for path in paths]
@@ -0,0 +1,140 @@
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+SVI_PARAM_COLUMNS = ['a', 'b', 'rho', 'm', 'sigma']
+# 每次向量化計算的點數上限，限制 (n_points, n_expiry) 暫存陣列的記憶體
+QUERY_CHUNK_SIZE = 500_000
+
+class VolSurface:
+    def __init__(self, vol_surface_svi_df: pd.DataFrame, interpolate_time: bool = False):
+        # 接受 compute_svi_params 的 ts 索引或 compute_svi_surface 的 (ts, expiry) 索引；
+        # 參數有缺的 slice 直接略過，查詢時落到前一個有效 slice
+        df = vol_surface_svi_df.dropna(subset=SVI_PARAM_COLUMNS + ['time_to_expiry'])
+        df = df.loc[df['time_to_expiry'] > 0]
+        if df.index.nlevels == 1:
+            df = df.set_index(pd.Index(np.zeros(len(df), dtype=int), name='expiry'), append=True)
+        df = df.reset_index().sort_values(['ts', 'time_to_expiry'], kind='mergesort')
+
+        ts_codes, ts_values = pd.factorize(df['ts'], sort=True)
+        rank = df.groupby(ts_codes).cumcount().to_numpy()
+        n_ts, n_expiry = len(ts_values), int(rank.max()) + 1 if len(df) else 0
+
+        self.interpolate_time = interpolate_time
+        self.ts = np.ascontiguousarray(pd.DatetimeIndex(ts_values).asi8)
+        self.n_expiry = np.bincount(ts_codes, minlength=n_ts)
+        # 補位的到期以 tau = inf 表示，不會被任何查詢選到
+        self.time_to_expiry = np.full((n_ts, n_expiry), np.inf)
+        self.params = np.zeros((n_ts, n_expiry, 5))
+        self.time_to_expiry[ts_codes, rank] = df['time_to_expiry'].to_numpy(dtype=float)
+        self.params[ts_codes, rank] = df[SVI_PARAM_COLUMNS].to_numpy(dtype=float)
+
+    @classmethod
+    def from_parquet(cls, path: Path, interpolate_time: bool = False) -> 'VolSurface':
+        return cls(pd.read_parquet(path), interpolate_time)
+
+    def _locate(self, ts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # 回傳不晚於 ts 的最後一個 slice 及往下一個 slice 的時間權重；早於第一個 slice 為 -1
+        i = np.searchsorted(self.ts, ts, side='right') - 1
+        weight = np.zeros(ts.shape)
+        if self.interpolate_time and self.ts.size > 1:
+            inner = (i >= 0) & (i < self.ts.size - 1)
+            lo = self.ts[i[inner]]
+            weight[inner] = (ts[inner] - lo) / (self.ts[i[inner] + 1] - lo)
+        return i, weight
+
+    def _slice_total_ivar(
+        self,
+        i: np.ndarray,
+        log_moneyness: np.ndarray,
+        time_to_expiry: np.ndarray
+    ) -> np.ndarray:
+        # 在第 i 個 slice 上求各到期的 w(k)，再對 tau 線性內插；第一個到期前接到 (0, 0)，
+        # 最後一個到期後維持 w / tau 不變（等同以 (0, 0) 與最後一個到期連線）
+        node_tau = self.time_to_expiry[i]
+        params = self.params[i]
+        node_w = compute_svi_total_ivar(log_moneyness[:, None], *np.moveaxis(params, -1, 0))
+        n_expiry = self.n_expiry[i]
+        j = (node_tau < time_to_expiry[:, None]).sum(axis=1)
+        inside = j < n_expiry
+        lo = np.where(inside, j, 0)
+        hi = np.where(inside, j + 1, n_expiry)
+        aug_tau = np.concatenate([np.zeros((i.size, 1)), node_tau], axis=1)
+        aug_w = np.concatenate([np.zeros((i.size, 1)), node_w], axis=1)
+        tau_lo = np.take_along_axis(aug_tau, lo[:, None], axis=1)[:, 0]
+        tau_hi = np.take_along_axis(aug_tau, hi[:, None], axis=1)[:, 0]
+        w_lo = np.take_along_axis(aug_w, lo[:, None], axis=1)[:, 0]
+        w_hi = np.take_along_axis(aug_w, hi[:, None], axis=1)[:, 0]
+        return w_lo + (w_hi - w_lo) * (time_to_expiry - tau_lo) / (tau_hi - tau_lo)
+
+    def _total_ivar_chunk(
+        self,
+        ts: np.ndarray,
+        log_moneyness: np.ndarray,
+        time_to_expiry: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        i, weight = self._locate(ts)
+        found = i >= 0
+        total_ivar = np.full(ts.shape, np.nan)
+        tau = np.full(ts.shape, np.nan)
+        i, weight, k = i[found], weight[found], log_moneyness[found]
+        nxt = np.minimum(i + 1, self.ts.size - 1)
+        if time_to_expiry is None:
+            # 單一到期：tau 取 slice 本身的到期時間（時間內插時一併內插）
+            slice_tau = self.time_to_expiry[i, 0]
+            query_tau = slice_tau + weight * (self.time_to_expiry[nxt, 0] - slice_tau)
+        else:
+            query_tau = time_to_expiry[found]
+        w = self._slice_total_ivar(i, k, query_tau)
+        blend = weight > 0
+        if blend.any():
+            w_next = self._slice_total_ivar(nxt[blend], k[blend], query_tau[blend])
+            w[blend] += weight[blend] * (w_next - w[blend])
+        total_ivar[found] = np.where(query_tau > 0, w, np.nan)
+        tau[found] = query_tau
+        return total_ivar, tau
+
+    def total_ivar(
+        self,
+        ts,
+        log_moneyness,
+        time_to_expiry=None
+    ) -> np.ndarray:
+        # 所有輸入依 NumPy 規則廣播；ts 可為 Timestamp、字串或 datetime64 陣列
+        if time_to_expiry is None and self.params.shape[1] > 1:
+            raise ValueError('time_to_expiry is required when the surface has several expiries.')
+        return self._query(ts, log_moneyness, time_to_expiry)[0]
+
+    def implied_vol(
+        self,
+        ts,
+        strike,
+        forward,
+        time_to_expiry=None
+    ) -> np.ndarray:
+        if time_to_expiry is None and self.params.shape[1] > 1:
+            raise ValueError('time_to_expiry is required when the surface has several expiries.')
+        log_moneyness = np.log(np.asarray(strike, dtype=float) / np.asarray(forward, dtype=float))
+        total_ivar, tau = self._query(ts, log_moneyness, time_to_expiry)
+        return np.sqrt(total_ivar / tau)
+
+    def _query(self, ts, log_moneyness, time_to_expiry) -> Tuple[np.ndarray, np.ndarray]:
+        ts = np.atleast_1d(np.asarray(ts, dtype='datetime64[ns]')).astype(np.int64)
+        arrays = [ts, np.asarray(log_moneyness, dtype=float)]
+        if time_to_expiry is not None:
+            arrays.append(np.asarray(time_to_expiry, dtype=float))
+        arrays = np.broadcast_arrays(*arrays)
+        shape = arrays[0].shape
+        flat = [np.ascontiguousarray(arr).ravel() for arr in arrays]
+        total_ivar = np.empty(flat[0].size)
+        tau = np.empty(flat[0].size)
+        for start in range(0, flat[0].size, QUERY_CHUNK_SIZE):
+            chunk = slice(start, start + QUERY_CHUNK_SIZE)
+            total_ivar[chunk], tau[chunk] = self._total_ivar_chunk(
+                flat[0][chunk],
+                flat[1][chunk],
+                flat[2][chunk] if time_to_expiry is not None else None
+            )
+        return total_ivar.reshape(shape), tau.reshape(shape)
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+import numpy as np
+from iv_calibration import clean_option_df, calculate_iv
+from run_benchmarks import Benchmark, BenchmarkResult, measure, compare_to_baseline
+from synthetic import make_txo_chain
+
+def test_synthetic_chain_recovers_smile_vols():
+    option_df, futures_series, underlying_series = make_txo_chain(n_ticks=2000, n_strikes=20)
+    assert option_df.index.is_monotonic_increasing and futures_series.index.is_monotonic_increasing
+    option_df = clean_option_df(option_df, futures_series, underlying_series)
+    iv = calculate_iv(
+        option_df['option_type'],
+        option_df['time_to_expiry'],
+        option_df['forward_price'],
+        option_df['strike'],
+        option_df['market_price'],
+        option_df['carry_rate']
+    )
+    assert np.isfinite(iv).mean() > 0.95
+    assert 0.1 < np.nanmedian(iv) < 0.25
+
+def test_compare_to_baseline_flags_throughput_and_memory_regressions():
+    result = measure(Benchmark('sum', 'rows/s', 100_000, lambda: np.ones(100_000).sum()), repeat=2)
+    assert result.throughput > 0 and result.peak_mb > 0.5
+
+    baseline = {'calculate_iv': {'throughput': 1000.0, 'peak_mb': 10.0}}
+    ok = BenchmarkResult('calculate_iv', 'rows/s', 100, 0.1, 900.0, 11.0)
+    slow = BenchmarkResult('calculate_iv', 'rows/s', 100, 0.1, 700.0, 11.0)
+    fat = BenchmarkResult('calculate_iv', 'rows/s', 100, 0.1, 1000.0, 13.0)
+    new = BenchmarkResult('plot_with_slider', 'slices/s', 10, 1.0, 10.0, 50.0)
+    assert compare_to_baseline([ok, new], baseline, threshold=0.25) == []
+    assert len(compare_to_baseline([slow], baseline, threshold=0.25)) == 1
+    assert 'peak' in compare_to_baseline([fat], baseline, threshold=0.25)[0]
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from iv_calibration import black_scholes_greeks
+from iv_calibration.data_preprocessor import calculate_black_scholes_price
+
+def make_inputs(n: int = 200, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    is_call = rng.random(n) < 0.5
+    tau = rng.uniform(0.01, 0.5, size=n)
+    vol = rng.uniform(0.05, 0.8, size=n)
+    forward = rng.uniform(16500.0, 17500.0, size=n)
+    strike = forward * np.exp(rng.uniform(-0.2, 0.2, size=n))
+    carry = rng.uniform(-0.05, 0.05, size=n)
+    return is_call, tau, vol, forward, strike, carry
+
+def test_price_matches_scalar_pricer():
+    is_call, tau, vol, forward, strike, carry = make_inputs()
+    tau[0], vol[1] = 0.0, 0.0
+    greeks = black_scholes_greeks(is_call, tau, vol, forward, strike, carry)
+    expected = [
+        calculate_black_scholes_price('C' if c else 'P', t, v, f, k, r)
+        for c, t, v, f, k, r in zip(is_call, tau, vol, forward, strike, carry)
+    ]
+    np.testing.assert_allclose(greeks.price, expected, rtol=1e-10, atol=1e-8)
+
+def test_greeks_match_finite_differences():
+    is_call, tau, vol, forward, strike, carry = make_inputs()
+    greeks = black_scholes_greeks(is_call, tau, vol, forward, strike, carry)
+
+    def price(v=vol, f=forward):
+        return black_scholes_greeks(is_call, tau, v, f, strike, carry).price
+
+    h_vol, h_fwd = 1e-4, 1e-2
+    fd_delta = (price(f=forward + h_fwd) - price(f=forward - h_fwd)) / (2 * h_fwd)
+    fd_vega = (price(v=vol + 1e-6) - price(v=vol - 1e-6)) / 2e-6
+    fd_vomma = (price(v=vol + h_vol) - 2 * price() + price(v=vol - h_vol)) / h_vol**2
+    np.testing.assert_allclose(greeks.delta, fd_delta, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(greeks.vega, fd_vega, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(greeks.vomma, fd_vomma, rtol=1e-3, atol=1e-1)
+
+def test_put_call_parity():
+    _, tau, vol, forward, strike, carry = make_inputs()
+    call = black_scholes_greeks(np.ones_like(tau, dtype=bool), tau, vol, forward, strike, carry)
+    put = black_scholes_greeks(np.zeros_like(tau, dtype=bool), tau, vol, forward, strike, carry)
+    discount = np.exp(-carry * tau)
+    np.testing.assert_allclose(call.price - put.price, discount * (forward - strike), atol=1e-8)
+    np.testing.assert_allclose(call.delta - put.delta, discount, atol=1e-12)
@@ -2,18 +2,244 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
+import numpy as np
 import pandas as pd
 from iv_calibration import (
     PATHS,
     SETTINGS,
     read_twse_index,
+    read_twse_index_series,
+    read_taifex_daily,
+    read_taifex_daily_by_expiry,
+    parse_expiration_ts,
+    select_futures_expiry,
     filter_contract_data,
     clean_option_df,
     clean_futures_df,
     calculate_iv,
-    resample_option_df
+    resample_option_df,
+    resample_option_bars
 )
+from iv_calibration.data_preprocessor import (
+    OPTION_COLUMN_NAMES,
+    calculate_black_scholes_price,
+    calculate_iv_scalar,
+    resample_option_df_groupby,
+)
+
+def make_option_quotes(n: int = 400, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    option_type = rng.choice(['C', 'P'], size=n)
+    tau = rng.uniform(0.005, 0.3, size=n)
+    forward = rng.uniform(16500.0, 17500.0, size=n)
+    strike = np.round(forward * np.exp(rng.uniform(-0.12, 0.12, size=n)) / 50) * 50
+    vol = rng.uniform(0.05, 0.8, size=n)
+    carry = rng.uniform(-0.05, 0.05, size=n)
+    price = np.array([
+        calculate_black_scholes_price(o, t, v, f, k, r)
+        for o, t, v, f, k, r in zip(option_type, tau, vol, forward, strike, carry)
+    ])
+    # TXO 最小跳動 0.1 點，四捨五入後部分價格會低於內含價值
+    price = np.round(price, 1)
+    # 邊界情況：零價格、負價格、過期、價格高於遠期
+    price[:4] = [0.0, -1.0, 5.0, forward[3] * 2]
+    tau[2] = 0.0
+    return dict(
+        option_type=option_type,
+        time_to_expiry=tau,
+        forward_price=forward,
+        strike=strike,
+        market_price=price,
+        carry_rate=carry,
+    )
+
+def test_calculate_iv_matches_scalar_solver():
+    quotes = make_option_quotes()
+    expected = np.array([
+        calculate_iv_scalar(o, t, f, k, p, r)
+        for o, t, f, k, p, r in zip(*quotes.values())
+    ])
+    result = calculate_iv(**quotes)
+    assert np.array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-6, equal_nan=True)
+
+def test_calculate_iv_process_pool_preserves_order():
+    quotes = make_option_quotes(n=301)
+    serial = calculate_iv(**quotes)
+    parallel = calculate_iv(**quotes, n_workers=2, chunk_size=37)
+    np.testing.assert_array_equal(parallel, serial)
+
+def test_calculate_iv_rejects_unknown_option_type():
+    quotes = make_option_quotes(n=10)
+    quotes['option_type'][5] = 'X'
+    try:
+        calculate_iv(**quotes)
+    except ValueError:
+        return
+    raise AssertionError('expected ValueError for option_type X')
+
+def write_raw_option_csv(path: Path, n: int = 500, seed: int = 4) -> None:
+    # 仿照 TAIFEX OptionsDaily：Big5、欄位名稱與代碼帶空白
+    rng = np.random.default_rng(seed)
+    trade_time = rng.choice([83000, 84500, 90000, 101500, 120000, 134500, 140000], n)
+    trade_time = trade_time + rng.integers(0, 59, n)
+    raw_df = pd.DataFrame({
+        '成交日期': 20230721,
+        '商品代號': rng.choice(['TXO   ', 'TEO   ', 'TXO'], n),
+        '履約價格': rng.choice([16800, 17000, 17200], n),
+        '到期月份(週別)': rng.choice(['202308     ', '202307W4   ', '202309'], n),
+        '買賣權別': rng.choice(['C ', 'P '], n),
+        '成交時間': trade_time,
+        '成交價格': np.round(rng.uniform(1, 300, n), 1),
+        '成交數量(B or S)': rng.integers(1, 20, n),
+        '開盤集合競價': rng.choice(['', '*'], n),
+    })
+    raw_df.columns = [f'{col} ' for col in raw_df.columns]
+    raw_df.to_csv(path, index=False, encoding='big5')
+
+def test_read_taifex_daily_matches_full_read(tmp_path):
+    csv_path = tmp_path / 'OptionsDaily_2023_07_21.csv'
+    write_raw_option_csv(csv_path)
+
+    all_option_df = pd.read_csv(csv_path, encoding='big5', low_memory=False)
+    all_option_df.columns = all_option_df.columns.str.strip()
+    all_option_df = all_option_df.rename(columns=OPTION_COLUMN_NAMES).assign(
+        contract_code=lambda df: df['contract_code'].str.strip(),
+        expiry=lambda df: df['expiry'].str.strip(),
+        option_type=lambda df: df['option_type'].str.strip()
+    )
+    expected = filter_contract_data(all_option_df, 'TXO', '202308')
+
+    result = read_taifex_daily(csv_path, OPTION_COLUMN_NAMES, 'TXO', '202308', chunksize=37)
+    assert len(result) > 0
+    assert result.index.is_monotonic_increasing
+    # 同一秒內多筆成交的先後順序不在比較範圍內
+    def canonical(df):
+        df = df.reset_index()
+        return df.sort_values(list(df.columns), kind='mergesort').reset_index(drop=True)
+    pd.testing.assert_frame_equal(canonical(result), canonical(expected), check_dtype=False)
+
+def test_parse_expiration_ts_monthly_and_weekly():
+    assert parse_expiration_ts('202308') == SETTINGS.expiration_ts
+    assert parse_expiration_ts('202307W4') == pd.Timestamp('2023-07-26 13:30:00')
+    assert parse_expiration_ts('202309W1') == pd.Timestamp('2023-09-06 13:30:00')
+    assert parse_expiration_ts('202408F2') == pd.Timestamp('2024-08-09 13:30:00')
+    assert select_futures_expiry('202308', ['202309', '202308']) == '202308'
+    assert select_futures_expiry('202307W4', ['202309', '202308']) == '202308'
+
+def test_read_taifex_daily_by_expiry_matches_single_expiry_reads(tmp_path):
+    csv_path = tmp_path / 'OptionsDaily_2023_07_21.csv'
+    write_raw_option_csv(csv_path)
+
+    expiry_dfs = read_taifex_daily_by_expiry(csv_path, OPTION_COLUMN_NAMES, 'TXO', chunksize=37)
+    assert list(expiry_dfs) == ['202307W4', '202308', '202309']
+    for expiry, expiry_df in expiry_dfs.items():
+        expected = read_taifex_daily(csv_path, OPTION_COLUMN_NAMES, 'TXO', expiry, chunksize=37)
+        pd.testing.assert_frame_equal(expiry_df, expected)
+
+def make_reference_frames(seed: int = 5):
+    # 刻意放入重複時間戳、超過 5 分鐘的空窗與剛好 5 分鐘的邊界
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2023-07-21 08:45:00')
+    option_ts = start + pd.to_timedelta(np.sort(rng.integers(0, 5 * 3600, 2000)), unit='s')
+    option_ts = option_ts.append(pd.DatetimeIndex([start + pd.Timedelta('5h5min')])).sort_values()
+    option_df = pd.DataFrame({
+        'strike': rng.choice([16800.0, 17000.0, 17200.0], option_ts.size),
+        'option_type': rng.choice(['C', 'P'], option_ts.size),
+        'market_price': rng.uniform(1, 300, option_ts.size),
+        'volume': rng.integers(1, 20, option_ts.size).astype(float),
+    }, index=option_ts.rename('ts'))
+    futures_ts = start + pd.to_timedelta(np.sort(np.r_[
+        rng.integers(0, 3600, 300), rng.integers(7200, 5 * 3600, 300), [3 * 3600] * 3
+    ]), unit='s')
+    futures_series = pd.Series(rng.uniform(16900, 17100, futures_ts.size), index=futures_ts)
+    underlying_series = pd.Series(
+        rng.uniform(16900, 17100, 61),
+        index=pd.date_range(start, periods=61, freq='5min')
+    )
+    return option_df, futures_series, underlying_series
+
+def test_clean_option_df_matches_merge_asof_alignment():
+    option_df, futures_series, underlying_series = make_reference_frames()
+    expected = option_df
+    for series, name in ((futures_series, 'forward_price'), (underlying_series, 'underlying_price')):
+        expected = pd.merge_asof(
+            expected, series.rename(name), left_index=True, right_index=True,
+            direction='backward', tolerance=pd.Timedelta('5min')
+        )
+    expected['time_to_expiry'] = (SETTINGS.expiration_ts - expected.index) / SETTINGS.annualization_factor
+    expected['carry_rate'] = (
+        (np.log(expected['forward_price']) - np.log(expected['underlying_price']))
+        / expected['time_to_expiry']
+    ).fillna(SETTINGS.carry_rate_default)
+
+    result = clean_option_df(option_df, futures_series, underlying_series)
+    assert expected['forward_price'].isna().any()
+    pd.testing.assert_frame_equal(result, expected)
+    assert 'forward_price' not in option_df
+
+    futures_df = pd.DataFrame({
+        'market_price': futures_series.values,
+        'near_month_price': '-',
+        'far_month_price': '-',
+    }, index=futures_series.index.rename('ts'))
+    expected_futures = pd.merge_asof(
+        futures_df, underlying_series.rename('underlying_price'), left_index=True, right_index=True,
+        direction='backward', tolerance=pd.Timedelta('5min')
+    )
+    result_futures = clean_futures_df(futures_df, underlying_series)
+    pd.testing.assert_series_equal(result_futures['underlying_price'], expected_futures['underlying_price'])
+
+def test_resample_option_bars_matches_groupby_for_every_frequency():
+    option_df, futures_series, underlying_series = make_reference_frames()
+    option_df = clean_option_df(option_df, futures_series, underlying_series)
+    rng = np.random.default_rng(6)
+    # last 要跳過 NaN、全 NaN 的 bar 要保留 NaN，volume 的 NaN 視為 0
+    option_df['iv'] = np.where(rng.random(len(option_df)) < 0.6, np.nan, rng.uniform(0.1, 0.3, len(option_df)))
+    option_df.iloc[::50, option_df.columns.get_loc('volume')] = np.nan
+    option_df['opening_call_auction'] = np.nan
+    multi_df = option_df.assign(expiry=rng.choice(['202308', '202307W4'], len(option_df)))
+    int_volume_df = option_df.assign(volume=np.nan_to_num(option_df['volume']).astype(np.int64))
+
+    # 7min 不整除一天，bar 邊界要與 Grouper 一樣從第一天午夜起算
+    freqs = ('1min', '5min', '7min', '15min')
+    for df in (option_df, multi_df, int_volume_df):
+        bars = resample_option_bars(df, freqs)
+        for freq in freqs:
+            pd.testing.assert_frame_equal(bars[freq], resample_option_df_groupby(df, freq))
+    assert resample_option_bars(int_volume_df)[SETTINGS.demo_resample_freq]['volume'].dtype == np.int64
+    pd.testing.assert_frame_equal(resample_option_df(option_df), resample_option_df_groupby(option_df))
+    pd.testing.assert_frame_equal(
+        resample_option_df(option_df, '7min'), resample_option_df_groupby(option_df, '7min')
+    )
+
+def write_twse_index_file(path: Path, date: str, times: list, seed: int):
+    rng = np.random.default_rng(seed)
+    header = '"時間","發行量加權股價指數","電子類指數",'
+    lines = [f'"{date} 每5秒指數統計"', header]
+    for i, time in enumerate(times):
+        time_field = f'="{time}"' if i % 2 else f'"{time}"'
+        taiex, electronic = rng.uniform(16000, 18000), rng.uniform(800, 900)
+        lines.append(f'{time_field},"{taiex:,.2f}","{electronic:,.2f}",')
+    lines += ['"說明:"', '"民國103年12月29日以後，資料為每5秒方式提供。"']
+    path.write_bytes(('\r\n'.join(lines) + '\r\n').encode('big5'))
+
+def test_read_twse_index_series_matches_full_read(tmp_path):
+    times = [f'{9 + i // 720:02d}:{i // 12 % 60:02d}:{i % 12 * 5:02d}' for i in range(300)]
+    write_twse_index_file(tmp_path / 'MI_5MINS_INDEX_20230724.csv', '112年07月24日', times, seed=1)
+    write_twse_index_file(tmp_path / 'MI_5MINS_INDEX_20230721.csv', '112年07月21日', times, seed=0)
+
+    for column in ('發行量加權股價指數', '電子類指數'):
+        expected = pd.concat([
+            read_twse_index(path)[column] for path in sorted(tmp_path.glob('*.csv'))
+        ])
+        for n_workers in (1, 2):
+            result = read_twse_index_series(tmp_path, column=column, n_workers=n_workers)
+            pd.testing.assert_series_equal(result, expected)
+            assert result.index.is_monotonic_increasing
+    single = read_twse_index_series(str(tmp_path / '*0721.csv'))
+    assert len(single) == 300 and single.index[0] == pd.Timestamp('2023-07-21 09:00:00')
 
 #%%
 if __name__ == "__main__":
-    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
\ No newline at end of file
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
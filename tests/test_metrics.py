@@ -0,0 +1,67 @@
+import sys
+import json
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import (
+    RunMetrics,
+    clean_option_df,
+    compute_svi_params,
+    compute_svi_params_batch
+)
+from test_data_preprocessor import make_reference_frames
+from test_svi_calibrator import load_option_slices
+
+def test_svi_slice_stats_match_fitted_params():
+    option_resampled_df = load_option_slices(8)
+    # 把一個 slice 的點數砍到不足 6 點，應記為 too_few_points
+    ts_index = option_resampled_df.index.get_level_values('ts')
+    sparse_ts = ts_index.unique()[2]
+    sparse = option_resampled_df[ts_index == sparse_ts].iloc[:4]
+    option_resampled_df = pd.concat([option_resampled_df[ts_index != sparse_ts], sparse]).sort_index()
+
+    for compute in (compute_svi_params, compute_svi_params_batch):
+        metrics = RunMetrics()
+        params_df = compute(option_resampled_df, metrics=metrics)
+        slice_df = metrics.slice_frame().set_index('ts')
+        assert list(slice_df.index) == list(params_df.index)
+        assert (slice_df['n_valid'] <= slice_df['n_points']).all()
+        fitted = params_df[['a', 'b', 'rho', 'm', 'sigma']].notna().all(axis=1)
+        assert (slice_df['success'] == fitted).all()
+        assert slice_df.loc[sparse_ts, 'status'] == 'too_few_points'
+        assert (slice_df.loc[fitted, 'nfev'] > 0).all()
+        assert np.isfinite(slice_df.loc[fitted, 'objective']).all()
+        counter = metrics.counter_frame().iloc[-1]
+        assert counter['name'] == 'construct_valid_mask'
+        assert counter['rows_out'] == slice_df['n_valid'].sum()
+
+def test_stage_timing_counters_and_run_log(tmp_path):
+    option_df, futures_series, underlying_series = make_reference_frames()
+    metrics = RunMetrics(run_id='test')
+    with metrics.stage('clean_option_df', len(option_df)) as record:
+        cleaned_df = clean_option_df(option_df, futures_series, underlying_series, metrics=metrics)
+        record['rows_out'] = len(cleaned_df)
+    metrics.record_slices('svi', [{
+        'ts': pd.Timestamp('2023-07-21 09:00'), 'n_points': 10, 'n_valid': 3, 'nit': np.nan,
+        'nfev': np.nan, 'objective': np.nan, 'success': False, 'status': 'too_few_points', 'seconds': 0.0
+    }])
+
+    stage = metrics.stage_frame().iloc[0]
+    assert stage['rows_in'] == stage['rows_out'] == len(option_df) and stage['seconds'] >= 0
+    counters = metrics.counter_frame().set_index('name')
+    assert counters.loc['forward_aligned', 'rows_out'] == cleaned_df['forward_price'].notna().sum()
+    assert counters.loc['forward_aligned', 'rows_out'] < len(option_df)
+    assert 'too_few_points: 1' in metrics.summary()
+
+    log_path = tmp_path / 'runs.jsonl'
+    metrics.write(log_path)
+    metrics.write(log_path)
+    rows = [json.loads(line) for line in log_path.read_text(encoding='utf-8').splitlines()]
+    assert len(rows) == 2 * (1 + len(counters) + 1)
+    assert rows[-1]['kind'] == 'slice' and rows[-1]['nit'] is None and rows[-1]['run_id'] == 'test'
+
+    metrics.write(tmp_path / 'runs')
+    slices = pd.read_parquet(tmp_path / 'runs' / 'test_slices.parquet')
+    assert slices['status'].tolist() == ['too_few_points']
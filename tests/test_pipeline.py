@@ -0,0 +1,103 @@
+import sys
+import functools
+import importlib
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from iv_calibration import Stage, run_pipeline
+from iv_calibration.config import SVISettings
+
+def make_stages(tmp_path: Path, calls: list):
+    raw, interim, final = tmp_path / 'raw.csv', tmp_path / 'interim.txt', tmp_path / 'final.txt'
+    plot = tmp_path / 'plot.html'
+
+    def preprocess():
+        calls.append('preprocess')
+        interim.write_text(raw.read_text().upper())
+
+    def calibrate():
+        calls.append('svi')
+        final.write_text(f'{interim.read_text()} {SVISettings.global_bounds[2]}')
+
+    def render():
+        calls.append('plot')
+        plot.write_text(f'<p>{final.read_text()}</p>')
+
+    # 故意打亂順序，由輸入/輸出推出執行順序
+    return [
+        Stage('plot', render, inputs=(interim, final), outputs=(plot,)),
+        Stage('svi', calibrate, inputs=(interim,), outputs=(final,),
+              settings=('SVISettings.global_bounds',)),
+        Stage('preprocess', preprocess, inputs=(raw,), outputs=(interim,),
+              settings=('SETTINGS.expiry',)),
+    ], raw, final
+
+def test_run_pipeline_reruns_only_stale_stages(tmp_path, monkeypatch):
+    calls = []
+    stages, raw, final = make_stages(tmp_path, calls)
+    cache_dir = tmp_path / 'cache'
+    raw.write_text('ticks')
+
+    assert run_pipeline(stages, cache_dir=cache_dir) == {'preprocess': 'ran', 'svi': 'ran', 'plot': 'ran'}
+    assert calls == ['preprocess', 'svi', 'plot']
+    assert set(run_pipeline(stages, cache_dir=cache_dir).values()) == {'cached'}
+
+    # 只改 SVI 設定：前處理不重跑
+    original_bounds = SVISettings.global_bounds
+    monkeypatch.setattr(SVISettings, 'global_bounds', original_bounds[:2] + ((-0.5, 0.5),) + original_bounds[3:])
+    assert run_pipeline(stages, cache_dir=cache_dir, dry_run=True) == {
+        'preprocess': 'cached', 'svi': 'stale', 'plot': 'stale'
+    }
+    calls.clear()
+    assert run_pipeline(stages, cache_dir=cache_dir)['preprocess'] == 'cached'
+    assert calls == ['svi', 'plot']
+    assert '(-0.5, 0.5)' in final.read_text()
+
+    # 改回原設定：輸出直接由快取還原
+    monkeypatch.setattr(SVISettings, 'global_bounds', original_bounds)
+    calls.clear()
+    assert run_pipeline(stages, cache_dir=cache_dir) == {
+        'preprocess': 'cached', 'svi': 'restored', 'plot': 'restored'
+    }
+    assert calls == []
+    assert str(original_bounds[2]) in final.read_text()
+
+def test_run_pipeline_targets_and_force(tmp_path):
+    calls = []
+    stages, raw, _ = make_stages(tmp_path, calls)
+    cache_dir = tmp_path / 'cache'
+    raw.write_text('ticks')
+
+    assert run_pipeline(stages, targets=['svi'], cache_dir=cache_dir) == {'preprocess': 'ran', 'svi': 'ran'}
+    calls.clear()
+    assert run_pipeline(stages, force=['svi'], cache_dir=cache_dir)['plot'] == 'ran'
+    calls.clear()
+    # 強制重跑的 svi 輸出內容不變，下游 plot 仍可沿用
+    assert run_pipeline(stages, force=['svi'], cache_dir=cache_dir)['plot'] == 'cached'
+    assert calls == ['svi']
+
+    raw.write_text('new ticks')
+    calls.clear()
+    run_pipeline(stages, cache_dir=cache_dir)
+    assert calls == ['preprocess', 'svi', 'plot']
+
+def test_stage_key_tracks_the_module_behind_lambda_and_partial(tmp_path, monkeypatch):
+    module_path = tmp_path / 'stage_script.py'
+    output = tmp_path / 'out.txt'
+    module_path.write_text(f"def main(suffix=''):\n    open({str(output)!r}, 'w').write('v1' + suffix)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    stage_script = importlib.import_module('stage_script')
+
+    # lambda 只會追到本測試檔，呼叫的模組要列在 sources；partial 直接追到 stage_script.py
+    stages = [
+        Stage('lambda', lambda: stage_script.main('-lambda'), outputs=(output,), sources=(module_path,)),
+        Stage('partial', functools.partial(stage_script.main, '-partial'), outputs=(output,)),
+    ]
+    cache_dir = tmp_path / 'cache'
+    for stage in stages:
+        assert run_pipeline([stage], cache_dir=cache_dir) == {stage.name: 'ran'}
+        assert run_pipeline([stage], cache_dir=cache_dir, dry_run=True) == {stage.name: 'cached'}
+
+    module_path.write_text(module_path.read_text().replace("'v1'", "'v2-edited'"))
+    for stage in stages:
+        assert run_pipeline([stage], cache_dir=cache_dir, dry_run=True) == {stage.name: 'stale'}
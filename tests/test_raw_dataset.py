@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd
+from iv_calibration import (
+    read_taifex_daily,
+    convert_taifex_csv_to_parquet,
+    load_contract_data
+)
+from iv_calibration.data_preprocessor import OPTION_COLUMN_NAMES
+from test_data_preprocessor import write_raw_option_csv
+
+def test_load_contract_data_matches_csv(tmp_path):
+    csv_path = tmp_path / 'OptionsDaily_2023_07_21.csv'
+    dataset_dir = tmp_path / 'options_daily'
+    write_raw_option_csv(csv_path)
+
+    n_rows = convert_taifex_csv_to_parquet(csv_path, dataset_dir, OPTION_COLUMN_NAMES, chunksize=37)
+    assert n_rows == 500
+    assert (dataset_dir / 'trade_date=20230721' / 'contract_code=TXO' / 'expiry=202308').is_dir()
+
+    expected = read_taifex_daily(csv_path, OPTION_COLUMN_NAMES, 'TXO', '202308', chunksize=37)
+    result = load_contract_data(dataset_dir, 'TXO', '202308')
+    assert len(result) == len(expected) > 0
+    assert result.index.is_monotonic_increasing
+    # 同一秒內的成交維持檔案中的先後順序，欄位型別與 CSV 讀取一致
+    assert result['volume'].dtype == 'int64'
+    pd.testing.assert_frame_equal(result, expected)
+
+    assert load_contract_data(dataset_dir, 'TXO', '202308', trade_dates=[20230720]).empty
+
+def test_reconverting_with_fewer_chunks_replaces_old_part_files(tmp_path):
+    csv_path = tmp_path / 'OptionsDaily_2023_07_21.csv'
+    dataset_dir = tmp_path / 'options_daily'
+    write_raw_option_csv(csv_path)
+
+    convert_taifex_csv_to_parquet(csv_path, dataset_dir, OPTION_COLUMN_NAMES, chunksize=37)
+    convert_taifex_csv_to_parquet(csv_path, dataset_dir, OPTION_COLUMN_NAMES, chunksize=1000)
+    partition_dir = dataset_dir / 'trade_date=20230721' / 'contract_code=TXO' / 'expiry=202308'
+    assert len(list(partition_dir.glob('*.parquet'))) == 1
+
+    expected = read_taifex_daily(csv_path, OPTION_COLUMN_NAMES, 'TXO', '202308', chunksize=37)
+    pd.testing.assert_frame_equal(load_contract_data(dataset_dir, 'TXO', '202308'), expected)
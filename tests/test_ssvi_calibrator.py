@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import (
+    compute_ssvi_params,
+    compute_ssvi_total_ivar,
+    build_ssvi_total_ivar
+)
+from iv_calibration.ssvi_calibrator import compute_ssvi_phi
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+TRUE_PARAMS = {'rho': -0.6, 'eta': 1.1, 'gamma': 0.35}
+
+def make_svi_surface(n_ts: int = 3) -> pd.DataFrame:
+    # 每個 SSVI slice 都是一條 raw SVI：a = theta(1-rho^2)/2, b = theta phi/2, m = -rho/phi, sigma = sqrt(1-rho^2)/phi
+    rho, eta, gamma = TRUE_PARAMS.values()
+    records = []
+    for i, ts in enumerate(pd.date_range('2023-07-21 09:00', periods=n_ts, freq='1min')):
+        for expiry, tau, theta in (('202307W4', 0.02, 0.0004), ('202308', 0.1, 0.0016), ('202309', 0.25, 0.004)):
+            theta = theta * (1.0 + 0.01 * i)
+            phi = compute_ssvi_phi(theta, eta, gamma)
+            records.append({
+                'ts': ts,
+                'expiry': expiry,
+                'a': theta * (1.0 - rho ** 2) / 2.0,
+                'b': theta * phi / 2.0,
+                'rho': rho,
+                'm': -rho / phi,
+                'sigma': np.sqrt(1.0 - rho ** 2) / phi,
+                'time_to_expiry': tau,
+            })
+    return pd.DataFrame.from_records(records).set_index(['ts', 'expiry'])
+
+def test_ssvi_recovers_surface_generated_from_ssvi():
+    vol_surface_svi_df = make_svi_surface()
+    ssvi_df = compute_ssvi_params(vol_surface_svi_df)
+    assert ssvi_df.index.names == ['ts', 'expiry']
+    for name, value in TRUE_PARAMS.items():
+        np.testing.assert_allclose(ssvi_df[name], value, rtol=1e-4)
+    assert (ssvi_df['eta'] * (1.0 + ssvi_df['rho'].abs()) <= 2.0 + 1e-12).all()
+
+    # 在節點上與原本的 raw SVI 一致
+    ts = ssvi_df.index.get_level_values('ts')[0]
+    k = np.linspace(-0.1, 0.1, 11)
+    for expiry, row in vol_surface_svi_df.xs(ts, level='ts').iterrows():
+        expected = compute_svi_total_ivar(k, *row[['a', 'b', 'rho', 'm', 'sigma']])
+        result = build_ssvi_total_ivar(ssvi_df.xs(ts, level='ts'), k, row['time_to_expiry'])
+        np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-10)
+
+def test_ssvi_surface_is_calendar_arbitrage_free_between_expiries():
+    ssvi_df = compute_ssvi_params(make_svi_surface(1))
+    ssvi_slice_df = ssvi_df.xs(ssvi_df.index.get_level_values('ts')[0], level='ts')
+    k = np.linspace(-0.3, 0.3, 61)[None, :]
+    tau = np.linspace(0.001, 0.5, 200)[:, None]
+    total_ivar = build_ssvi_total_ivar(ssvi_slice_df, k, tau)
+    assert total_ivar.shape == (200, 61)
+    assert (np.diff(total_ivar, axis=0) >= -1e-15).all()
+    np.testing.assert_allclose(
+        compute_ssvi_total_ivar(0.0, ssvi_slice_df['theta'].values, *ssvi_slice_df.iloc[0][['rho', 'eta', 'gamma']]),
+        ssvi_slice_df['theta'].values
+    )
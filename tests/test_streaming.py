@@ -0,0 +1,94 @@
+import sys
+import asyncio
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import (
+    clean_option_df,
+    calculate_iv,
+    resample_option_df,
+    compute_svi_params
+)
+from iv_calibration.data_preprocessor import calculate_black_scholes_price
+from iv_calibration.streaming import (
+    StreamingSurfaceCalibrator,
+    replay_ticks,
+    stream_surface,
+    astream_surface
+)
+
+def make_tick_frames(n_minutes: int = 4, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2023-07-21 09:00:00')
+    index_ts = pd.date_range(start, periods=n_minutes * 12, freq='5s')
+    underlying = pd.Series(17000 + np.cumsum(rng.normal(0, 2, index_ts.size)), index=index_ts)
+
+    futures_ts = start + pd.to_timedelta(np.sort(rng.uniform(0, n_minutes * 60, 40)), unit='s')
+    futures = pd.Series(
+        underlying.asof(futures_ts).values + 15 + rng.normal(0, 1, futures_ts.size),
+        index=pd.DatetimeIndex(futures_ts.floor('s'), name='ts')
+    )
+
+    n_ticks = n_minutes * 150
+    option_ts = start + pd.to_timedelta(np.sort(rng.uniform(1, n_minutes * 60, n_ticks)), unit='s')
+    strike = rng.choice(np.arange(16400.0, 17700.0, 100.0), n_ticks)
+    option_type = np.where(strike >= 17000, 'C', 'P')
+    k = np.log(strike / 17015)
+    vol = 0.12 + 0.6 * k ** 2 - 0.1 * k
+    tau = (pd.Timestamp('2023-08-16 13:30:00') - option_ts) / pd.Timedelta(days=252)
+    price = [
+        round(calculate_black_scholes_price(o, t, v, 17015, s), 1)
+        for o, t, v, s in zip(option_type, tau, vol, strike)
+    ]
+    option_df = pd.DataFrame({
+        'strike': strike,
+        'option_type': option_type,
+        'market_price': price,
+        'volume': rng.integers(1, 50, n_ticks).astype(float),
+        'opening_call_auction': '',
+    }, index=pd.DatetimeIndex(option_ts.floor('s'), name='ts'))
+    return option_df, futures, underlying
+
+def batch_bars(option_df, futures, underlying) -> pd.DataFrame:
+    option_df = clean_option_df(option_df, futures, underlying)
+    option_df['iv'] = calculate_iv(
+        option_df['option_type'],
+        option_df['time_to_expiry'],
+        option_df['forward_price'],
+        option_df['strike'],
+        option_df['market_price'],
+        option_df['carry_rate']
+    )
+    option_df['total_ivar'] = option_df['iv'] ** 2 * option_df['time_to_expiry']
+    return resample_option_df(option_df)
+
+def test_streaming_bars_match_batch_pipeline():
+    option_df, futures, underlying = make_tick_frames()
+    expected_bars = batch_bars(option_df, futures, underlying)
+    expected_params = compute_svi_params(expected_bars)
+
+    bars = list(stream_surface(replay_ticks(option_df, futures, underlying)))
+    streamed = pd.concat([bar.option_bar_df for bar in bars])
+    pd.testing.assert_frame_equal(streamed, expected_bars, check_freq=False)
+
+    params = pd.DataFrame.from_records([bar.params for bar in bars]).set_index('ts')
+    pd.testing.assert_frame_equal(params, expected_params, check_freq=False)
+    assert params[['a', 'b', 'rho', 'm', 'sigma']].notna().all(axis=None)
+
+def test_async_source_yields_same_bars():
+    option_df, futures, underlying = make_tick_frames(n_minutes=2)
+    ticks = list(replay_ticks(option_df, futures, underlying))
+
+    async def source():
+        for tick in ticks:
+            yield tick
+
+    async def collect():
+        return [bar async for bar in astream_surface(source(), StreamingSurfaceCalibrator())]
+
+    async_bars = asyncio.run(collect())
+    sync_bars = list(stream_surface(ticks))
+    assert [bar.ts for bar in async_bars] == [bar.ts for bar in sync_bars]
+    assert [bar.params for bar in async_bars] == [bar.params for bar in sync_bars]
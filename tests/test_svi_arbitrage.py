@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+from iv_calibration import (
+    PATHS,
+    compute_durrleman_g,
+    check_butterfly_arbitrage,
+    refit_butterfly_violations
+)
+from iv_calibration.svi_arbitrage import build_arbitrage_k_grid
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+SVI_COLUMNS = ['a', 'b', 'rho', 'm', 'sigma']
+
+def test_durrleman_g_matches_finite_differences():
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi).dropna().iloc[:20]
+    k_grid = build_arbitrage_k_grid()
+    g = compute_durrleman_g(vol_surface_svi_df[SVI_COLUMNS].to_numpy(), k_grid)
+    assert g.shape == (20, k_grid.size)
+
+    h = 1e-4
+    for i, params in enumerate(vol_surface_svi_df[SVI_COLUMNS].to_numpy()):
+        w = compute_svi_total_ivar(k_grid, *params)
+        dw = (compute_svi_total_ivar(k_grid + h, *params) - compute_svi_total_ivar(k_grid - h, *params)) / (2 * h)
+        d2w = (compute_svi_total_ivar(k_grid + h, *params) - 2 * w + compute_svi_total_ivar(k_grid - h, *params)) / h ** 2
+        expected = (1 - k_grid * dw / (2 * w)) ** 2 - dw ** 2 / 4 * (1 / w + 0.25) + d2w / 2
+        np.testing.assert_allclose(g[i], expected, rtol=1e-4, atol=1e-4)
+
+def test_refit_removes_butterfly_violations():
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi)
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
+    report = check_butterfly_arbitrage(vol_surface_svi_df)
+    assert report.index.equals(vol_surface_svi_df.index)
+    # 缺參數的 slice 不算違反
+    assert not report.loc[vol_surface_svi_df['a'].isna(), 'violation'].any()
+    violating = report.index[report['violation']]
+    assert len(violating) > 0
+
+    refitted_df, refit_report = refit_butterfly_violations(option_resampled_df, vol_surface_svi_df)
+    assert (refit_report.loc[violating, 'refitted_min_g'] >= 0).all()
+    assert not check_butterfly_arbitrage(refitted_df)['violation'].any()
+    untouched = ~vol_surface_svi_df.index.isin(violating)
+    pd.testing.assert_frame_equal(refitted_df[untouched], vol_surface_svi_df[untouched])
@@ -2,9 +2,223 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
+import numpy as np
 import pandas as pd
-from iv_calibration import PATHS, compute_svi_params
-    
+from iv_calibration import (
+    PATHS,
+    compute_svi_params,
+    compute_svi_surface,
+    parse_expiration_ts,
+    compute_svi_params_batch,
+    compute_svi_params_incremental,
+    build_svi_slice_prep,
+    RunMetrics
+)
+from iv_calibration.svi_calibrator import (
+    raw_svi_weighted_objective,
+    raw_svi_weighted_objective_and_grad,
+    raw_svi_weighted_residuals,
+    raw_svi_weighted_residuals_jacobian,
+    calibrate_svi,
+    construct_valid_mask,
+    extract_svi_slices
+)
+
+def load_option_slices(n_ts: int = 12) -> pd.DataFrame:
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
+    ts_index = option_resampled_df.index.get_level_values('ts')
+    return option_resampled_df[ts_index.isin(ts_index.unique()[:n_ts])]
+
+def test_parallel_svi_params_are_stitched_in_ts_order():
+    option_resampled_df = load_option_slices()
+    serial = compute_svi_params(option_resampled_df)
+    parallel = compute_svi_params(option_resampled_df, n_workers=2, block_size=6)
+    pd.testing.assert_index_equal(parallel.index, serial.index)
+    # 第一個區塊與序列版本走相同的 warm-start 鏈
+    pd.testing.assert_frame_equal(parallel.iloc[:6], serial.iloc[:6])
+    np.testing.assert_array_equal(
+        parallel['time_to_expiry'].values, serial['time_to_expiry'].values
+    )
+    assert parallel[['a', 'b', 'rho', 'm', 'sigma']].notna().all(axis=None)
+
+def test_analytic_gradient_matches_finite_differences():
+    rng = np.random.default_rng(2)
+    k = np.linspace(-0.15, 0.1, 40)
+    market = 0.0015 + 0.02 * k ** 2 + rng.normal(0, 1e-4, k.size)
+    volume = rng.integers(1, 200, k.size).astype(float)
+    params = np.array([1e-3, 0.03, -0.4, -0.01, 0.05])
+
+    value, grad = raw_svi_weighted_objective_and_grad(params, k, market, volume)
+    assert value == raw_svi_weighted_objective(params, k, market, volume)
+    h = 1e-7
+    fd_grad = [
+        (raw_svi_weighted_objective(params + h * e, k, market, volume)
+         - raw_svi_weighted_objective(params - h * e, k, market, volume)) / (2 * h)
+        for e in np.eye(5)
+    ]
+    np.testing.assert_allclose(grad, fd_grad, rtol=1e-5, atol=1e-9)
+
+    residuals = raw_svi_weighted_residuals(params, k, market, volume)
+    np.testing.assert_allclose(np.sum(residuals ** 2), value)
+    jac = raw_svi_weighted_residuals_jacobian(params, k, market, volume)
+    np.testing.assert_allclose(2 * residuals @ jac, grad)
+
+def test_least_squares_method_fits_as_well_as_lbfgsb():
+    for _, opt_type, k, total_ivar, volume in extract_svi_slices(load_option_slices(3)):
+        lbfgsb = calibrate_svi(opt_type, k, total_ivar, volume)
+        lsq = calibrate_svi(opt_type, k, total_ivar, volume, method='least_squares')
+        valid = construct_valid_mask(opt_type, k, total_ivar, volume)
+        args = (k[valid], total_ivar[valid], volume[valid])
+        assert raw_svi_weighted_objective(lsq, *args) <= raw_svi_weighted_objective(lbfgsb, *args) * 1.01
+
+def test_quasi_explicit_engine_respects_bounds_and_fits():
+    option_resampled_df = load_option_slices(5)
+    lbfgsb = compute_svi_params(option_resampled_df)
+    quasi_explicit = compute_svi_params(option_resampled_df, method='quasi_explicit')
+    pd.testing.assert_index_equal(quasi_explicit.index, lbfgsb.index)
+    assert list(quasi_explicit.columns) == list(lbfgsb.columns)
+    assert (quasi_explicit['rho'].abs() <= 0.9999).all()
+    assert (quasi_explicit[['a', 'b', 'sigma']] >= 1e-8).all(axis=None)
+
+    for ts, opt_type, k, total_ivar, volume in extract_svi_slices(option_resampled_df):
+        valid = construct_valid_mask(opt_type, k, total_ivar, volume)
+        args = (k[valid], total_ivar[valid], volume[valid])
+        qe_value = raw_svi_weighted_objective(quasi_explicit.loc[ts, ['a', 'b', 'rho', 'm', 'sigma']], *args)
+        lbfgsb_value = raw_svi_weighted_objective(lbfgsb.loc[ts, ['a', 'b', 'rho', 'm', 'sigma']], *args)
+        assert qe_value <= lbfgsb_value * 1.01
+
+def test_batched_calibration_matches_serial_frame():
+    option_resampled_df = load_option_slices(20)
+    serial = compute_svi_params(option_resampled_df)
+    batched = compute_svi_params_batch(option_resampled_df)
+    pd.testing.assert_index_equal(batched.index, serial.index)
+    assert list(batched.columns) == list(serial.columns)
+    np.testing.assert_array_equal(batched['time_to_expiry'].values, serial['time_to_expiry'].values)
+    assert batched[['a', 'b', 'rho', 'm', 'sigma']].notna().all(axis=None)
+
+    ratios = []
+    for ts, opt_type, k, total_ivar, volume in extract_svi_slices(option_resampled_df):
+        valid = construct_valid_mask(opt_type, k, total_ivar, volume)
+        args = (k[valid], total_ivar[valid], volume[valid])
+        ratios.append(
+            raw_svi_weighted_objective(batched.loc[ts, ['a', 'b', 'rho', 'm', 'sigma']], *args)
+            / raw_svi_weighted_objective(serial.loc[ts, ['a', 'b', 'rho', 'm', 'sigma']], *args)
+        )
+    assert np.median(ratios) <= 1.0 + 1e-6
+
+def test_incremental_calibration_only_refits_changed_slices(monkeypatch):
+    import iv_calibration.svi_calibrator as svi_calibrator
+
+    option_resampled_df = load_option_slices(6)
+    params_df, hashes, n_changed = compute_svi_params_incremental(option_resampled_df)
+    assert n_changed == len(hashes)
+    pd.testing.assert_frame_equal(params_df, compute_svi_params(option_resampled_df))
+
+    changed_df = option_resampled_df.copy()
+    ts_list = changed_df.index.get_level_values('ts').unique()
+    changed_rows = changed_df.index.get_level_values('ts') == ts_list[3]
+    changed_df.loc[changed_rows, 'total_ivar'] *= 1.01
+
+    calls = []
+    original = svi_calibrator.calibrate_svi_with_stats
+    def counting_calibrate_svi(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(svi_calibrator, 'calibrate_svi_with_stats', counting_calibrate_svi)
+
+    metrics = RunMetrics()
+    new_params_df, new_hashes, n_changed = compute_svi_params_incremental(changed_df, params_df, hashes, metrics=metrics)
+    assert len(calls) == 1
+    assert n_changed == 1
+    assert [record['ts'] for record in metrics.slices] == [ts_list[3]]
+    assert (new_hashes != hashes).sum() == 1
+    unchanged = new_params_df.index != ts_list[3]
+    pd.testing.assert_frame_equal(new_params_df[unchanged], params_df[unchanged])
+
+def test_incremental_calibration_passes_changed_slices_to_parallel_path():
+    option_resampled_df = load_option_slices(6)
+    params_df, hashes, _ = compute_svi_params_incremental(option_resampled_df, n_workers=2, block_size=3)
+    pd.testing.assert_frame_equal(
+        params_df, compute_svi_params(option_resampled_df, n_workers=2, block_size=3)
+    )
+
+    changed_df = option_resampled_df.copy()
+    ts_list = changed_df.index.get_level_values('ts').unique()
+    changed_df.loc[changed_df.index.get_level_values('ts') == ts_list[3], 'total_ivar'] *= 1.01
+    metrics = RunMetrics()
+    new_params_df, _, n_changed = compute_svi_params_incremental(
+        changed_df, params_df, hashes, metrics=metrics, n_workers=2, block_size=3
+    )
+    assert n_changed == 1
+    assert [record['ts'] for record in metrics.slices] == [ts_list[3]]
+    pd.testing.assert_index_equal(new_params_df.index, params_df.index)
+    unchanged = new_params_df.index != ts_list[3]
+    pd.testing.assert_frame_equal(new_params_df[unchanged], params_df[unchanged])
+
+    # 批次求解的結果不可當成 method 相同的逐一擬合結果沿用
+    _, _, n_changed = compute_svi_params_incremental(changed_df, params_df, hashes, batch=True)
+    assert n_changed == len(hashes)
+
+def test_incremental_cache_is_not_shared_across_arbitrage_refit():
+    option_resampled_df = load_option_slices(4)
+    params_df, hashes, _ = compute_svi_params_incremental(option_resampled_df, arbitrage='refit')
+    # 'check' 不改參數，與 'off' 共用快取；refit 後的參數不能拿來當未重新擬合的結果
+    _, _, n_changed = compute_svi_params_incremental(option_resampled_df, params_df, hashes, arbitrage='refit')
+    assert n_changed == 0
+    for arbitrage in ('off', 'check'):
+        _, new_hashes, n_changed = compute_svi_params_incremental(
+            option_resampled_df, params_df, hashes, arbitrage=arbitrage
+        )
+        assert n_changed == len(hashes)
+    pd.testing.assert_series_equal(
+        new_hashes, compute_svi_params_incremental(option_resampled_df, arbitrage='off')[1]
+    )
+
+def test_svi_surface_calibrates_each_expiry_on_its_own_clock():
+    option_resampled_df = load_option_slices(4)
+    # 同一組 slice 標成兩個到期月份，只有 time_to_expiry 應該不同
+    surface_input = pd.concat(
+        {expiry: option_resampled_df for expiry in ('202308', '202308W1')},
+        names=['expiry']
+    ).reorder_levels(['ts', 'expiry', 'option_type', 'strike']).sort_index()
+
+    surface = compute_svi_surface(surface_input, n_workers=2)
+    assert surface.index.names == ['ts', 'expiry']
+    assert surface.index.is_monotonic_increasing
+    for expiry in ('202308', '202308W1'):
+        expected = compute_svi_params(
+            option_resampled_df, expiration_ts=parse_expiration_ts(expiry)
+        )
+        pd.testing.assert_frame_equal(surface.xs(expiry, level='expiry'), expected)
+    assert (
+        surface.xs('202308W1', level='expiry')['time_to_expiry']
+        < surface.xs('202308', level='expiry')['time_to_expiry']
+    ).all()
+
+def test_slice_prep_reproduces_calibration_inputs_and_objective():
+    option_resampled_df = load_option_slices(6)
+    metrics = RunMetrics()
+    params_df = compute_svi_params(option_resampled_df, metrics=metrics)
+    prep = build_svi_slice_prep(option_resampled_df, params_df)
+    pd.testing.assert_index_equal(prep.index, option_resampled_df.index)
+
+    objectives = metrics.slice_frame().set_index('ts')['objective']
+    for ts, opt_type, log_moneyness, total_ivar, volume in extract_svi_slices(option_resampled_df):
+        rows = prep.xs(ts, level='ts')
+        np.testing.assert_array_equal(rows['log_moneyness'].to_numpy(), log_moneyness)
+        np.testing.assert_array_equal(
+            rows['valid'].to_numpy(), construct_valid_mask(opt_type, log_moneyness, total_ivar, volume)
+        )
+        valid = rows['valid'].to_numpy()
+        # 進入目標函數的點都在 5% 閾值之上，或不在該類型被過濾的價外區間
+        assert (
+            (volume[valid] > rows['volume_threshold'].to_numpy()[valid])
+            | ((opt_type[valid] == 'C') & (log_moneyness[valid] >= -0.01))
+            | ((opt_type[valid] == 'P') & (log_moneyness[valid] <= 0.01))
+        ).all()
+        residual = rows['residual'].to_numpy()[valid]
+        np.testing.assert_allclose(np.sum(volume[valid] * residual ** 2), objectives[ts], rtol=1e-10)
+
 if __name__ == "__main__":
     option_resampled_df = pd.read_parquet(PATHS.option_resampled)
-    vol_surface_svi = compute_svi_params(option_resampled_df)
\ No newline at end of file
+    vol_surface_svi = compute_svi_params(option_resampled_df)
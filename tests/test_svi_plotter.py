@@ -2,13 +2,158 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1] / 'src'))
 
+import base64
+import json
+import numpy as np
 import pandas as pd
 from iv_calibration import (
     PATHS,
+    build_svi_slice_prep,
     plot_with_slider,
+    export_svi_snapshots,
     build_svi_total_ivar_curve,
     build_svi_iv_curve
 )
+from iv_calibration.visualization.svi_plotter import (
+    build_slice_index,
+    build_slider_frames,
+    pack_slider_frames
+)
+
+def load_plot_inputs(n_ts: int = 12):
+    option_resampled_df = pd.read_parquet(PATHS.option_resampled)
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi).iloc[:n_ts]
+    return option_resampled_df, vol_surface_svi_df
+
+def test_packed_frames_round_trip():
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs()
+    _, _, _, frames = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv'
+    )
+    values, offsets = pack_slider_frames(frames)
+    assert values.dtype == np.float32 and offsets.shape == (len(frames), 13)
+    for frame, bounds in zip(frames, offsets):
+        segments = [values[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+        expected = [arr for x, y, size in frame for arr in ((x, y) if size is None else (x, y, size))]
+        for segment, arr in zip(segments, expected):
+            np.testing.assert_allclose(segment, np.asarray(arr, dtype=np.float32))
+
+def test_lite_slider_keeps_five_traces_and_grows_linearly(tmp_path, monkeypatch):
+    import iv_calibration.visualization.svi_plotter as svi_plotter
+
+    opened = []
+    monkeypatch.setattr(svi_plotter.webbrowser, 'open', opened.append)
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs(40)
+    sizes = {}
+    for n_ts in (20, 40):
+        path = tmp_path / f'lite_{n_ts}.html'
+        plot_with_slider(
+            option_resampled_df, vol_surface_svi_df.iloc[:n_ts], build_svi_total_ivar_curve,
+            'total_ivar', 'Total Implied Variance', path, mode='lite', show=(n_ts == 20)
+        )
+        html = path.read_text()
+        sizes[n_ts] = len(html)
+        assert html.count('"showlegend":true') == 5 and '"visible":false' not in html
+        payload = json.loads(html[html.index('const payload = ') + 16:].split(';\n', 1)[0])
+        assert len(payload['ts']) == n_ts
+        assert len(base64.b64decode(payload['data'])) % 4 == 0
+    # show=True 時開啟寫出的 HTML（含 post_script），而不是 fig.show()
+    assert opened == [(tmp_path / 'lite_20.html').resolve().as_uri()]
+    # 扣掉 plotly 外框後，大小與時間點數大致成正比
+    assert sizes[40] - sizes[20] < 1.3 * (sizes[20] - 0.5 * (sizes[40] - sizes[20]))
+
+def test_windowed_ranges_match_xs_scan():
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs(30)
+    window = 3
+    ts_list, k_ranges, y_ranges, frames = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', window=window
+    )
+    for i in range(len(ts_list)):
+        neighbours = ts_list[max(0, i - window):i + window + 1]
+        mkt = pd.concat([option_resampled_df.xs(ts, level='ts') for ts in neighbours])
+        k = np.log(mkt.index.get_level_values('strike') / mkt['forward_price']).to_numpy()
+        for (lo, hi), values in ((k_ranges[i], k), (y_ranges[i], mkt['iv'].to_numpy())):
+            margin = (values.max() - values.min()) * 0.05
+            np.testing.assert_allclose([lo, hi], [values.min() - margin, values.max() + margin])
+
+    # 打亂列順序後，偏移索引重新分組，結果不變
+    shuffled_df = option_resampled_df.sample(frac=1.0, random_state=0)
+    index = build_slice_index(shuffled_df)
+    assert index.ts.is_monotonic_increasing and (index.stops - index.starts).sum() == len(shuffled_df)
+    _, _, shuffled_y_ranges, _ = build_slider_frames(
+        shuffled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', window=window
+    )
+    np.testing.assert_array_equal(np.array(shuffled_y_ranges), np.array(y_ranges))
+
+def test_frames_from_calibrator_prep_match_recomputed_mask():
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs(20)
+    ts_index = option_resampled_df.index.get_level_values('ts')
+    option_resampled_df = option_resampled_df[ts_index.isin(vol_surface_svi_df.index)]
+    prep = build_svi_slice_prep(option_resampled_df, vol_surface_svi_df)
+    expected = build_slider_frames(option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv')
+    # 列順序不同時依索引對齊
+    shuffled_prep = prep.sample(frac=1.0, random_state=0)
+    actual = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', slice_prep=shuffled_prep
+    )
+    np.testing.assert_array_equal(np.array(actual[1]), np.array(expected[1]))
+    for frame, expected_frame in zip(actual[3], expected[3]):
+        for (x, y, size), (ex, ey, esize) in zip(frame, expected_frame):
+            np.testing.assert_array_equal(x, ex)
+            np.testing.assert_array_equal(y, ey)
+            assert (size is None) == (esize is None)
+            if size is not None:
+                np.testing.assert_array_equal(size, esize)
+
+def test_snapshot_export_samples_timestamps_headless(tmp_path):
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs(9)
+    serial = export_svi_snapshots(
+        option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', 'Implied Volatility',
+        tmp_path / 'serial', every=4
+    )
+    assert [path.name for path in serial] == [
+        f"iv_{ts:%Y%m%d_%H%M%S}.png" for ts in vol_surface_svi_df.index[::4]
+    ]
+    assert all(path.read_bytes()[:8] == b'\x89PNG\r\n\x1a\n' for path in serial)
+
+    pooled = export_svi_snapshots(
+        option_resampled_df, vol_surface_svi_df, build_svi_total_ivar_curve, 'total_ivar',
+        'Total Implied Variance', tmp_path / 'pooled', fmt='svg', n_workers=2
+    )
+    assert len(pooled) == len(vol_surface_svi_df)
+    assert pooled == sorted(pooled) and all(path.read_text().lstrip().startswith('<?xml') for path in pooled)
+
+def test_sampled_frames_match_full_frames():
+    option_resampled_df, vol_surface_svi_df = load_plot_inputs(9)
+    full = build_slider_frames(option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', window=3)
+    sampled = build_slider_frames(
+        option_resampled_df, vol_surface_svi_df, build_svi_iv_curve, 'iv', window=3, every=4
+    )
+    # 座標範圍仍以完整時間序列計算，只是少建了 frame
+    for full_values, sampled_values in zip(full[:3], sampled[:3]):
+        assert sampled_values == full_values[::4]
+    assert len(sampled[3]) == 3
+    for full_frame, sampled_frame in zip(full[3][::4], sampled[3]):
+        for full_trace, sampled_trace in zip(full_frame, sampled_frame):
+            for full_arr, sampled_arr in zip(full_trace, sampled_trace):
+                np.testing.assert_array_equal(sampled_arr, full_arr)
+
+def test_snapshot_nan_range_fallback_covers_market_points():
+    from iv_calibration.visualization.svi_snapshots import _frame_range
+
+    empty = (np.array([]), np.array([]), None)
+    frame = (
+        (np.linspace(-0.1, 0.1, 5), np.full(5, 0.2), None),
+        (np.array([-0.3, np.nan]), np.array([0.5, np.nan]), np.array([10.0, 10.0])),
+        empty,
+        (np.array([0.4]), np.array([0.1]), np.array([10.0])),
+        empty,
+    )
+    k_lo, k_hi = _frame_range(frame, 0)
+    y_lo, y_hi = _frame_range(frame, 1)
+    assert k_lo < -0.3 and k_hi > 0.4
+    assert y_lo < 0.1 and y_hi > 0.5
+    assert np.isnan(_frame_range((empty,) * 5, 0)).all()
 
 if __name__ == '__main__':
     option_resampled_df = pd.read_parquet(PATHS.option_resampled)
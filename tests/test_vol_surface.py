@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+import pytest
+from iv_calibration import PATHS, VolSurface
+from iv_calibration.svi_calibrator import compute_svi_total_ivar
+
+SVI_COLUMNS = ['a', 'b', 'rho', 'm', 'sigma']
+
+def test_lookup_matches_row_by_row_evaluation():
+    vol_surface_svi_df = pd.read_parquet(PATHS.vol_surface_svi)
+    surface = VolSurface(vol_surface_svi_df)
+    valid_df = vol_surface_svi_df.dropna()
+    k = np.linspace(-0.1, 0.1, 7)
+
+    ts = valid_df.index[[3, 50, 200]]
+    # 每個時間戳稍晚 20 秒查詢，應落到同一個 slice
+    query_ts = np.repeat(ts + pd.Timedelta('20s'), k.size)
+    query_k = np.tile(k, ts.size)
+    expected = np.concatenate([
+        np.sqrt(compute_svi_total_ivar(k, *valid_df.loc[t, SVI_COLUMNS]) / valid_df.loc[t, 'time_to_expiry'])
+        for t in ts
+    ])
+    forward = 17000.0
+    result = surface.implied_vol(query_ts.values, forward * np.exp(query_k), forward)
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    # 第一個 slice 之前查不到
+    assert np.isnan(surface.total_ivar(valid_df.index[0] - pd.Timedelta('1min'), 0.0)).all()
+
+def test_missing_slices_fall_back_to_previous_and_time_interpolation():
+    ts = pd.date_range('2023-07-21 09:00', periods=3, freq='1min', name='ts')
+    params_df = pd.DataFrame({
+        'a': [0.001, np.nan, 0.003],
+        'b': 0.02, 'rho': -0.5, 'm': 0.0, 'sigma': 0.05,
+        'time_to_expiry': [0.1, 0.1, 0.1],
+    }, index=ts)
+    k = np.array([-0.05, 0.0, 0.05])
+    w0 = compute_svi_total_ivar(k, *params_df.iloc[0][SVI_COLUMNS])
+    w2 = compute_svi_total_ivar(k, *params_df.iloc[2][SVI_COLUMNS])
+
+    np.testing.assert_allclose(VolSurface(params_df).total_ivar(ts[1], k), w0)
+    interpolated = VolSurface(params_df, interpolate_time=True).total_ivar(ts[1], k)
+    np.testing.assert_allclose(interpolated, 0.5 * (w0 + w2))
+
+def test_term_structure_interpolates_total_variance_in_tau():
+    ts = pd.Timestamp('2023-07-21 09:00')
+    params_df = pd.DataFrame({
+        'ts': ts,
+        'expiry': ['202308', '202307W4'],
+        'a': [0.002, 0.0005], 'b': [0.02, 0.01], 'rho': -0.4, 'm': 0.0, 'sigma': 0.05,
+        'time_to_expiry': [0.1, 0.02],
+    }).set_index(['ts', 'expiry'])
+    surface = VolSurface(params_df)
+    k = np.linspace(-0.1, 0.1, 5)
+    w_short = compute_svi_total_ivar(k, *params_df.iloc[1][SVI_COLUMNS])
+    w_long = compute_svi_total_ivar(k, *params_df.iloc[0][SVI_COLUMNS])
+
+    np.testing.assert_allclose(surface.total_ivar(ts, k, 0.02), w_short)
+    np.testing.assert_allclose(surface.total_ivar(ts, k, 0.06), 0.5 * (w_short + w_long))
+    np.testing.assert_allclose(surface.total_ivar(ts, k, 0.01), 0.5 * w_short)
+    np.testing.assert_allclose(surface.total_ivar(ts, k, 0.2), 2.0 * w_long)
+    # k 與 tau 可廣播成整張網格
+    grid = surface.total_ivar(ts, k[None, :], np.array([0.02, 0.06, 0.1])[:, None])
+    assert grid.shape == (3, 5)
+    assert (np.diff(grid, axis=0) >= 0).all()
+    with pytest.raises(ValueError):
+        surface.total_ivar(ts, k)